@@ -73,6 +73,8 @@ Singleton {
     
     signal gridBrowserSelected(string itemId, string actionId)
     signal gridBrowserCancelled()
+    // A page request of a paged grid failed (plugin replied with an error)
+    signal gridBrowserPageFailed()
     
     function openGridBrowserForPlugin(config) {
         gridBrowserConfig = config;
@@ -81,6 +83,15 @@ Singleton {
         gridBrowserOpen = true;
     }
     
+    // Append a page of items to a paged grid (items beyond `offset` are replaced)
+    function appendGridBrowserItems(offset, items, total) {
+        if (!gridBrowserConfig) return;
+        const config = Object.assign({}, gridBrowserConfig);
+        config.items = gridBrowserConfig.items.slice(0, offset).concat(items);
+        if (total !== undefined) config.total = total;
+        gridBrowserConfig = config;
+    }
+    
     function closeGridBrowser() {
         gridBrowserOpen = false;
         gridBrowserConfig = null;
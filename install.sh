@@ -405,6 +405,8 @@ install_hamr() {
     # Make scripts executable
     chmod +x "$SCRIPT_DIR/scripts/thumbnails/thumbgen.sh" 2>/dev/null || true
     chmod +x "$SCRIPT_DIR/scripts/thumbnails/thumbgen.py" 2>/dev/null || true
+    chmod +x "$SCRIPT_DIR/scripts/thumbnails/thumbnail-service.sh" 2>/dev/null || true
+    chmod +x "$SCRIPT_DIR/scripts/thumbnails/thumbnail-service.py" 2>/dev/null || true
     chmod +x "$SCRIPT_DIR/scripts/ocr/ocr-index.sh" 2>/dev/null || true
     chmod +x "$SCRIPT_DIR/scripts/ocr/ocr-index.py" 2>/dev/null || true
     chmod +x "$SCRIPT_DIR/scripts/colors/switchwall.sh" 2>/dev/null || true
@@ -210,6 +210,20 @@ Singleton {
                 property string icon: "Material Symbols Rounded"
             }
 
+            // ==================== PLUGINS ====================
+            property JsonObject plugins: JsonObject {
+                property JsonObject clipboard: JsonObject {
+                    property string watchMode: "inotify" // "inotify", "wl-paste" or "poll"
+                }
+                property JsonObject pictures: JsonObject {
+                    property bool recursive: true // Include subfolders of ~/Pictures
+                }
+                property JsonObject files: JsonObject {
+                    // Names (or paths relative to ~ when they contain "/") left out of the file index
+                    property list<string> exclude: [".git", "node_modules", ".cache", ".local/share", ".mozilla", ".thunderbird", ".steam", ".wine", "__pycache__", ".npm", ".cargo", ".rustup"]
+                }
+            }
+
             // ==================== PATHS ====================
             property JsonObject paths: JsonObject {
                 property string wallpaperDir: "" // Empty = default ~/Pictures/Wallpapers
@@ -19,6 +19,17 @@ FocusScope {
     readonly property var customActions: config?.actions ?? []
     readonly property var items: config?.items ?? []
     
+    // Paged grids report a total larger than the loaded items; more pages are
+    // requested from the plugin as the user scrolls towards the end
+    readonly property int total: config?.total ?? items.length
+    readonly property bool hasMore: !pagesExhausted && items.length < total
+    readonly property int pageSize: columns * 6
+    property bool pageLoading: false
+    property int pageOffset: 0
+    // Set when a page comes back empty, so a stale total doesn't keep
+    // requesting pages that have nothing in them
+    property bool pagesExhausted: false
+    
     property string filterQuery: ""
 
     signal itemSelected(string itemId, string actionId)
@@ -57,6 +68,44 @@ FocusScope {
     function moveSelection(delta) {
         grid.currentIndex = Math.max(0, Math.min(filteredItems.length - 1, grid.currentIndex + delta));
         grid.positionViewAtIndex(grid.currentIndex, GridView.Contain);
+        root.loadMoreIfNeeded();
+    }
+
+    function loadMoreIfNeeded() {
+        if (!root.hasMore || root.pageLoading) return;
+        const nearEndByScroll = grid.contentY + grid.height >= grid.contentHeight - grid.cellHeight * 2;
+        const nearEndBySelection = grid.currentIndex >= root.filteredItems.length - root.columns * 2;
+        if (nearEndByScroll || nearEndBySelection) {
+            root.pageLoading = true;
+            root.pageOffset = root.items.length;
+            grid.savedIndex = grid.currentIndex;
+            grid.savedContentY = grid.contentY;
+            pageTimeout.restart();
+            PluginRunner.requestGridBrowserPage(root.items.length, root.pageSize);
+        }
+    }
+
+    function finishPageLoad() {
+        pageTimeout.stop();
+        if (root.items.length <= root.pageOffset) {
+            root.pagesExhausted = true;
+        }
+        root.pageLoading = false;
+    }
+
+    // Page requests that get no reply are given up on so scrolling can retry
+    Timer {
+        id: pageTimeout
+        interval: 5000
+        onTriggered: root.pageLoading = false
+    }
+
+    Connections {
+        target: GlobalStates
+        function onGridBrowserPageFailed() {
+            pageTimeout.stop();
+            root.pageLoading = false;
+        }
     }
 
     function activateCurrent() {
@@ -129,6 +178,8 @@ FocusScope {
 
                 readonly property int columns: root.columns
                 property int currentIndex: 0
+                property int savedIndex: 0
+                property real savedContentY: 0
 
                 anchors {
                     fill: parent
@@ -143,7 +194,18 @@ FocusScope {
                 ScrollBar.vertical: StyledScrollBar {}
 
                 model: root.filteredItems
-                onModelChanged: currentIndex = 0
+                onModelChanged: {
+                    if (root.pageLoading) {
+                        // Appended page: keep selection and scroll position
+                        root.finishPageLoad();
+                        currentIndex = savedIndex;
+                        Qt.callLater(() => grid.contentY = grid.savedContentY);
+                    } else {
+                        root.pagesExhausted = false;
+                        currentIndex = 0;
+                    }
+                }
+                onContentYChanged: root.loadMoreIfNeeded()
                 delegate: GridViewItem {
                     required property var modelData
                     required property int index
@@ -185,6 +247,8 @@ FocusScope {
         }
     }
 
+    Component.onCompleted: Qt.callLater(root.loadMoreIfNeeded)
+
     Connections {
         target: LauncherSearch
         function onQueryChanged() {
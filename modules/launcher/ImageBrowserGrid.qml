@@ -42,7 +42,27 @@ FocusScope {
     function updateThumbnails() {
         const totalImageMargin = (Appearance.sizes.imageBrowserItemMargins + Appearance.sizes.imageBrowserItemPadding) * 2
         const thumbnailSizeName = Images.thumbnailSizeNameForDimensions(grid.cellWidth - totalImageMargin, grid.cellHeight - totalImageMargin)
-        FolderBrowser.generateThumbnail(thumbnailSizeName)
+        FolderBrowser.generateThumbnail(thumbnailSizeName, root.visibleFilePaths())
+    }
+
+    // Files in the rows currently on screen (plus one row below)
+    function visibleFilePaths() {
+        if (grid.cellHeight <= 0) return [];
+        const first = Math.floor(grid.contentY / grid.cellHeight) * root.columns;
+        const count = (Math.ceil(grid.height / grid.cellHeight) + 1) * root.columns;
+        const last = Math.min(FolderBrowser.filteredModel.count, first + count);
+        const paths = [];
+        for (let i = Math.max(0, first); i < last; i++) {
+            const item = FolderBrowser.filteredModel.get(i);
+            if (item && !item.fileIsDir) paths.push(item.filePath);
+        }
+        return paths;
+    }
+
+    Timer {
+        id: prioritizeThumbnailsTimer
+        interval: 100
+        onTriggered: FolderBrowser.prioritizeThumbnails(root.visibleFilePaths())
     }
     
     function startOcrIndexing() {
@@ -199,6 +219,8 @@ FocusScope {
 
                 model: FolderBrowser.filteredModel
                 onModelChanged: currentIndex = 0
+                onContentYChanged: prioritizeThumbnailsTimer.restart()
+                onCountChanged: prioritizeThumbnailsTimer.restart()
                 delegate: ImageBrowserItem {
                     required property var modelData
                     required property int index
@@ -7,17 +7,28 @@ Features:
 - Category filtering (All, Development, Graphics, Internet, etc.)
 - Fuzzy search within current category
 - Frecency-based sorting (recently/frequently used apps first)
+- Live updates: application directories are watched with inotify, and only
+  the changed .desktop files are re-parsed and sent as incremental index updates
+- Parsed entries are cached on disk (keyed by path, mtime and size), so a warm
+  start only re-parses .desktop files that changed since the last run
 """
 
+import ctypes
 import json
 import os
 import select
 import signal
+import struct
 import subprocess
 import sys
-from configparser import ConfigParser
+import time
 from pathlib import Path
 
+# Parsed .desktop entry cache
+CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "hamr"
+PARSE_CACHE_FILE = CACHE_DIR / "apps-cache.json"
+PARSE_CACHE_VERSION = 1
+
 # XDG application directories
 APP_DIRS = [
     Path.home() / ".local/share/applications",
@@ -62,23 +73,97 @@ CATEGORY_ICONS = {
     "Other": "more_horiz",
 }
 
+# Unlocalized keys read from .desktop files; everything else is skipped
+DESKTOP_ENTRY_KEYS = {
+    "Type",
+    "NoDisplay",
+    "Hidden",
+    "Name",
+    "GenericName",
+    "Comment",
+    "Icon",
+    "Exec",
+    "Categories",
+    "Keywords",
+    "Terminal",
+    "Actions",
+}
+DESKTOP_ACTION_KEYS = {"Name", "Exec", "Icon"}
+
+# inotify constants
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+WATCH_MASK = (
+    IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_DELETE_SELF
+    | IN_MOVE_SELF
+)
+EVENT_HEADER = struct.Struct("iIII")
+
+# Wait for a burst of changes (package installs) to finish before updating
+CHANGE_SETTLE_SECONDS = 0.05
+# How often to look for application directories that don't exist yet
+MISSING_DIR_RECHECK_SECONDS = 60
+
 
 def emit(data: dict) -> None:
     """Emit JSON response to stdout (line-buffered)."""
     print(json.dumps(data), flush=True)
 
 
+def read_desktop_sections(path: Path) -> dict[str, dict[str, str]]:
+    """Scan a .desktop file for the keys we use.
+
+    Only [Desktop Entry] and [Desktop Action *] sections are kept, and only the
+    unlocalized keys in DESKTOP_ENTRY_KEYS / DESKTOP_ACTION_KEYS (first value
+    wins). Comments and localized keys never match and are skipped.
+    """
+    sections: dict[str, dict[str, str]] = {}
+    current: dict[str, str] | None = None
+    wanted = DESKTOP_ENTRY_KEYS
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            if line[0] == "[":
+                name = line.strip()[1:-1]
+                if name == "Desktop Entry":
+                    wanted = DESKTOP_ENTRY_KEYS
+                elif name.startswith("Desktop Action "):
+                    wanted = DESKTOP_ACTION_KEYS
+                else:
+                    current = None
+                    continue
+                current = sections.setdefault(name, {})
+                continue
+            if current is None:
+                continue
+            key, sep, value = line.partition("=")
+            if not sep:
+                continue
+            key = key.strip()
+            if key in wanted and key not in current:
+                current[key] = value.strip()
+    return sections
+
+
 def parse_desktop_file(path: Path) -> dict | None:
     """Parse a .desktop file and return app info"""
     try:
-        config = ConfigParser(interpolation=None)
-        config.read(path, encoding="utf-8")
-
-        if not config.has_section("Desktop Entry"):
+        sections = read_desktop_sections(path)
+        entry = sections.get("Desktop Entry")
+        if entry is None:
             return None
 
-        entry = config["Desktop Entry"]
-
         if entry.get("Type", "") != "Application":
             return None
         if entry.get("NoDisplay", "").lower() == "true":
@@ -106,9 +191,8 @@ def parse_desktop_file(path: Path) -> dict | None:
         action_ids = [a.strip() for a in actions_str.split(";") if a.strip()]
         desktop_actions = []
         for action_id in action_ids:
-            section_name = f"Desktop Action {action_id}"
-            if config.has_section(section_name):
-                action_section = config[section_name]
+            action_section = sections.get(f"Desktop Action {action_id}")
+            if action_section is not None:
                 action_name = action_section.get("Name", action_id)
                 action_exec = action_section.get("Exec", "")
                 action_exec_clean = " ".join(
@@ -142,23 +226,222 @@ def parse_desktop_file(path: Path) -> dict | None:
         return None
 
 
-def load_all_apps() -> list[dict]:
+class ParseCache:
+    """Parsed .desktop entries persisted across daemon starts.
+
+    Entries are keyed by path and validated against the file's mtime and size
+    (stat follows symlinks, so flatpak exports are checked against their
+    targets). Format: {"version": 1, "files": {path: [mtime_ns, size, app]}}
+    where app is None for files that aren't launchable apps.
+    """
+
+    def __init__(self):
+        self.files: dict[str, list] = {}
+        self.dirty = False
+
+    def load(self) -> None:
+        try:
+            data = json.loads(PARSE_CACHE_FILE.read_text())
+            if data.get("version") == PARSE_CACHE_VERSION:
+                self.files = data["files"]
+        except (json.JSONDecodeError, OSError, KeyError, TypeError):
+            self.files = {}
+
+    def save(self) -> None:
+        if not self.dirty:
+            return
+        try:
+            CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            tmp = PARSE_CACHE_FILE.with_suffix(".tmp")
+            tmp.write_text(
+                json.dumps({"version": PARSE_CACHE_VERSION, "files": self.files})
+            )
+            os.replace(tmp, PARSE_CACHE_FILE)
+            self.dirty = False
+        except OSError:
+            pass
+
+    def parse(self, path: Path, st: os.stat_result | None = None) -> dict | None:
+        """Get app info for a .desktop file, re-parsing only if it changed."""
+        key = str(path)
+        try:
+            st = st or path.stat()
+        except OSError:
+            self.forget(key)
+            return None
+        cached = self.files.get(key)
+        if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+            return cached[2]
+        app = parse_desktop_file(path)
+        self.files[key] = [st.st_mtime_ns, st.st_size, app]
+        self.dirty = True
+        return app
+
+    def forget(self, key: str) -> None:
+        if self.files.pop(key, None) is not None:
+            self.dirty = True
+
+    def prune(self, seen: set[str]) -> None:
+        """Drop entries for files that no longer exist"""
+        for key in self.files.keys() - seen:
+            self.forget(key)
+
+
+def scan_app_dir(app_dir: Path, cache: ParseCache, seen: set[str]) -> dict[str, dict]:
+    """Get every app in one application directory, adding paths to seen"""
+    apps = {}
+    try:
+        with os.scandir(app_dir) as it:
+            for entry in it:
+                if entry.name.startswith(".") or not entry.name.endswith(".desktop"):
+                    continue
+                seen.add(entry.path)
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                app = cache.parse(Path(entry.path), st)
+                if app:
+                    apps[app["id"]] = app
+    except OSError:
+        pass
+    return apps
+
+
+def load_all_apps(cache: ParseCache) -> list[dict]:
     """Load all applications from .desktop files"""
     apps = {}  # Use dict to dedupe by file path
+    seen: set[str] = set()
 
     for app_dir in APP_DIRS:
-        if not app_dir.exists():
-            continue
-        for desktop_file in app_dir.glob("*.desktop"):
-            app = parse_desktop_file(desktop_file)
-            if app:
-                # Dedupe by file path (id) - each .desktop file is unique
-                if app["id"] not in apps:
-                    apps[app["id"]] = app
+        for app_id, app in scan_app_dir(app_dir, cache, seen).items():
+            # Dedupe by file path (id) - each .desktop file is unique
+            if app_id not in apps:
+                apps[app_id] = app
 
+    cache.prune(seen)
     return list(apps.values())
 
 
+def sort_apps(apps: dict[str, dict]) -> list[dict]:
+    """Sort apps alphabetically (frecency handled by hamr's unified system)"""
+    return sorted(apps.values(), key=lambda app: app["name"].lower())
+
+
+class AppWatcher:
+    """inotify watches on APP_DIRS, reporting which .desktop files changed."""
+
+    def __init__(self):
+        self.libc = ctypes.CDLL("libc.so.6", use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        self.wd_dirs: dict[int, Path] = {}
+        self.last_recheck = time.time()
+
+    @property
+    def missing(self) -> list[Path]:
+        watched = set(self.wd_dirs.values())
+        return [d for d in APP_DIRS if d not in watched]
+
+    def watch_missing(self) -> list[Path]:
+        """Watch application dirs that now exist. Returns the newly watched dirs."""
+        self.last_recheck = time.time()
+        added = []
+        if self.fd < 0:
+            return added
+        for app_dir in self.missing:
+            wd = self.libc.inotify_add_watch(self.fd, str(app_dir).encode(), WATCH_MASK)
+            if wd >= 0:
+                self.wd_dirs[wd] = app_dir
+                added.append(app_dir)
+        return added
+
+    def read_events(self) -> tuple[set[Path], set[Path], bool]:
+        """Read pending events.
+
+        Returns (changed .desktop files, dirs to rescan, overflowed).
+        """
+        changed: set[Path] = set()
+        rescan: set[Path] = set()
+        overflow = False
+        try:
+            buf = os.read(self.fd, 65536)
+        except OSError:
+            return changed, rescan, overflow
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(buf):
+            wd, mask, _cookie, length = EVENT_HEADER.unpack_from(buf, offset)
+            name = buf[offset + EVENT_HEADER.size : offset + EVENT_HEADER.size + length]
+            offset += EVENT_HEADER.size + length
+            if mask & IN_Q_OVERFLOW:
+                overflow = True
+                continue
+            app_dir = self.wd_dirs.get(wd)
+            if app_dir is None:
+                continue
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED):
+                # Directory itself went away (e.g. flatpak exports replaced):
+                # drop its apps and pick it up again once it's back
+                self.wd_dirs.pop(wd, None)
+                if mask & IN_MOVE_SELF:
+                    self.libc.inotify_rm_watch(self.fd, wd)
+                rescan.add(app_dir)
+                continue
+            filename = os.fsdecode(name.rstrip(b"\0"))
+            if filename.endswith(".desktop"):
+                changed.add(app_dir / filename)
+        return changed, rescan, overflow
+
+    def read_burst(self) -> tuple[set[Path], set[Path], bool]:
+        """Read events until changes settle."""
+        changed, rescan, overflow = self.read_events()
+        while select.select([self.fd], [], [], CHANGE_SETTLE_SECONDS)[0]:
+            more_changed, more_rescan, more_overflow = self.read_events()
+            changed |= more_changed
+            rescan |= more_rescan
+            overflow |= more_overflow
+        return changed, rescan, overflow
+
+
+def apply_changes(
+    apps: dict[str, dict], cache: ParseCache, changed: set[Path], rescan: set[Path]
+) -> tuple[list[dict], list[str]]:
+    """Re-parse changed files and rescan dirs in place.
+
+    Returns (added or updated apps, removed app ids).
+    """
+    updated: dict[str, dict] = {}
+    removed: set[str] = set()
+
+    for app_dir in rescan:
+        prefix = f"{app_dir}/"
+        old_ids = {app_id for app_id in apps if app_id.startswith(prefix)}
+        seen: set[str] = set()
+        new_apps = scan_app_dir(app_dir, cache, seen)
+        for key in [k for k in cache.files if k.startswith(prefix)]:
+            if key not in seen:
+                cache.forget(key)
+        removed |= old_ids - new_apps.keys()
+        for app_id in old_ids - new_apps.keys():
+            del apps[app_id]
+        for app_id, app in new_apps.items():
+            if apps.get(app_id) != app:
+                apps[app_id] = app
+                updated[app_id] = app
+
+    for path in changed:
+        app_id = str(path)
+        app = cache.parse(path)
+        if app is None:
+            if apps.pop(app_id, None) is not None:
+                removed.add(app_id)
+        elif apps.get(app_id) != app:
+            apps[app_id] = app
+            updated[app_id] = app
+            removed.discard(app_id)
+
+    return list(updated.values()), sorted(removed)
+
+
 def fuzzy_match(query: str, text: str) -> bool:
     """Fuzzy match - query is substring or all chars appear in order with reasonable gaps"""
     query = query.lower()
@@ -340,7 +623,61 @@ def get_categories(apps: list[dict]) -> list[str]:
     return result
 
 
-def handle_request(request: dict, all_apps: list[dict]) -> None:
+class AppCatalog:
+    """Apps with the lookups and views handle_request needs, precomputed.
+
+    by_id is the live {desktop path: app} dict; call update() after changing
+    it to rebuild the sorted list, category buckets and memoized results.
+    """
+
+    def __init__(self, by_id: dict[str, dict]):
+        self.by_id = by_id
+        self.update()
+
+    def update(self) -> None:
+        self.apps = sort_apps(self.by_id)
+        self.by_category: dict[str, list[dict]] = {}
+        for app in self.apps:
+            self.by_category.setdefault(
+                app.get("display_category", "Other"), []
+            ).append(app)
+
+        self.category_results = [
+            {
+                "id": "__cat__:All",
+                "name": "All Applications",
+                "description": f"{len(self.apps)} apps",
+                "icon": "apps",
+            }
+        ]
+        for cat in get_categories(self.apps):
+            self.category_results.append(
+                {
+                    "id": f"__cat__:{cat}",
+                    "name": cat,
+                    "description": f"{len(self.by_category[cat])} apps",
+                    "icon": CATEGORY_ICONS.get(cat, "folder"),
+                }
+            )
+
+        self._results: dict[tuple[str, bool], dict] = {}
+
+    def in_category(self, category: str) -> list[dict]:
+        if category == "All":
+            return self.apps
+        return self.by_category.get(category, [])
+
+    def result(self, app: dict, show_category: bool = False) -> dict:
+        """app_to_result, memoized until the next update()"""
+        key = (app["id"], show_category)
+        result = self._results.get(key)
+        if result is None:
+            result = app_to_result(app, show_category)
+            self._results[key] = result
+        return result
+
+
+def handle_request(request: dict, catalog: AppCatalog) -> None:
     """Handle incoming request from hamr."""
     step = request.get("step", "initial")
     query = request.get("query", "").strip()
@@ -353,18 +690,14 @@ def handle_request(request: dict, all_apps: list[dict]) -> None:
         mode = request.get("mode", "full")
         indexed_ids = set(request.get("indexedIds", []))
 
-        # Build current ID set (desktop filename without .desktop)
-        current_ids = {
-            f"app:{Path(app['id']).name.removesuffix('.desktop')}" for app in all_apps
-        }
+        # Index item IDs are desktop file paths (see app_to_index_item)
+        current_ids = catalog.by_id.keys()
 
         if mode == "incremental" and indexed_ids:
             # Find new items
             new_ids = current_ids - indexed_ids
             new_items = [
-                app_to_index_item(app)
-                for app in all_apps
-                if f"app:{Path(app['id']).name.removesuffix('.desktop')}" in new_ids
+                app_to_index_item(app) for app in catalog.apps if app["id"] in new_ids
             ]
 
             # Find removed items
@@ -380,30 +713,12 @@ def handle_request(request: dict, all_apps: list[dict]) -> None:
             )
         else:
             # Full reindex
-            items = [app_to_index_item(app) for app in all_apps]
+            items = [app_to_index_item(app) for app in catalog.apps]
             emit({"type": "index", "items": items})
         return
 
     if step == "initial":
-        categories = get_categories(all_apps)
-        results = [
-            {
-                "id": "__cat__:All",
-                "name": "All Applications",
-                "description": f"{len(all_apps)} apps",
-                "icon": "apps",
-            }
-        ]
-        for cat in categories:
-            count = sum(1 for a in all_apps if a.get("display_category") == cat)
-            results.append(
-                {
-                    "id": f"__cat__:{cat}",
-                    "name": cat,
-                    "description": f"{count} apps",
-                    "icon": CATEGORY_ICONS.get(cat, "folder"),
-                }
-            )
+        results = catalog.category_results
 
         emit(
             {
@@ -419,10 +734,7 @@ def handle_request(request: dict, all_apps: list[dict]) -> None:
         # If in a category context, filter apps in that category
         if context and context.startswith("__cat__:"):
             category = context.replace("__cat__:", "")
-            if category == "All":
-                apps = all_apps
-            else:
-                apps = [a for a in all_apps if a.get("display_category") == category]
+            apps = catalog.in_category(category)
 
             # Filter by query
             if query:
@@ -435,7 +747,7 @@ def handle_request(request: dict, all_apps: list[dict]) -> None:
                 ]
 
             results = [
-                app_to_result(a, show_category=(category == "All")) for a in apps[:50]
+                catalog.result(a, show_category=(category == "All")) for a in apps[:50]
             ]
 
             if not results:
@@ -467,13 +779,13 @@ def handle_request(request: dict, all_apps: list[dict]) -> None:
             # Search all apps
             apps = [
                 a
-                for a in all_apps
+                for a in catalog.apps
                 if fuzzy_match(query, a["name"])
                 or fuzzy_match(query, a.get("generic_name", ""))
                 or fuzzy_match(query, a.get("keywords", ""))
             ]
 
-            results = [app_to_result(a, show_category=True) for a in apps[:50]]
+            results = [catalog.result(a, show_category=True) for a in apps[:50]]
 
             if not results:
                 results = [
@@ -494,25 +806,7 @@ def handle_request(request: dict, all_apps: list[dict]) -> None:
             )
         else:
             # Show categories
-            categories = get_categories(all_apps)
-            results = [
-                {
-                    "id": "__cat__:All",
-                    "name": "All Applications",
-                    "description": f"{len(all_apps)} apps",
-                    "icon": "apps",
-                }
-            ]
-            for cat in categories:
-                count = sum(1 for a in all_apps if a.get("display_category") == cat)
-                results.append(
-                    {
-                        "id": f"__cat__:{cat}",
-                        "name": cat,
-                        "description": f"{count} apps",
-                        "icon": CATEGORY_ICONS.get(cat, "folder"),
-                    }
-                )
+            results = catalog.category_results
 
             emit(
                 {
@@ -526,25 +820,7 @@ def handle_request(request: dict, all_apps: list[dict]) -> None:
 
     if step == "action":
         if selected_id == "__back__":
-            categories = get_categories(all_apps)
-            results = [
-                {
-                    "id": "__cat__:All",
-                    "name": "All Applications",
-                    "description": f"{len(all_apps)} apps",
-                    "icon": "apps",
-                }
-            ]
-            for cat in categories:
-                count = sum(1 for a in all_apps if a.get("display_category") == cat)
-                results.append(
-                    {
-                        "id": f"__cat__:{cat}",
-                        "name": cat,
-                        "description": f"{count} apps",
-                        "icon": CATEGORY_ICONS.get(cat, "folder"),
-                    }
-                )
+            results = catalog.category_results
 
             emit(
                 {
@@ -569,11 +845,7 @@ def handle_request(request: dict, all_apps: list[dict]) -> None:
                 desktop_path = parts[1]
                 action_id = parts[2]
 
-                app = None
-                for a in all_apps:
-                    if a["id"] == desktop_path:
-                        app = a
-                        break
+                app = catalog.by_id.get(desktop_path)
 
                 if app:
                     action = None
@@ -607,13 +879,10 @@ def handle_request(request: dict, all_apps: list[dict]) -> None:
 
         if selected_id.startswith("__cat__:"):
             category = selected_id.replace("__cat__:", "")
-            if category == "All":
-                apps = all_apps
-            else:
-                apps = [a for a in all_apps if a.get("display_category") == category]
+            apps = catalog.in_category(category)
 
             results = [
-                app_to_result(a, show_category=(category == "All")) for a in apps[:50]
+                catalog.result(a, show_category=(category == "All")) for a in apps[:50]
             ]
 
             emit(
@@ -631,11 +900,7 @@ def handle_request(request: dict, all_apps: list[dict]) -> None:
             )
             return
 
-        app = None
-        for a in all_apps:
-            if a["id"] == selected_id:
-                app = a
-                break
+        app = catalog.by_id.get(selected_id)
 
         if app:
             # Use safe launch API - hamr will run gio launch
@@ -660,27 +925,60 @@ def main():
     signal.signal(signal.SIGTERM, shutdown_handler)
     signal.signal(signal.SIGINT, shutdown_handler)
 
-    # Load apps once at startup
-    all_apps = load_all_apps()
-
-    # Sort apps alphabetically (frecency handled by hamr's unified system)
-    all_apps.sort(key=lambda app: app["name"].lower())
+    # Watch before the initial load so nothing installed meanwhile is missed
+    watcher = AppWatcher()
+    watcher.watch_missing()
+    cache = ParseCache()
+    cache.load()
+    catalog = AppCatalog({app["id"]: app for app in load_all_apps(cache)})
+    cache.save()
 
     # Emit initial full index on startup (for background daemon)
-    items = [app_to_index_item(app) for app in all_apps]
+    items = [app_to_index_item(app) for app in catalog.apps]
     emit({"type": "index", "mode": "full", "items": items})
 
-    # Main daemon loop - read requests from stdin
+    # Main daemon loop - read requests and application dir changes
     while True:
-        readable, _, _ = select.select([sys.stdin], [], [], 1.0)
+        watched = [sys.stdin] if watcher.fd < 0 else [sys.stdin, watcher.fd]
+        timeout = None
+        if watcher.fd >= 0 and watcher.missing:
+            timeout = max(
+                0.0, watcher.last_recheck + MISSING_DIR_RECHECK_SECONDS - time.time()
+            )
+        readable, _, _ = select.select(watched, [], [], timeout)
+
+        rescan: set[Path] = set()
+        changed: set[Path] = set()
+        if watcher.fd >= 0 and watcher.fd in readable:
+            changed, rescan, overflow = watcher.read_burst()
+            if overflow:
+                rescan = set(APP_DIRS)
+        if watcher.missing and (
+            rescan or time.time() - watcher.last_recheck >= MISSING_DIR_RECHECK_SECONDS
+        ):
+            rescan |= set(watcher.watch_missing())
+
+        if changed or rescan:
+            updated, removed = apply_changes(catalog.by_id, cache, changed, rescan)
+            cache.save()
+            if updated or removed:
+                catalog.update()
+                emit(
+                    {
+                        "type": "index",
+                        "mode": "incremental",
+                        "items": [app_to_index_item(app) for app in updated],
+                        "remove": removed,
+                    }
+                )
 
-        if readable:
+        if sys.stdin in readable:
             try:
                 line = sys.stdin.readline()
                 if not line:
                     break
                 request = json.loads(line.strip())
-                handle_request(request, all_apps)
+                handle_request(request, catalog)
             except (json.JSONDecodeError, ValueError):
                 continue
 
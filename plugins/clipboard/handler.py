@@ -1,37 +1,74 @@
 #!/usr/bin/env python3
 """
 Clipboard workflow handler - browse and manage clipboard history via cliphist.
-Features: list, search, copy, delete, wipe, image thumbnails, OCR search
+Features: list, search, copy, delete, wipe, image thumbnails, OCR search,
+full-text search over decoded entries (SQLite FTS5, maintained by the daemon)
 """
 
+import ctypes
 import hashlib
 import json
 import os
 import re
 import select
 import signal
+import sqlite3
+import struct
 import subprocess
 import sys
 import time
 from pathlib import Path
 
+# Shared OCR store, bundled with hamr in scripts/ocr
+HAMR_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(HAMR_DIR / "scripts" / "ocr"))
+import ocr_store  # noqa: E402
+
 # Cache directory for image thumbnails and OCR
 CACHE_DIR = (
     Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache"))
     / "hamr"
     / "clipboard-thumbs"
 )
-OCR_CACHE_FILE = CACHE_DIR / "ocr-index.json"
 PINNED_FILE = CACHE_DIR / "pinned.json"
 SCRIPT_DIR = Path(__file__).parent
 # Max thumbnail size (width or height)
 MAX_THUMB_SIZE = 256
+# Image grid items sent per gridBrowser page (6 rows of 8 columns)
+GRID_PAGE_SIZE = 48
+
+# Full-text search index over decoded clipboard contents and OCR text
+SEARCH_INDEX_DB = CACHE_DIR.parent / "clipboard-index.db"
+# Max `cliphist decode` spawns per sync pass so a cold build doesn't block requests
+SEARCH_INDEX_BATCH = 50
+SEARCH_INDEX_VERSION = 2
+# Max ranked full-text hits per query
+SEARCH_RESULT_LIMIT = 200
+# Marker cliphist appends to previews it truncated
+PREVIEW_ELLIPSIS = "\u2026"
 
 # Cliphist database location
 CLIPHIST_DB = (
     Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "cliphist" / "db"
 )
 
+HAMR_CONFIG_PATH = (
+    Path(os.environ.get("XDG_CONFIG_HOME", Path.home() / ".config"))
+    / "hamr"
+    / "config.json"
+)
+
+# inotify constants (cliphist only writes the db when history changes; reads
+# from `cliphist list`/`decode` don't generate IN_MODIFY)
+IN_MODIFY = 0x00000002
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+
+# Time to wait for the rest of a burst of change events (one cliphist write
+# touches the db several times)
+CHANGE_SETTLE_SECONDS = 0.01
+
 
 def load_pinned_entries() -> list[str]:
     """Load pinned entry hashes from cache"""
@@ -72,6 +109,94 @@ def is_pinned(entry: str) -> bool:
     return get_entry_hash(entry) in load_pinned_entries()
 
 
+def get_watch_mode() -> str:
+    """Get clipboard change detection mode from config: inotify, wl-paste or poll."""
+    try:
+        config = json.loads(HAMR_CONFIG_PATH.read_text())
+        mode = config.get("plugins", {}).get("clipboard", {}).get("watchMode", "")
+        if mode in ("inotify", "wl-paste", "poll"):
+            return mode
+    except (json.JSONDecodeError, OSError, AttributeError):
+        pass
+    return "inotify"
+
+
+def create_inotify_fd() -> int | None:
+    """Create inotify fd watching the cliphist db directory. Returns fd or None."""
+    try:
+        libc = ctypes.CDLL("libc.so.6", use_errno=True)
+        fd = libc.inotify_init()
+        if fd < 0:
+            return None
+        mask = IN_MODIFY | IN_MOVED_TO | IN_CREATE | IN_DELETE
+        wd = libc.inotify_add_watch(fd, str(CLIPHIST_DB.parent).encode(), mask)
+        if wd < 0:
+            os.close(fd)
+            return None
+        return fd
+    except (OSError, AttributeError):
+        return None
+
+
+def read_inotify_events(fd: int) -> list[str]:
+    """Read pending inotify events, return list of changed filenames."""
+    filenames = []
+    try:
+        buf = os.read(fd, 4096)
+        offset = 0
+        while offset < len(buf):
+            wd, mask, cookie, length = struct.unpack_from("iIII", buf, offset)
+            offset += 16
+            if length:
+                name = buf[offset : offset + length].rstrip(b"\x00").decode()
+                filenames.append(name)
+                offset += length
+    except (OSError, struct.error):
+        pass
+    return filenames
+
+
+def start_wl_paste_watch() -> subprocess.Popen | None:
+    """Run `wl-paste --watch` storing each new clipboard into cliphist.
+
+    A line is printed after every store, so the daemon learns about new entries
+    as soon as they are in the history (no separate cliphist watcher needed).
+    """
+    try:
+        return subprocess.Popen(
+            ["wl-paste", "--watch", "sh", "-c", "cliphist store; echo"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+    except (FileNotFoundError, OSError):
+        return None
+
+
+def read_clipboard_changes(fd: int, mode: str) -> bool | None:
+    """Consume a burst of change notifications from the watch fd.
+
+    Returns True if the clipboard history changed, False if not, or None if the
+    watcher went away (caller falls back to polling).
+    """
+    changed = False
+    while True:
+        if mode == "inotify":
+            changed |= CLIPHIST_DB.name in read_inotify_events(fd)
+        else:
+            try:
+                data = os.read(fd, 4096)
+            except OSError:
+                data = b""
+            if not data:
+                return None
+            changed = True
+        # Coalesce the rest of the burst before refreshing
+        ready, _, _ = select.select([fd], [], [], CHANGE_SETTLE_SECONDS)
+        if not ready:
+            return changed
+
+
 def get_clipboard_entries() -> list[str]:
     """Get clipboard entries from cliphist"""
     try:
@@ -145,19 +270,252 @@ def get_entry_hash(entry: str) -> str:
 
 
 def load_ocr_cache() -> dict[str, str]:
-    """Load OCR cache from disk"""
-    if OCR_CACHE_FILE.exists():
+    """Load OCR text for clipboard entries from the shared OCR store.
+
+    Returns {cliphist id: text}; the background indexer links entries to the store.
+    """
+    try:
+        conn = ocr_store.open_store()
         try:
-            return json.loads(OCR_CACHE_FILE.read_text())
-        except (json.JSONDecodeError, IOError):
-            pass
-    return {}
+            return ocr_store.get_texts_by_prefix(conn, ocr_store.CLIPHIST_ALIAS)
+        finally:
+            conn.close()
+    except (OSError, sqlite3.Error):
+        return {}
 
 
-def save_ocr_cache(cache: dict[str, str]) -> None:
-    """Save OCR cache to disk"""
-    CACHE_DIR.mkdir(parents=True, exist_ok=True)
-    OCR_CACHE_FILE.write_text(json.dumps(cache))
+def forget_ocr_entries(entry_ids: list[str] | None = None) -> None:
+    """Unlink clipboard entries from the OCR store (all entries if None)."""
+    try:
+        conn = ocr_store.open_store()
+        try:
+            if entry_ids is None:
+                ocr_store.remove_alias_prefix(conn, ocr_store.CLIPHIST_ALIAS)
+            else:
+                ocr_store.remove_aliases(
+                    conn, [ocr_store.CLIPHIST_ALIAS + i for i in entry_ids]
+                )
+        finally:
+            conn.close()
+    except (OSError, sqlite3.Error):
+        pass
+
+
+_search_db: sqlite3.Connection | None = None
+_search_db_failed = False
+
+
+def get_search_index() -> sqlite3.Connection | None:
+    """Open (or create) the FTS5 search index. Returns None if FTS5 is unavailable."""
+    global _search_db, _search_db_failed
+    if _search_db is not None or _search_db_failed:
+        return _search_db
+    try:
+        SEARCH_INDEX_DB.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(SEARCH_INDEX_DB)
+        # Version 1 keyed rows by a hash of the truncated preview line, so
+        # long entries sharing a prefix collided; rebuild keyed by cliphist id
+        if conn.execute("PRAGMA user_version").fetchone()[0] < SEARCH_INDEX_VERSION:
+            conn.executescript(
+                f"""
+                DROP TABLE IF EXISTS entries;
+                DROP TABLE IF EXISTS clips;
+                PRAGMA user_version = {SEARCH_INDEX_VERSION};
+                """
+            )
+        conn.executescript(
+            """
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            CREATE TABLE IF NOT EXISTS entries (
+                id INTEGER PRIMARY KEY,
+                cliphist_id TEXT UNIQUE NOT NULL,
+                is_image INTEGER NOT NULL,
+                has_ocr INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS clips USING fts5(
+                content, ocr,
+                tokenize = 'unicode61 remove_diacritics 2',
+                prefix = '2 3'
+            );
+            """
+        )
+        _search_db = conn
+    except sqlite3.Error:
+        _search_db_failed = True
+    return _search_db
+
+
+def get_index_text(entry: str) -> str:
+    """Get the text to index for a text entry.
+
+    The `cliphist list` preview is only decoded when it was truncated, so short
+    entries don't cost a process spawn.
+    """
+    preview = clean_entry(entry)
+    if not preview.endswith(PREVIEW_ELLIPSIS):
+        return preview
+    return get_full_entry_content(entry)
+
+
+def sync_search_index(entries: list[str], ocr_texts: dict[str, str]) -> bool:
+    """Bring the search index in line with the current clipboard history.
+
+    Adds new entries, fills in OCR text that arrived since an image was indexed,
+    and prunes entries no longer in cliphist. Decoding is capped at
+    SEARCH_INDEX_BATCH entries per call; returns True if work remains.
+    """
+    conn = get_search_index()
+    if conn is None:
+        return False
+
+    # Keyed by cliphist id: the preview line is truncated, so entries that
+    # share a long prefix can't be told apart by it
+    current = {get_entry_id(entry): entry for entry in entries}
+    current.pop("", None)
+
+    try:
+        indexed = {
+            row[0]: (row[1], row[2])
+            for row in conn.execute("SELECT cliphist_id, id, has_ocr FROM entries")
+        }
+
+        removed = [indexed[h][0] for h in indexed.keys() - current.keys()]
+        if removed:
+            conn.executemany(
+                "DELETE FROM entries WHERE id = ?", [(i,) for i in removed]
+            )
+            conn.executemany(
+                "DELETE FROM clips WHERE rowid = ?", [(i,) for i in removed]
+            )
+
+        decoded = 0
+        pending = False
+        for cliphist_id, entry in current.items():
+            is_img = is_image(entry)
+            ocr_text = ocr_texts.get(entry, "") if is_img else ""
+            existing = indexed.get(cliphist_id)
+
+            if existing is not None:
+                row_id, has_ocr = existing
+                if ocr_text and not has_ocr:
+                    conn.execute(
+                        "UPDATE clips SET ocr = ? WHERE rowid = ?", (ocr_text, row_id)
+                    )
+                    conn.execute(
+                        "UPDATE entries SET has_ocr = 1 WHERE id = ?", (row_id,)
+                    )
+                continue
+
+            if is_img:
+                content = ""
+            else:
+                if decoded >= SEARCH_INDEX_BATCH:
+                    pending = True
+                    continue
+                if clean_entry(entry).endswith(PREVIEW_ELLIPSIS):
+                    decoded += 1
+                content = get_index_text(entry)
+
+            cursor = conn.execute(
+                "INSERT INTO entries (cliphist_id, is_image, has_ocr) VALUES (?, ?, ?)",
+                (cliphist_id, int(is_img), int(bool(ocr_text))),
+            )
+            conn.execute(
+                "INSERT INTO clips (rowid, content, ocr) VALUES (?, ?, ?)",
+                (cursor.lastrowid, content, ocr_text),
+            )
+
+        conn.commit()
+        return pending
+    except sqlite3.Error:
+        conn.rollback()
+        return False
+
+
+def remove_from_search_index(entry: str) -> None:
+    """Drop a single entry from the search index."""
+    conn = get_search_index()
+    if conn is None:
+        return
+    try:
+        row = conn.execute(
+            "SELECT id FROM entries WHERE cliphist_id = ?", (get_entry_id(entry),)
+        ).fetchone()
+        if row:
+            conn.execute("DELETE FROM entries WHERE id = ?", row)
+            conn.execute("DELETE FROM clips WHERE rowid = ?", row)
+            conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+
+
+def clear_search_index() -> None:
+    """Remove everything from the search index (clipboard wipe)."""
+    conn = get_search_index()
+    if conn is None:
+        return
+    try:
+        conn.execute("DELETE FROM entries")
+        conn.execute("DELETE FROM clips")
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+
+
+def build_fts_query(query: str) -> str:
+    """Turn user input into an FTS5 query: every word must match as a prefix."""
+    words = re.findall(r"\w+", query)
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def search_clipboard(
+    query: str, filter_type: str = "", limit: int = SEARCH_RESULT_LIMIT
+) -> dict[str, str] | None:
+    """Search the full-text index.
+
+    Returns {cliphist id: highlighted snippet} in rank order, or None if the
+    index is unavailable so callers can fall back to fuzzy matching. The
+    "images"/"text" filter is applied in the query so hits of the other type
+    don't use up the limit.
+    """
+    conn = get_search_index()
+    if conn is None:
+        return None
+    fts_query = build_fts_query(query)
+    if not fts_query:
+        return None
+    type_clause = ""
+    if filter_type == "images":
+        type_clause = "AND entries.is_image = 1"
+    elif filter_type == "text":
+        type_clause = "AND entries.is_image = 0"
+    try:
+        rows = conn.execute(
+            f"""
+            SELECT entries.cliphist_id,
+                   snippet(clips, -1, '\u00ab', '\u00bb', '\u2026', 10)
+            FROM clips JOIN entries ON entries.id = clips.rowid
+            WHERE clips MATCH ? {type_clause}
+            ORDER BY bm25(clips)
+            LIMIT ?
+            """,
+            (fts_query, limit),
+        ).fetchall()
+    except sqlite3.Error:
+        return None
+    return {cliphist_id: snippet.replace("\n", " ") for cliphist_id, snippet in rows}
+
+
+def get_indexed_ids() -> set[str]:
+    """Get the cliphist ids already in the search index."""
+    conn = get_search_index()
+    if conn is None:
+        return set()
+    try:
+        return {row[0] for row in conn.execute("SELECT cliphist_id FROM entries")}
+    except sqlite3.Error:
+        return set()
 
 
 def spawn_ocr_indexer():
@@ -182,12 +540,34 @@ def get_ocr_text_for_entries(
     result = {}
     for entry in entries:
         if is_image(entry):
-            entry_hash = get_entry_hash(entry)
-            if entry_hash in ocr_cache:
-                result[entry] = ocr_cache[entry_hash]
+            entry_id = get_entry_id(entry)
+            if entry_id in ocr_cache:
+                result[entry] = ocr_cache[entry_id]
     return result
 
 
+_thumb_names: set[str] = set()
+_thumb_dir_mtime = -1.0
+
+
+def get_thumbnail_names() -> set[str]:
+    """Get the set of cached thumbnail filenames.
+
+    The directory is only rescanned when its mtime changes (a thumbnail was
+    added or removed), so lookups don't cost a stat per entry.
+    """
+    global _thumb_names, _thumb_dir_mtime
+    try:
+        mtime = CACHE_DIR.stat().st_mtime
+    except OSError:
+        return set()
+    if mtime != _thumb_dir_mtime:
+        with os.scandir(CACHE_DIR) as it:
+            _thumb_names = {e.name for e in it if e.name.endswith(".png")}
+        _thumb_dir_mtime = mtime
+    return _thumb_names
+
+
 def get_image_thumbnail(entry: str) -> str | None:
     """Get cached thumbnail for image entry, return path or None.
 
@@ -196,12 +576,11 @@ def get_image_thumbnail(entry: str) -> str | None:
     if not is_image(entry):
         return None
 
-    entry_hash = hashlib.md5(entry.encode()).hexdigest()[:16]
-    thumb_path = CACHE_DIR / f"{entry_hash}.png"
+    thumb_name = f"{hashlib.md5(entry.encode()).hexdigest()[:16]}.png"
 
     # Only return if cached - don't block on generation
-    if thumb_path.exists():
-        return str(thumb_path)
+    if thumb_name in get_thumbnail_names():
+        return str(CACHE_DIR / thumb_name)
 
     return None
 
@@ -232,6 +611,8 @@ def delete_entry(entry: str):
     if thumb_path.exists():
         thumb_path.unlink()
 
+    remove_from_search_index(entry)
+
 
 def wipe_clipboard():
     """Wipe entire clipboard history"""
@@ -244,6 +625,8 @@ def wipe_clipboard():
     if CACHE_DIR.exists():
         for f in CACHE_DIR.iterdir():
             f.unlink()
+    forget_ocr_entries()
+    clear_search_index()
 
 
 def shell_escape(s: str) -> str:
@@ -401,15 +784,25 @@ def get_entry_results(
     ocr_texts = ocr_texts or {}
     pinned_hashes = set(load_pinned_entries())
 
-    # Sort entries: pinned first, then by original order
-    def sort_key(entry: str) -> tuple[int, int]:
-        entry_hash = get_entry_hash(entry)
-        is_pin = entry_hash in pinned_hashes
+    # Ranked full-text matches over decoded content and OCR text. Entries the
+    # daemon hasn't indexed yet (it fills the index in batches) are fuzzy
+    # matched instead, as is everything when the index has no hits. If the
+    # hits were capped, indexed entries past the cap are fuzzy matched too
+    # rather than dropped.
+    matches = search_clipboard(query, filter_type) if query else None
+    rank = {cliphist_id: i for i, cliphist_id in enumerate(matches or {})}
+    truncated = matches is not None and len(matches) >= SEARCH_RESULT_LIMIT
+    indexed_ids = get_indexed_ids() if matches and not truncated else set()
+
+    # Sort entries: pinned first, then by search rank (fuzzy matches after
+    # ranked ones), then by original order
+    def sort_key(item: tuple[int, str]) -> tuple[int, int, int]:
+        position, entry = item
+        is_pin = get_entry_hash(entry) in pinned_hashes
         # Pinned items first (0), then regular items (1)
-        # Within each group, maintain original order
-        return (0 if is_pin else 1, entries.index(entry))
+        return (0 if is_pin else 1, rank.get(get_entry_id(entry), len(rank)), position)
 
-    sorted_entries = sorted(entries, key=sort_key)
+    sorted_entries = [e for _, e in sorted(enumerate(entries), key=sort_key)]
     entry_index = 0
 
     for entry in sorted_entries:
@@ -423,8 +816,15 @@ def get_entry_results(
         if filter_type == "text" and is_img:
             continue
 
-        # Apply search query (check both content and OCR text for images)
-        if query:
+        # Apply search query: full-text hits first; entries not in the index
+        # yet fuzzy match the preview line and OCR text
+        snippet = ""
+        cliphist_id = get_entry_id(entry)
+        if query and cliphist_id in rank:
+            snippet = matches[cliphist_id]
+        elif query and cliphist_id in indexed_ids:
+            continue
+        elif query:
             content_match = fuzzy_match(query, clean_entry(entry))
             ocr_text = ocr_texts.get(entry, "")
             ocr_match = is_img and ocr_text and fuzzy_match(query, ocr_text)
@@ -458,6 +858,10 @@ def get_entry_results(
             icon = "content_paste"
             thumbnail = None
 
+        # Show where a full-text match landed when it isn't in the preview line
+        if snippet:
+            entry_type = f"{age_label} · {snippet}"
+
         entry_is_pinned = get_entry_hash(entry) in pinned_hashes
         pin_action = (
             {"id": "unpin", "name": "Unpin", "icon": "push_pin"}
@@ -554,30 +958,18 @@ def get_image_grid_items(
     entries: list[str],
     ocr_texts: dict[str, str],
     offset: int = 0,
-    limit: int = 200,
-) -> list[dict]:
+    limit: int = GRID_PAGE_SIZE,
+) -> tuple[list[dict], int]:
     """Convert image entries to grid items for gridBrowser display.
 
     Shows image dimensions as name, thumbnail as image, and OCR text as keywords.
-    Limits to 'limit' items starting from 'offset' for performance.
+    Only images with a cached thumbnail are shown. Returns one page of items
+    starting at 'offset', plus the total number of displayable images.
     """
-    items = []
-    count = 0
-    for entry in entries:
-        if not is_image(entry):
-            continue
-
-        if count < offset:
-            count += 1
-            continue
-
-        if len(items) >= limit:
-            break
-
-        thumbnail = get_image_thumbnail(entry)
-        if not thumbnail:
-            continue  # Skip images without thumbnails
+    thumbed = [(e, t) for e in entries if (t := get_image_thumbnail(e))]
 
+    items = []
+    for entry, thumbnail in thumbed[offset : offset + limit]:
         dims = get_image_dimensions(entry)
         ocr_text = ocr_texts.get(entry, "")
         items.append(
@@ -589,9 +981,54 @@ def get_image_grid_items(
                 "keywords": ocr_text.lower().split()[:10] if ocr_text else [],
             }
         )
-        count += 1
 
-    return items
+    return items, len(thumbed)
+
+
+def respond_image_grid(
+    entries: list[str], ocr_texts: dict[str, str], offset: int = 0, limit: int = 0
+) -> bool:
+    """Send a page of the clipboard image grid. Returns False if there are no images.
+
+    The first page opens the grid; later pages (offset > 0) are appended by the
+    launcher as the user scrolls.
+    """
+    image_entries = [e for e in entries if is_image(e)]
+    grid_items, total_images = get_image_grid_items(
+        image_entries, ocr_texts, offset, limit or GRID_PAGE_SIZE
+    )
+    if not grid_items and offset == 0:
+        return False
+
+    print(
+        json.dumps(
+            {
+                "type": "gridBrowser",
+                "gridBrowser": {
+                    "title": f"Clipboard Images ({total_images})",
+                    "items": grid_items,
+                    "offset": offset,
+                    "total": total_images,
+                    "columns": 8,
+                    "cellAspectRatio": 1.0,
+                    "actions": [
+                        {
+                            "id": "copy",
+                            "name": "Copy",
+                            "icon": "content_copy",
+                        },
+                        {
+                            "id": "delete",
+                            "name": "Delete",
+                            "icon": "delete",
+                        },
+                    ],
+                },
+            }
+        ),
+        flush=True,
+    )
+    return True
 
 
 def get_plugin_actions(active_filter: str = "") -> list[dict]:
@@ -621,10 +1058,11 @@ def get_plugin_actions(active_filter: str = "") -> list[dict]:
     ]
 
 
-def get_status() -> dict:
+def get_status(entries: list[str] | None = None) -> dict:
     """Get current clipboard status for badge display."""
     try:
-        entries = get_clipboard_entries()
+        if entries is None:
+            entries = get_clipboard_entries()
         count = len(entries)
         image_count = sum(1 for e in entries if is_image(e))
 
@@ -641,19 +1079,18 @@ def get_status() -> dict:
         return {}
 
 
-def emit_status() -> None:
+def emit_status(entries: list[str] | None = None) -> None:
     """Emit status update for background daemon."""
-    print(json.dumps({"type": "status", "status": get_status()}), flush=True)
+    print(json.dumps({"type": "status", "status": get_status(entries)}), flush=True)
 
 
-def emit_incremental_index(last_indexed_ids: set[str]) -> set[str]:
+def emit_incremental_index(
+    last_indexed_ids: set[str], entries: list[str], ocr_texts: dict[str, str]
+) -> set[str]:
     """Emit incremental index update with new/removed items.
 
     Returns the updated set of indexed IDs.
     """
-    entries = get_clipboard_entries()
-    ocr_cache = load_ocr_cache()
-    ocr_texts = get_ocr_text_for_entries(entries, ocr_cache)
 
     # Get current entries (limit to recent 100 for index)
     current_entries = entries[:100]
@@ -844,6 +1281,16 @@ def handle_request(input_data: dict) -> None:
         )
         return
 
+    # Next page of the image grid, requested as the user scrolls
+    if step == "gridBrowserPage":
+        respond_image_grid(
+            entries,
+            ocr_texts,
+            input_data.get("offset", 0),
+            input_data.get("limit", GRID_PAGE_SIZE),
+        )
+        return
+
     # Action: handle clicks
     if step == "action":
         item_id = selected.get("id", "")
@@ -859,52 +1306,19 @@ def handle_request(input_data: dict) -> None:
                         active_filter="",
                         navigate_forward=False,
                     )
-                else:
-                    # Show images in gridBrowser (first 200 with thumbnails)
-                    image_entries = [e for e in entries if is_image(e)]
-                    grid_items = get_image_grid_items(image_entries, ocr_texts, 0, 200)
-                    total_images = sum(
-                        1 for e in image_entries if get_image_thumbnail(e)
+                # Show images in gridBrowser (first page, more loaded on scroll)
+                elif not respond_image_grid(entries, ocr_texts):
+                    respond(
+                        [
+                            {
+                                "id": "__empty__",
+                                "name": "No images in clipboard",
+                                "icon": "info",
+                                "description": "Copy an image to see it here",
+                            }
+                        ],
+                        active_filter="images",
                     )
-                    if grid_items:
-                        print(
-                            json.dumps(
-                                {
-                                    "type": "gridBrowser",
-                                    "gridBrowser": {
-                                        "title": f"Clipboard Images ({total_images})",
-                                        "items": grid_items,
-                                        "columns": 8,
-                                        "cellAspectRatio": 1.0,
-                                        "actions": [
-                                            {
-                                                "id": "copy",
-                                                "name": "Copy",
-                                                "icon": "content_copy",
-                                            },
-                                            {
-                                                "id": "delete",
-                                                "name": "Delete",
-                                                "icon": "delete",
-                                            },
-                                        ],
-                                    },
-                                }
-                            ),
-                            flush=True,
-                        )
-                    else:
-                        respond(
-                            [
-                                {
-                                    "id": "__empty__",
-                                    "name": "No images in clipboard",
-                                    "icon": "info",
-                                    "description": "Copy an image to see it here",
-                                }
-                            ],
-                            active_filter="images",
-                        )
                 return
 
             # Filter by text - toggle (view modification, not navigation)
@@ -972,11 +1386,8 @@ def handle_request(input_data: dict) -> None:
             delete_entry(entry)
             # Refresh entries after delete
             entries = [e for e in entries if e != entry]
-            # Also remove from OCR cache
-            entry_hash = get_entry_hash(entry)
-            if entry_hash in ocr_cache:
-                del ocr_cache[entry_hash]
-                save_ocr_cache(ocr_cache)
+            # Also unlink from the OCR store
+            forget_ocr_entries([get_entry_id(entry)])
             ocr_texts = {k: v for k, v in ocr_texts.items() if k != entry}
             respond(
                 get_incremental_results(entries, 0, 20, query, context, ocr_texts),
@@ -1043,69 +1454,119 @@ def main():
         flush=True,
     )
 
+    # Full-text index is built in batches between requests
+    search_index_pending = sync_search_index(entries, ocr_texts)
+
+    # Clipboard change detection: inotify on the cliphist db (default),
+    # `wl-paste --watch`, or mtime polling as a fallback
+    watch_mode = get_watch_mode()
+    watch_proc = None
+    watch_fd = None
+    if watch_mode == "inotify":
+        watch_fd = create_inotify_fd()
+    elif watch_mode == "wl-paste":
+        watch_proc = start_wl_paste_watch()
+        if watch_proc and watch_proc.stdout:
+            watch_fd = watch_proc.stdout.fileno()
+    if watch_fd is None:
+        watch_mode = "poll"
+
     # Track state for refreshing results when clipboard changes
     last_db_mtime = get_db_mtime()
     last_check = time.time()
-    check_interval = 1.0  # Check for clipboard changes every 1 second
+    check_interval = 1.0  # Poll for clipboard changes every 1 second
 
     # Track if plugin is active and current view state
     plugin_active = False
     current_query = ""
     current_context = ""  # Active filter: "", "images", "text"
 
-    while True:
-        readable, _, _ = select.select([sys.stdin], [], [], 0.5)
-
-        if readable:
-            try:
-                line = sys.stdin.readline()
-                if not line:
-                    break
-                request = json.loads(line.strip())
-                step = request.get("step", "")
-
-                # Track plugin state
-                if step == "initial":
-                    plugin_active = True
-                    current_query = ""
-                    current_context = ""
-                elif step == "search":
-                    current_query = request.get("query", "").strip()
-                    current_context = request.get("context", "")
-                elif step == "action":
-                    # Update context from action responses
-                    current_context = request.get("context", current_context)
-
-                handle_request(request)
-                # Update mtime after handling request (in case we modified clipboard)
-                last_db_mtime = get_db_mtime()
-            except (json.JSONDecodeError, ValueError):
-                continue
+    try:
+        while True:
+            # Sleep until a request or clipboard change arrives, unless there is
+            # indexing to finish or no watcher to wake us up
+            if search_index_pending:
+                timeout = 0
+            elif watch_mode == "poll":
+                timeout = 0.5
+            else:
+                timeout = None
+            watched = [sys.stdin] if watch_fd is None else [sys.stdin, watch_fd]
+            readable, _, _ = select.select(watched, [], [], timeout)
+
+            if sys.stdin in readable:
+                try:
+                    line = sys.stdin.readline()
+                    if not line:
+                        break
+                    request = json.loads(line.strip())
+                    step = request.get("step", "")
+
+                    # Track plugin state
+                    if step == "initial":
+                        plugin_active = True
+                        current_query = ""
+                        current_context = ""
+                    elif step == "search":
+                        current_query = request.get("query", "").strip()
+                        current_context = request.get("context", "")
+                    elif step == "action":
+                        # Update context from action responses
+                        current_context = request.get("context", current_context)
+
+                    handle_request(request)
+                    # Update mtime after handling request (we may have changed it)
+                    last_db_mtime = get_db_mtime()
+                except (json.JSONDecodeError, ValueError):
+                    continue
+
+            # Keep building the full-text index while idle
+            if search_index_pending and not readable:
+                search_index_pending = sync_search_index(entries, ocr_texts)
+
+            clipboard_changed = False
+            if watch_fd is not None and watch_fd in readable:
+                changed = read_clipboard_changes(watch_fd, watch_mode)
+                if changed is None:
+                    # Watcher exited (e.g. no Wayland session): fall back to polling
+                    watch_fd = None
+                    watch_mode = "poll"
+                else:
+                    clipboard_changed = changed
+            elif watch_mode == "poll":
+                now = time.time()
+                if now - last_check >= check_interval:
+                    last_check = now
+                    current_mtime = get_db_mtime()
+                    if current_mtime != last_db_mtime:
+                        last_db_mtime = current_mtime
+                        clipboard_changed = True
+
+            if clipboard_changed:
+                entries = get_clipboard_entries()
+                ocr_cache = load_ocr_cache()
+                ocr_texts = get_ocr_text_for_entries(entries, ocr_cache)
 
-        # Periodically check for external clipboard changes
-        now = time.time()
-        if now - last_check >= check_interval:
-            last_check = now
-            current_mtime = get_db_mtime()
-            if current_mtime != last_db_mtime:
-                last_db_mtime = current_mtime
                 # 1. Update status badge (item count)
-                emit_status()
+                emit_status(entries)
 
                 # 2. Update index (new items become searchable from main launcher)
-                indexed_ids = emit_incremental_index(indexed_ids)
+                indexed_ids = emit_incremental_index(indexed_ids, entries, ocr_texts)
+
+                # 3. Update full-text index with new and removed entries
+                search_index_pending = sync_search_index(entries, ocr_texts)
 
-                # 3. If plugin is open, refresh the results list
+                # 4. If plugin is open, refresh the results list
                 if plugin_active:
-                    entries = get_clipboard_entries()
-                    ocr_cache = load_ocr_cache()
-                    ocr_texts = get_ocr_text_for_entries(entries, ocr_cache)
                     respond(
                         get_entry_results(
                             entries, current_query, current_context, ocr_texts
                         ),
                         active_filter=current_context,
                     )
+    finally:
+        if watch_proc:
+            watch_proc.terminate()
 
 
 if __name__ == "__main__":
@@ -5,20 +5,24 @@ Runs as a subprocess, indexes images, updates cache, then exits.
 """
 
 import hashlib
-import json
 import os
 import re
+import sqlite3
 import subprocess
 import sys
 from pathlib import Path
 
+# Shared OCR store, bundled with hamr in scripts/ocr
+HAMR_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(HAMR_DIR / "scripts" / "ocr"))
+import ocr_store  # noqa: E402
+
 # Cache directory
 CACHE_DIR = (
     Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache"))
     / "hamr"
     / "clipboard-thumbs"
 )
-OCR_CACHE_FILE = CACHE_DIR / "ocr-index.json"
 LOCK_FILE = CACHE_DIR / "ocr-indexer.lock"
 
 # Optimization settings
@@ -56,22 +60,6 @@ def release_lock():
     LOCK_FILE.unlink(missing_ok=True)
 
 
-def load_ocr_cache() -> dict[str, str]:
-    """Load OCR cache from disk"""
-    if OCR_CACHE_FILE.exists():
-        try:
-            return json.loads(OCR_CACHE_FILE.read_text())
-        except (json.JSONDecodeError, IOError):
-            pass
-    return {}
-
-
-def save_ocr_cache(cache: dict[str, str]) -> None:
-    """Save OCR cache to disk"""
-    CACHE_DIR.mkdir(parents=True, exist_ok=True)
-    OCR_CACHE_FILE.write_text(json.dumps(cache))
-
-
 def get_clipboard_entries() -> list[str]:
     """Get clipboard entries from cliphist"""
     try:
@@ -111,27 +99,18 @@ def is_image_worth_ocr(entry: str) -> bool:
 
 
 def get_entry_hash(entry: str) -> str:
-    """Get a stable hash for a clipboard entry"""
+    """Get a stable hash for a clipboard entry (full entry, used for thumbnails)"""
     return hashlib.md5(entry.encode()).hexdigest()[:16]
 
 
-def get_tesseract_languages() -> str:
-    """Get available tesseract languages as a + separated string."""
-    try:
-        result = subprocess.run(
-            ["tesseract", "--list-langs"],
-            capture_output=True,
-            text=True,
-            timeout=5,
-        )
-        langs = [
-            lang.strip()
-            for lang in result.stdout.strip().split("\n")[1:]
-            if lang.strip()
-        ]
-        return "+".join(langs) if langs else "eng"
-    except (subprocess.TimeoutExpired, FileNotFoundError, subprocess.SubprocessError):
-        return "eng"
+def get_entry_id(entry: str) -> str:
+    """Extract the cliphist ID from entry (used for OCR store aliases).
+
+    The preview line only carries size and dimensions for images, so two
+    different screenshots can share it; the id tells them apart.
+    """
+    match = re.match(r"^\s*(\S+)\s+", entry)
+    return match.group(1) if match else ""
 
 
 def decode_image(entry: str) -> bytes | None:
@@ -186,21 +165,6 @@ def generate_thumbnail(entry: str, image_data: bytes) -> bool:
     return False
 
 
-def run_ocr_on_image(image_data: bytes, lang_str: str) -> str:
-    """Run OCR on image data"""
-    try:
-        # Use --psm 3 (fully automatic page segmentation) for speed
-        ocr_proc = subprocess.run(
-            ["tesseract", "stdin", "stdout", "-l", lang_str, "--psm", "3"],
-            input=image_data,
-            capture_output=True,
-            timeout=15,
-        )
-        return ocr_proc.stdout.decode("utf-8", errors="replace").strip()
-    except (subprocess.TimeoutExpired, FileNotFoundError, subprocess.SubprocessError):
-        return ""
-
-
 def notify(message: str, title: str = "Clipboard"):
     """Send desktop notification"""
     try:
@@ -220,9 +184,7 @@ def main():
 
     try:
         CACHE_DIR.mkdir(parents=True, exist_ok=True)
-
-        # Load existing OCR cache
-        ocr_cache = load_ocr_cache()
+        conn = ocr_store.open_store()
 
         # Get all clipboard entries
         entries = get_clipboard_entries()
@@ -237,11 +199,13 @@ def main():
                 if len(top_ocr_candidates) >= MAX_IMAGES_TO_OCR:
                     break
 
-        # Check which of the top N need OCR (not already cached)
+        # Check which of the top N need OCR (entry has no stored text yet; an
+        # alias left by a failed or interrupted run doesn't count)
         ocr_needed = []
         for entry in top_ocr_candidates:
-            entry_hash = get_entry_hash(entry)
-            if entry_hash not in ocr_cache:
+            alias = ocr_store.CLIPHIST_ALIAS + get_entry_id(entry)
+            content_hash = ocr_store.get_alias_hash(conn, alias)
+            if content_hash is None or ocr_store.get_text(conn, content_hash) is None:
                 ocr_needed.append(entry)
 
         # Check which images need thumbnails (all images)
@@ -255,36 +219,45 @@ def main():
         if not ocr_needed and not thumbs_needed:
             sys.exit(0)
 
-        # Only notify if there's OCR work to do (thumbnails are fast)
-        if ocr_needed:
-            notify(f"Indexing {len(ocr_needed)} images...")
-
-        # Get tesseract languages once (for OCR)
-        lang_str = get_tesseract_languages()
-
         # Process thumbnails first (fast)
         for entry in thumbs_needed:
             image_data = decode_image(entry)
             if image_data:
                 generate_thumbnail(entry, image_data)
 
-        # Process OCR (slow, only for top N recent images)
-        ocr_count = 0
+        # Link entries to the store; images already OCR'd elsewhere (e.g. a
+        # screenshot that was copied) reuse the stored text
+        unseen = []
         for entry in ocr_needed:
-            entry_hash = get_entry_hash(entry)
             image_data = decode_image(entry)
             if not image_data:
                 continue
+            content_hash = ocr_store.hash_bytes(image_data)
+            ocr_store.set_alias(
+                conn, ocr_store.CLIPHIST_ALIAS + get_entry_id(entry), content_hash
+            )
+            if ocr_store.get_text(conn, content_hash) is None and all(
+                h != content_hash for h, _ in unseen
+            ):
+                unseen.append((content_hash, image_data))
 
-            text = run_ocr_on_image(image_data, lang_str)
-            ocr_cache[entry_hash] = text
-            save_ocr_cache(ocr_cache)
-            ocr_count += 1
+        # Only notify if there's OCR work to do (thumbnails are fast)
+        if unseen:
+            notify(f"Indexing {len(unseen)} images...")
+
+        # Process OCR (slow, only for top N recent images)
+        for content_hash, image_data in unseen:
+            text = ocr_store.run_tesseract("stdin", image_data)
+            # Failed runs aren't stored so the next pass retries them
+            if text is not None:
+                ocr_store.put_text(conn, content_hash, text)
 
         # Notify done (only if OCR was performed)
-        if ocr_count > 0:
-            notify(f"Indexed {ocr_count} images")
+        if unseen:
+            notify(f"Indexed {len(unseen)} images")
 
+    except sqlite3.Error:
+        pass
     finally:
         release_lock()
 
@@ -1,88 +1,603 @@
 #!/usr/bin/env python3
 """
-Files workflow handler - search and browse files using fd + fzf
+Files workflow handler - search and browse files from a resident index
+
+Runs as a daemon holding an in-memory index of HOME (persisted to
+~/.cache/hamr/files-index.json and kept current with inotify), so searches
+never walk the filesystem.
 
 Features:
-- Fuzzy file search using fd + fzf
+- Fuzzy file search against the in-memory index
 - Recent files from search history
 - Actions: Open, Open folder, Copy path, Delete
 - Directory navigation
 """
 
+import ctypes
+import errno
+import fnmatch
 import json
 import os
+import re
+import select
+import signal
+import stat
+import struct
 import subprocess
 import sys
+import time
+from bisect import bisect_right
+from collections import OrderedDict, deque
 from datetime import datetime
 from pathlib import Path
 
 HOME = str(Path.home())
 
+INDEX_FILE = (
+    Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache"))
+    / "hamr"
+    / "files-index.json"
+)
+INDEX_VERSION = 1
 
-def search_files(query: str, limit: int = 30) -> list[str]:
-    """Search files using fd + fzf"""
-    if not query:
-        return []
-
-    # fd command with exclusions
-    fd_cmd = [
-        "fd",
-        "--type",
-        "f",
-        "--type",
-        "d",
-        "--hidden",
-        "--follow",
-        "--max-depth",
-        "8",
-        "--exclude",
-        ".git",
-        "--exclude",
-        "node_modules",
-        "--exclude",
-        ".cache",
-        "--exclude",
-        ".local/share",
-        "--exclude",
-        ".mozilla",
-        "--exclude",
-        ".thunderbird",
-        "--exclude",
-        ".steam",
-        "--exclude",
-        ".wine",
-        "--exclude",
-        "__pycache__",
-        "--exclude",
-        ".npm",
-        "--exclude",
-        ".cargo",
-        "--exclude",
-        ".rustup",
-        ".",
-        HOME,
-    ]
+HAMR_CONFIG_PATH = (
+    Path(os.environ.get("XDG_CONFIG_HOME", Path.home() / ".config"))
+    / "hamr"
+    / "config.json"
+)
+
+# Files and dirs, hidden included, symlinks followed, 8 levels deep. Unlike
+# fd, ignore files (.gitignore, .ignore, .fdignore) are not read, so build
+# output, dependency and virtualenv directories are excluded by name instead;
+# without that they'd dominate the index and its inotify watches. Patterns
+# without "/" match entry names, patterns with "/" match paths relative to
+# HOME (e.g. ".local/share").
+MAX_DEPTH = 8
+DEFAULT_EXCLUDE = [
+    ".git",
+    "node_modules",
+    ".cache",
+    ".local/share",
+    ".mozilla",
+    ".thunderbird",
+    ".steam",
+    ".wine",
+    "__pycache__",
+    ".npm",
+    ".cargo",
+    ".rustup",
+    # Build output
+    "target",
+    "build",
+    "dist",
+    ".gradle",
+    ".next",
+    ".nuxt",
+    ".svelte-kit",
+    ".zig-cache",
+    "zig-out",
+    # Virtualenvs and tool caches
+    ".venv",
+    "venv",
+    ".tox",
+    ".nox",
+    ".direnv",
+    ".mypy_cache",
+    ".pytest_cache",
+    ".ruff_cache",
+    "*.egg-info",
+]
+
+# Directories scanned per main loop iteration while (re)building the index
+SCAN_BATCH = 200
+# Seconds a search may spend finishing a pending scan before answering
+SEARCH_SCAN_BUDGET = 1.0
+# Seconds to wait after the last change before writing the index to disk
+SAVE_DELAY = 30.0
+# Seconds between mtime checks of directories we couldn't watch
+UNWATCHED_RECHECK_SECONDS = 60.0
+# Substring and fuzzy matches scored per query (1-2 letter queries match
+# almost everything); prefix matches are always scored
+MAX_CANDIDATES = 5000
+
+# Rendered result rows kept across keystrokes, keyed by (dev, inode, mtime)
+RESULT_CACHE_SIZE = 2000
+# Text previews kept for recently focused files
+PREVIEW_CACHE_SIZE = 64
+# Bytes of a text file shown in its preview
+PREVIEW_BYTES = 5000
 
-    # Pipe to fzf for fuzzy filtering
-    fzf_cmd = ["fzf", "--filter", query]
+# inotify constants
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_ONLYDIR = 0x01000000
+WATCH_MASK = (
+    IN_CREATE
+    | IN_DELETE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_DELETE_SELF
+    | IN_MOVE_SELF
+    | IN_ONLYDIR
+)
+EVENT_HEADER = struct.Struct("iIII")
 
+
+_result_cache: OrderedDict[str, tuple[tuple[int, int, int], dict]] = OrderedDict()
+_preview_cache: OrderedDict[str, tuple[tuple[int, int, int], str]] = OrderedDict()
+
+
+def get_exclude_patterns() -> list[str]:
+    """Get exclusion patterns from config (plugins.files.exclude)."""
     try:
-        fd_proc = subprocess.Popen(
-            fd_cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
-        )
-        fzf_proc = subprocess.Popen(
-            fzf_cmd,
-            stdin=fd_proc.stdout,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.DEVNULL,
-        )
-        fd_proc.stdout.close()
-        output, _ = fzf_proc.communicate(timeout=5)
+        config = json.loads(HAMR_CONFIG_PATH.read_text())
+        exclude = config.get("plugins", {}).get("files", {}).get("exclude")
+        if isinstance(exclude, list):
+            return [str(p).strip("/") for p in exclude if str(p).strip("/")]
+    except (json.JSONDecodeError, OSError, AttributeError):
+        pass
+    return DEFAULT_EXCLUDE
+
+
+def fuzzy_pattern(term: str) -> re.Pattern:
+    """Compile a subsequence matcher for one line of a newline-separated blob.
+
+    Each gap is a possessive negated class, so a failed attempt never
+    backtracks and a scan over the whole blob stays linear.
+    """
+    parts = [re.escape(term[0])]
+    for ch in term[1:]:
+        parts.append(f"[^\\n{re.escape(ch)}]*+{re.escape(ch)}")
+    return re.compile("".join(parts))
+
+
+def score_match(term: str, name: str, depth: int) -> int:
+    """Rank a name match: exact > prefix > substring > subsequence."""
+    if name == term:
+        score = 1000
+    elif name.startswith(term):
+        score = 800
+    elif term in name:
+        score = 600
+    else:
+        # Subsequence: tighter spans rank higher
+        pos = name.find(term[0])
+        start = pos
+        for ch in term[1:]:
+            pos = name.find(ch, pos + 1)
+        score = 400 - (pos - start - len(term))
+    return score - depth * 4 - len(name)
+
+
+class FileIndex:
+    """Resident index of every file and directory under a root.
+
+    Each directory is stored once (its path is the shared prefix of all of its
+    entries) with its children as a single newline-joined string, so memory is
+    roughly the size of the names themselves. Search runs over a lowercased
+    blob of all names built lazily after changes.
+    """
+
+    def __init__(self, root: str, exclude: list[str]):
+        self.root = root
+        self.exclude = exclude
+        self.name_patterns = [p for p in exclude if "/" not in p]
+        self.path_patterns = [p for p in exclude if "/" in p]
+
+        # Directory table, indexed by dir id (free slots are None)
+        self.dirs: list[str | None] = []
+        self.names: list[str] = []
+        self.kinds: list[bytes] = []  # b"1" per child that is a directory
+        self.mtimes: list[float] = []
+        self.dir_ids: dict[str, int] = {}
+        self.inodes: dict[tuple[int, int], int] = {}
+        self.free: list[int] = []
+
+        self.pending: deque[int] = deque()
+        self.queued: set[int] = set()
+        self.changed_at = 0.0
+
+        # Search blob, rebuilt lazily
+        self.blob = ""
+        self.blob_dirs: list[int] = []
+        self.blob_offsets: list[int] = []
+        self.blob_stale = True
+
+        # inotify
+        self.libc = None
+        self.inotify_fd: int | None = None
+        self.wd_dirs: dict[int, str] = {}
+        self.dir_wds: dict[str, int] = {}
+        self.unwatched: set[str] = set()
+        self.last_recheck = time.time()
+
+    # ==================== Directory table ====================
+
+    def depth(self, path: str) -> int:
+        return path.count("/", len(self.root))
+
+    def is_excluded(self, path: str, name: str) -> bool:
+        for pattern in self.name_patterns:
+            if fnmatch.fnmatchcase(name, pattern):
+                return True
+        if self.path_patterns:
+            rel = path[len(self.root) :].lstrip("/")
+            for pattern in self.path_patterns:
+                if fnmatch.fnmatchcase(rel, pattern):
+                    return True
+        return False
+
+    def add_dir(self, path: str, key: tuple[int, int]) -> int | None:
+        """Register a directory and queue it for scanning."""
+        if path in self.dir_ids:
+            return self.dir_ids[path]
+        if key in self.inodes:
+            return None  # Symlink loop or already indexed elsewhere
+        if self.free:
+            dir_id = self.free.pop()
+            self.dirs[dir_id] = path
+            self.names[dir_id] = ""
+            self.kinds[dir_id] = b""
+            self.mtimes[dir_id] = 0.0
+        else:
+            dir_id = len(self.dirs)
+            self.dirs.append(path)
+            self.names.append("")
+            self.kinds.append(b"")
+            self.mtimes.append(0.0)
+        self.dir_ids[path] = dir_id
+        self.inodes[key] = dir_id
+        self.queue(dir_id)
+        return dir_id
+
+    def remove_tree(self, path: str) -> None:
+        """Drop a directory and everything indexed below it."""
+        prefix = path + "/"
+        doomed = [p for p in self.dir_ids if p == path or p.startswith(prefix)]
+        removed = {self.dir_ids[p] for p in doomed}
+        for p in doomed:
+            dir_id = self.dir_ids.pop(p)
+            self.dirs[dir_id] = None
+            self.names[dir_id] = ""
+            self.kinds[dir_id] = b""
+            self.free.append(dir_id)
+            self.queued.discard(dir_id)
+            self.unwatch(p)
+        self.inodes = {k: v for k, v in self.inodes.items() if v not in removed}
+        self.mark_changed()
+
+    def queue(self, dir_id: int) -> None:
+        if dir_id not in self.queued:
+            self.queued.add(dir_id)
+            self.pending.append(dir_id)
+
+    def mark_changed(self) -> None:
+        self.blob_stale = True
+        self.changed_at = time.time()
+
+    def scan_dir(self, dir_id: int) -> None:
+        """(Re)read one directory, registering new subdirs and dropping old ones."""
+        path = self.dirs[dir_id]
+        if path is None:
+            return
+        try:
+            st = os.stat(path)
+            entries = list(os.scandir(path))
+        except OSError:
+            if path != self.root:
+                self.remove_tree(path)
+            return
+
+        old_subdirs = {
+            name
+            for name, kind in zip(self.names[dir_id].split("\n"), self.kinds[dir_id])
+            if kind == ord("1")
+        }
+        descend = self.depth(path) + 1 < MAX_DEPTH
+        names = []
+        kinds = bytearray()
+        subdirs = set()
+        new_subdirs = []
+        for entry in entries:
+            name = entry.name
+            child = entry.path
+            if self.is_excluded(child, name):
+                continue
+            try:
+                is_dir = entry.is_dir()  # Follows symlinks, like fd --follow
+            except OSError:
+                is_dir = False
+            names.append(name)
+            kinds.append(ord("1") if is_dir else ord("0"))
+            if is_dir and descend:
+                subdirs.add(name)
+                if child not in self.dir_ids:
+                    new_subdirs.append(entry)
+
+        # Drop vanished subdirs first so a renamed dir can claim its inode
+        for name in old_subdirs - subdirs:
+            self.remove_tree(f"{path}/{name}")
+        for entry in new_subdirs:
+            try:
+                cst = entry.stat()
+                self.add_dir(entry.path, (cst.st_dev, cst.st_ino))
+            except OSError:
+                pass
+
+        self.names[dir_id] = "\n".join(names)
+        self.kinds[dir_id] = bytes(kinds)
+        self.mtimes[dir_id] = st.st_mtime
+        self.watch(path)
+        self.mark_changed()
+
+    def scan_pending(self, budget: int = SCAN_BATCH) -> bool:
+        """Scan up to budget queued directories. Returns True if more are queued."""
+        while self.pending and budget > 0:
+            dir_id = self.pending.popleft()
+            if dir_id in self.queued:
+                self.queued.discard(dir_id)
+                self.scan_dir(dir_id)
+                budget -= 1
+        return bool(self.pending)
+
+    def scan_for(self, seconds: float) -> None:
+        """Scan queued directories until done or out of time."""
+        deadline = time.time() + seconds
+        while self.scan_pending() and time.time() < deadline:
+            pass
+
+    def revalidate(self, paths) -> None:
+        """Queue directories whose mtime no longer matches the index."""
+        for path in list(paths):
+            dir_id = self.dir_ids.get(path)
+            if dir_id is None:
+                continue
+            try:
+                if os.stat(path).st_mtime != self.mtimes[dir_id]:
+                    self.queue(dir_id)
+            except OSError:
+                parent = self.dir_ids.get(os.path.dirname(path))
+                if parent is not None:
+                    self.queue(parent)
+
+    def recheck_unwatched(self) -> None:
+        """Poll directories that couldn't get an inotify watch."""
+        now = time.time()
+        if self.unwatched and now - self.last_recheck >= UNWATCHED_RECHECK_SECONDS:
+            self.last_recheck = now
+            self.revalidate(self.unwatched)
+
+    # ==================== Persistence ====================
+
+    def load(self) -> bool:
+        """Load the saved index and queue directories changed since it was saved."""
+        try:
+            data = json.loads(INDEX_FILE.read_text())
+        except (OSError, json.JSONDecodeError):
+            return False
+        if (
+            data.get("version") != INDEX_VERSION
+            or data.get("root") != self.root
+            or data.get("exclude") != self.exclude
+        ):
+            return False
+
+        for path, mtime, names, kinds in data.get("dirs", []):
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue  # Gone; its parent's mtime changed too
+            dir_id = self.add_dir(path, (st.st_dev, st.st_ino))
+            if dir_id is None:
+                continue
+            self.names[dir_id] = names
+            self.kinds[dir_id] = kinds.encode()
+            self.mtimes[dir_id] = mtime
+            if st.st_mtime == mtime:
+                self.queued.discard(dir_id)
+                self.watch(path)
+        if self.root not in self.dir_ids:
+            return False
+        self.pending = deque(d for d in self.pending if d in self.queued)
+        self.changed_at = 0.0
+        return True
+
+    def save(self) -> None:
+        """Write the index to disk atomically."""
+        data = {
+            "version": INDEX_VERSION,
+            "root": self.root,
+            "exclude": self.exclude,
+            "dirs": [
+                [path, self.mtimes[i], self.names[i], self.kinds[i].decode()]
+                for i, path in enumerate(self.dirs)
+                if path is not None
+            ],
+        }
+        try:
+            INDEX_FILE.parent.mkdir(parents=True, exist_ok=True)
+            tmp = INDEX_FILE.with_suffix(".tmp")
+            tmp.write_text(json.dumps(data, separators=(",", ":")))
+            os.replace(tmp, INDEX_FILE)
+        except OSError:
+            pass
+        self.changed_at = 0.0
+
+    # ==================== inotify ====================
+
+    def start_watching(self) -> int | None:
+        """Create the inotify fd. Returns fd or None if unavailable."""
+        try:
+            self.libc = ctypes.CDLL("libc.so.6", use_errno=True)
+            fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        except (OSError, AttributeError):
+            return None
+        if fd < 0:
+            return None
+        self.inotify_fd = fd
+        for path in self.dir_ids:
+            self.watch(path)
+        return fd
+
+    def watch(self, path: str) -> None:
+        if self.inotify_fd is None or path in self.dir_wds:
+            return
+        wd = self.libc.inotify_add_watch(self.inotify_fd, path.encode(), WATCH_MASK)
+        if wd < 0:
+            # Usually ENOSPC (max_user_watches); fall back to mtime polling
+            if ctypes.get_errno() == errno.ENOSPC:
+                self.unwatched.add(path)
+            return
+        self.wd_dirs[wd] = path
+        self.dir_wds[path] = wd
+        self.unwatched.discard(path)
+
+    def unwatch(self, path: str) -> None:
+        self.unwatched.discard(path)
+        wd = self.dir_wds.pop(path, None)
+        if wd is not None:
+            self.wd_dirs.pop(wd, None)
+            if self.inotify_fd is not None:
+                self.libc.inotify_rm_watch(self.inotify_fd, wd)
+
+    def read_events(self) -> None:
+        """Queue rescans for directories with pending inotify events."""
+        try:
+            buf = os.read(self.inotify_fd, 65536)
+        except BlockingIOError:
+            return
+        except OSError:
+            return
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(buf):
+            wd, mask, _cookie, length = EVENT_HEADER.unpack_from(buf, offset)
+            offset += EVENT_HEADER.size + length
+            if mask & IN_Q_OVERFLOW:
+                self.revalidate(list(self.dir_ids))
+                continue
+            path = self.wd_dirs.get(wd)
+            if path is None:
+                continue
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                # The parent's event drops the subtree; stop watching here
+                self.unwatch(path)
+                parent = self.dir_ids.get(os.path.dirname(path))
+                if parent is not None:
+                    self.queue(parent)
+                continue
+            dir_id = self.dir_ids.get(path)
+            if dir_id is not None:
+                self.queue(dir_id)
+
+    # ==================== Search ====================
+
+    def build_blob(self) -> None:
+        """Concatenate lowercased child names of every directory."""
+        chunks = []
+        blob_dirs = []
+        offsets = []
+        pos = 0
+        for dir_id, path in enumerate(self.dirs):
+            names = self.names[dir_id]
+            if path is None or not names:
+                continue
+            lowered = names.lower()
+            if len(lowered) != len(names):
+                # Keep offsets aligned with the original names: names whose
+                # lowercase form changes length stay as they are
+                lowered = "\n".join(
+                    low if len(low) == len(name) else name
+                    for name in names.split("\n")
+                    for low in (name.lower(),)
+                )
+            chunks.append(lowered)
+            blob_dirs.append(dir_id)
+            offsets.append(pos)
+            pos += len(lowered) + 1
+        self.blob = "\n".join(chunks)
+        self.blob_dirs = blob_dirs
+        self.blob_offsets = offsets
+        self.blob_stale = False
+
+    def match_names(self, term: str, limit: int) -> list[tuple[int, int, int]]:
+        """Find names matching term. Returns (dir id, start, end) in blob.
+
+        Matches are collected best kind first so the limit never drops a
+        better match found later in the blob: every prefix (and exact) match,
+        then substring matches, then fuzzy ones until the limit is reached.
+        """
+        blob = self.blob
+        found = []
+        seen_lines = set()
+        passes = [
+            (re.compile("^" + re.escape(term), re.MULTILINE), None),
+            (re.compile(re.escape(term)), limit),
+            (fuzzy_pattern(term), limit),
+        ]
+        for pattern, cap in passes:
+            if cap is not None and len(found) >= cap:
+                break
+            for m in pattern.finditer(blob):
+                line_start = blob.rfind("\n", 0, m.start()) + 1
+                if line_start in seen_lines:
+                    continue
+                seen_lines.add(line_start)
+                line_end = blob.find("\n", m.end())
+                if line_end < 0:
+                    line_end = len(blob)
+                chunk = bisect_right(self.blob_offsets, line_start) - 1
+                found.append((chunk, line_start, line_end))
+                if cap is not None and len(found) >= cap:
+                    break
+        return found
+
+    def search(self, query: str, limit: int = 30) -> list[str]:
+        """Fuzzy search indexed names.
+
+        The last word is matched against entry names (the usual "dir file"
+        typing order); any other words must appear in the full path.
+        """
+        terms = query.lower().split()
+        if not terms:
+            return []
+        if self.blob_stale:
+            self.build_blob()
 
-        lines = output.decode().strip().split("\n")
-        return [l for l in lines if l][:limit]
-    except Exception:
-        return []
+        name_term = terms[-1]
+        path_terms = terms[:-1]
+        dir_part = ""
+        if "/" in name_term:
+            dir_part, _, name_term = name_term.rpartition("/")
+            if not name_term:
+                name_term, dir_part = dir_part.rpartition("/")[2], ""
+        if not name_term:
+            return []
+
+        scored = []
+        for chunk, start, end in self.match_names(name_term, MAX_CANDIDATES):
+            dir_id = self.blob_dirs[chunk]
+            dir_path = self.dirs[dir_id]
+            offset = self.blob_offsets[chunk]
+            name = self.names[dir_id][start - offset : end - offset]
+            full = f"{dir_path}/{name}"
+            if path_terms or dir_part:
+                lowered = full.lower()
+                if dir_part and dir_part not in dir_path.lower():
+                    continue
+                if not all(t in lowered for t in path_terms):
+                    continue
+            score = score_match(name_term, self.blob[start:end], self.depth(dir_path))
+            scored.append((-score, full))
+
+        scored.sort()
+        return [full for _, full in scored[:limit]]
 
 
 def format_path(path: str) -> str:
@@ -92,9 +607,9 @@ def format_path(path: str) -> str:
     return path
 
 
-def get_file_icon(path: str) -> str:
+def get_file_icon(path: str, is_dir: bool) -> str:
     """Get appropriate icon for file type"""
-    if os.path.isdir(path):
+    if is_dir:
         return "folder"
 
     ext = Path(path).suffix.lower()
@@ -178,9 +693,9 @@ def format_size(size: int) -> str:
     return f"{size_float:.1f} TB"
 
 
-def get_file_type_chip(path: str) -> dict | None:
+def get_file_type_chip(path: str, is_dir: bool) -> dict | None:
     """Get file type chip based on extension"""
-    if os.path.isdir(path):
+    if is_dir:
         return None
 
     ext = Path(path).suffix.lower()
@@ -252,23 +767,19 @@ def get_file_type_chip(path: str) -> dict | None:
     return None
 
 
-def get_file_preview(path: str) -> dict | None:
-    """Generate preview data for a file"""
-    if not os.path.exists(path):
-        return None
+def get_file_preview(
+    path: str, st: os.stat_result, load_text: bool = False
+) -> dict | None:
+    """Generate preview data for a file.
 
-    is_dir = os.path.isdir(path)
+    Text previews are returned empty with "lazy": true unless load_text is set;
+    the launcher asks for the content (step "preview") once the item is focused.
+    """
+    is_dir = stat.S_ISDIR(st.st_mode)
     name = os.path.basename(path) or path
     ext = Path(path).suffix.lower()
-
-    # Get file stats
-    try:
-        stat = os.stat(path)
-        size = stat.st_size
-        mtime = datetime.fromtimestamp(stat.st_mtime).strftime("%Y-%m-%d %H:%M")
-    except OSError:
-        size = 0
-        mtime = "Unknown"
+    size = st.st_size
+    mtime = datetime.fromtimestamp(st.st_mtime).strftime("%Y-%m-%d %H:%M")
 
     metadata = [
         {"label": "Size", "value": format_size(size) if not is_dir else "Directory"},
@@ -334,15 +845,19 @@ def get_file_preview(path: str) -> dict | None:
         ".swift",
     ]
     if ext in text_extensions:
-        try:
-            with open(path, "r", errors="replace") as f:
-                content = f.read(5000)  # Read first 5KB
-                if len(content) == 5000:
-                    content += "\n\n... (truncated)"
-
-            # Use markdown for .md files
-            preview_type = "markdown" if ext == ".md" else "text"
-
+        # Use markdown for .md files
+        preview_type = "markdown" if ext == ".md" else "text"
+        if not load_text:
+            return {
+                "type": preview_type,
+                "content": "",
+                "lazy": True,
+                "title": name,
+                "metadata": metadata,
+                "actions": actions,
+            }
+        content = read_text_preview(path, st)
+        if content is not None:
             return {
                 "type": preview_type,
                 "content": content,
@@ -350,8 +865,6 @@ def get_file_preview(path: str) -> dict | None:
                 "metadata": metadata,
                 "actions": actions,
             }
-        except Exception:
-            pass
 
     # For other files, show metadata only
     if not is_dir:
@@ -366,11 +879,88 @@ def get_file_preview(path: str) -> dict | None:
     return None
 
 
-def path_to_result(path: str, show_actions: bool = True) -> dict:
-    """Convert a file path to a result dict"""
-    # Normalize path (remove trailing slash for directories)
-    path = path.rstrip("/")
-    is_dir = os.path.isdir(path)
+def stat_key(st: os.stat_result) -> tuple[int, int, int]:
+    """Identity of a file version: (dev, inode, mtime)."""
+    return (st.st_dev, st.st_ino, st.st_mtime_ns)
+
+
+def read_text_preview(path: str, st: os.stat_result) -> str | None:
+    """Read the start of a text file, cached by (dev, inode, mtime)."""
+    key = stat_key(st)
+    cached = _preview_cache.get(path)
+    if cached and cached[0] == key:
+        _preview_cache.move_to_end(path)
+        return cached[1]
+    try:
+        with open(path, "r", errors="replace") as f:
+            content = f.read(PREVIEW_BYTES)
+    except OSError:
+        return None
+    if len(content) == PREVIEW_BYTES:
+        content += "\n\n... (truncated)"
+    _preview_cache[path] = (key, content)
+    if len(_preview_cache) > PREVIEW_CACHE_SIZE:
+        _preview_cache.popitem(last=False)
+    return content
+
+
+def stat_paths(paths: list[str]) -> dict[str, os.stat_result]:
+    """Stat result paths, one os.scandir per directory holding several of them.
+
+    Missing paths are left out. Symlinks are followed, like the index.
+    """
+    by_dir: dict[str, set[str]] = {}
+    for path in paths:
+        by_dir.setdefault(os.path.dirname(path), set()).add(path)
+
+    stats = {}
+    for folder, wanted in by_dir.items():
+        if len(wanted) > 1:
+            try:
+                with os.scandir(folder) as it:
+                    for entry in it:
+                        if entry.path in wanted:
+                            try:
+                                stats[entry.path] = entry.stat()
+                            except OSError:
+                                pass
+                continue
+            except OSError:
+                pass
+        for path in wanted:
+            try:
+                stats[path] = os.stat(path)
+            except OSError:
+                pass
+    return stats
+
+
+def paths_to_results(paths: list[str]) -> list[dict]:
+    """Convert paths to result dicts, reusing rows for unchanged files."""
+    paths = [p.rstrip("/") for p in paths]
+    stats = stat_paths(paths)
+    results = []
+    for path in paths:
+        st = stats.get(path)
+        if st is None:
+            continue
+        key = stat_key(st)
+        cached = _result_cache.get(path)
+        if cached and cached[0] == key:
+            _result_cache.move_to_end(path)
+            results.append(cached[1])
+            continue
+        result = path_to_result(path, st)
+        _result_cache[path] = (key, result)
+        if len(_result_cache) > RESULT_CACHE_SIZE:
+            _result_cache.popitem(last=False)
+        results.append(result)
+    return results
+
+
+def path_to_result(path: str, st: os.stat_result, show_actions: bool = True) -> dict:
+    """Convert a file path and its stat result to a result dict"""
+    is_dir = stat.S_ISDIR(st.st_mode)
     name = os.path.basename(path) or path
     folder_path = os.path.dirname(path)
 
@@ -378,7 +968,7 @@ def path_to_result(path: str, show_actions: bool = True) -> dict:
         "id": path,
         "name": name,
         "description": format_path(folder_path),
-        "icon": get_file_icon(path),
+        "icon": get_file_icon(path, is_dir),
         "verb": "Open",
     }
 
@@ -394,18 +984,13 @@ def path_to_result(path: str, show_actions: bool = True) -> dict:
 
     # Add chips for file type and size
     chips = []
-    type_chip = get_file_type_chip(path)
+    type_chip = get_file_type_chip(path, is_dir)
     if type_chip:
         chips.append(type_chip)
 
     # Add size chip for large files (> 10MB)
-    if not is_dir:
-        try:
-            size = os.path.getsize(path)
-            if size > 10 * 1024 * 1024:  # > 10MB
-                chips.append({"text": format_size(size), "icon": "storage"})
-        except OSError:
-            pass
+    if not is_dir and st.st_size > 10 * 1024 * 1024:  # > 10MB
+        chips.append({"text": format_size(st.st_size), "icon": "storage"})
 
     if chips:
         result["chips"] = chips
@@ -416,15 +1001,23 @@ def path_to_result(path: str, show_actions: bool = True) -> dict:
         result["thumbnail"] = path
 
     # Add preview panel data
-    preview = get_file_preview(path)
+    preview = get_file_preview(path, st)
     if preview:
         result["preview"] = preview
 
     return result
 
 
-def main():
-    input_data = json.load(sys.stdin)
+def get_index_status(index: FileIndex) -> str:
+    """Describe the index for the empty-query hint."""
+    count = sum(len(k) for k in index.kinds)
+    if index.pending:
+        return f"Indexing... {count:,} files so far"
+    return f"{count:,} files indexed"
+
+
+def handle_request(input_data: dict, index: FileIndex) -> None:
+    """Handle one request from the launcher."""
     step = input_data.get("step", "initial")
     query = input_data.get("query", "").strip()
     selected = input_data.get("selected", {})
@@ -437,7 +1030,7 @@ def main():
             {
                 "id": "__info__",
                 "name": "Type to search files",
-                "description": "Using fd + fzf for fast fuzzy search",
+                "description": get_index_status(index),
                 "icon": "info",
             }
         ]
@@ -456,8 +1049,8 @@ def main():
 
     if step == "search":
         if query:
-            paths = search_files(query)
-            results = [path_to_result(p) for p in paths if os.path.exists(p)]
+            paths = index.search(query)
+            results = paths_to_results(paths)
             if not results:
                 results = [
                     {
@@ -471,7 +1064,7 @@ def main():
                 {
                     "id": "__info__",
                     "name": "Type to search files",
-                    "description": "Using fd + fzf for fast fuzzy search",
+                    "description": get_index_status(index),
                     "icon": "info",
                 }
             ]
@@ -488,6 +1081,22 @@ def main():
         )
         return
 
+    if step == "preview":
+        # Focused item with a lazy preview: send the full preview
+        path = selected_id
+        try:
+            st = os.stat(path)
+        except OSError:
+            return
+        preview = get_file_preview(path, st, load_text=True)
+        if preview:
+            print(
+                json.dumps(
+                    {"type": "update", "items": [{"id": path, "preview": preview}]}
+                )
+            )
+        return
+
     if step == "action":
         # Info/no-results items are not actionable
         if selected_id in ["__info__", "__no_results__"]:
@@ -554,5 +1163,76 @@ def main():
             print(json.dumps({"type": "error", "message": f"File not found: {path}"}))
 
 
+def main():
+    """Run files handler in daemon mode, keeping the index resident."""
+    signal.signal(signal.SIGTERM, lambda s, f: sys.exit(0))
+    signal.signal(signal.SIGINT, lambda s, f: sys.exit(0))
+
+    index = FileIndex(HOME, get_exclude_patterns())
+    if not index.load():
+        index = FileIndex(HOME, get_exclude_patterns())
+        st = os.stat(HOME)
+        index.add_dir(HOME, (st.st_dev, st.st_ino))
+    watch_fd = index.start_watching()
+
+    try:
+        while True:
+            # Scan in batches between requests; otherwise sleep until a request,
+            # a filesystem event, the next index save or unwatched dir recheck
+            if index.pending:
+                timeout = 0
+            else:
+                deadlines = []
+                if index.changed_at:
+                    deadlines.append(index.changed_at + SAVE_DELAY)
+                if index.unwatched:
+                    deadlines.append(index.last_recheck + UNWATCHED_RECHECK_SECONDS)
+                if watch_fd is None:
+                    deadlines.append(index.last_recheck + UNWATCHED_RECHECK_SECONDS)
+                timeout = max(0.0, min(deadlines) - time.time()) if deadlines else None
+            watched = [sys.stdin] if watch_fd is None else [sys.stdin, watch_fd]
+            readable, _, _ = select.select(watched, [], [], timeout)
+
+            if watch_fd is not None and watch_fd in readable:
+                index.read_events()
+
+            if sys.stdin in readable:
+                line = sys.stdin.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line.strip())
+                except json.JSONDecodeError:
+                    continue
+                # Apply pending changes first so results reflect the disk
+                if watch_fd is not None:
+                    index.read_events()
+                if request.get("step") == "search":
+                    index.scan_for(SEARCH_SCAN_BUDGET)
+                handle_request(request, index)
+                sys.stdout.flush()
+
+            if index.pending:
+                index.scan_pending()
+            elif watch_fd is None:
+                # No inotify at all: poll every directory's mtime
+                if time.time() - index.last_recheck >= UNWATCHED_RECHECK_SECONDS:
+                    index.last_recheck = time.time()
+                    index.revalidate(list(index.dir_ids))
+            else:
+                index.recheck_unwatched()
+
+            if (
+                not index.pending
+                and index.changed_at
+                and time.time() - index.changed_at >= SAVE_DELAY
+            ):
+                index.save()
+    finally:
+        # Partial builds are safe to save: unscanned dirs have no mtime yet
+        if index.changed_at:
+            index.save()
+
+
 if __name__ == "__main__":
     main()
@@ -2,38 +2,38 @@
 """
 Hyprland plugin handler - window management and dispatcher commands.
 
-Uses hyprctl to query windows and execute Hyprland dispatchers.
+Queries windows and runs dispatchers over Hyprland's request socket (see
+scripts/hyprland/hyprland_ipc.py), without spawning hyprctl.
 Supports natural language commands like "move to workspace 2" or "toggle floating".
 
-Runs as a daemon, watching Hyprland's IPC socket for window events.
+Runs as a daemon, keeping a window table current from Hyprland's event socket
+(.socket2.sock). Window events are applied in memory and only the windows that
+changed are sent as incremental index updates, coalesced over a short debounce.
 """
 
 import json
-import os
 import re
 import select
 import socket
-import subprocess
 import sys
+import time
 from pathlib import Path
 
-# Hyprland events that trigger reindex
-WATCH_EVENTS = {"openwindow", "closewindow", "movewindow", "windowtitle"}
+# Shared Hyprland socket client, bundled with hamr in scripts/hyprland
+HAMR_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(HAMR_DIR / "scripts" / "hyprland"))
+import hyprland_ipc  # noqa: E402
+from hyprland_ipc import HyprlandError  # noqa: E402
 
+# Window changes are collected for this long before an index update is sent
+EVENT_DEBOUNCE_SECONDS = 0.25
 
-def get_hyprland_socket_path() -> Path | None:
-    """Get path to Hyprland's event socket (.socket2.sock)."""
-    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
-    instance_sig = os.environ.get("HYPRLAND_INSTANCE_SIGNATURE")
-    if not runtime_dir or not instance_sig:
-        return None
-    socket_path = Path(runtime_dir) / "hypr" / instance_sig / ".socket2.sock"
-    return socket_path if socket_path.exists() else None
+EVENT_RECV_SIZE = 65536
 
 
 def connect_hyprland_socket() -> socket.socket | None:
     """Connect to Hyprland's event socket. Returns socket or None."""
-    socket_path = get_hyprland_socket_path()
+    socket_path = hyprland_ipc.get_socket_path(hyprland_ipc.EVENT_SOCKET)
     if not socket_path:
         return None
     try:
@@ -45,19 +45,37 @@ def connect_hyprland_socket() -> socket.socket | None:
         return None
 
 
-def read_hyprland_events(sock: socket.socket) -> list[str]:
-    """Read pending events from Hyprland socket. Returns list of event names."""
-    events = []
-    try:
-        data = sock.recv(4096)
-        if data:
-            for line in data.decode(errors="ignore").split("\n"):
-                if ">>" in line:
-                    event_name = line.split(">>")[0]
-                    events.append(event_name)
-    except (OSError, socket.error, BlockingIOError):
-        pass
-    return events
+class EventReader:
+    """Line-buffered reader for Hyprland's event socket ("EVENT>>DATA" lines)."""
+
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self.buffer = b""
+
+    def fileno(self) -> int:
+        return self.sock.fileno()
+
+    def read(self) -> list[tuple[str, str]] | None:
+        """Read pending events as (name, payload). Returns None once closed.
+
+        A line split across reads is kept until the rest of it arrives.
+        """
+        try:
+            data = self.sock.recv(EVENT_RECV_SIZE)
+        except BlockingIOError:
+            return []
+        except OSError:
+            data = b""
+        if not data:
+            self.sock.close()
+            return None
+        *lines, self.buffer = (self.buffer + data).split(b"\n")
+        events = []
+        for line in lines:
+            name, sep, payload = line.decode(errors="replace").partition(">>")
+            if sep:
+                events.append((name, payload))
+        return events
 
 
 HYPR_DISPATCHERS = [
@@ -509,28 +527,20 @@ HYPR_DISPATCHERS = [
 ]
 
 
-def get_global_shortcuts() -> list[dict]:
-    """Get registered global shortcuts from Hyprland"""
+def get_hyprland_state() -> tuple[list[dict], list[dict], list[dict]]:
+    """Get windows, workspaces and global shortcuts in a single request."""
     try:
-        result = subprocess.run(
-            ["hyprctl", "globalshortcuts"],
-            capture_output=True,
-            text=True,
-            check=True,
+        clients, workspaces, shortcuts = hyprland_ipc.batch(
+            ["j/clients", "j/workspaces", "globalshortcuts"]
         )
-        shortcuts = []
-        for line in result.stdout.strip().split("\n"):
-            if " -> " in line:
-                shortcut_id, description = line.split(" -> ", 1)
-                shortcuts.append(
-                    {
-                        "id": shortcut_id.strip(),
-                        "description": description.strip(),
-                    }
-                )
-        return shortcuts
-    except (subprocess.CalledProcessError, FileNotFoundError):
-        return []
+        windows = json.loads(clients)
+        workspaces = json.loads(workspaces)
+    except (HyprlandError, json.JSONDecodeError):
+        return [], [], []
+    # Sort by focusHistoryID (most recently focused first)
+    windows.sort(key=lambda w: w.get("focusHistoryID", 999))
+    workspaces.sort(key=lambda w: w.get("id", 0))
+    return windows, workspaces, hyprland_ipc.parse_global_shortcuts(shortcuts)
 
 
 def shortcut_to_result(shortcut: dict) -> dict:
@@ -577,39 +587,6 @@ def shortcut_to_index_item(shortcut: dict) -> dict:
     }
 
 
-def get_windows() -> list[dict]:
-    """Get all open windows from Hyprland"""
-    try:
-        result = subprocess.run(
-            ["hyprctl", "clients", "-j"],
-            capture_output=True,
-            text=True,
-            check=True,
-        )
-        windows = json.loads(result.stdout)
-        # Sort by focusHistoryID (most recently focused first)
-        windows.sort(key=lambda w: w.get("focusHistoryID", 999))
-        return windows
-    except (subprocess.CalledProcessError, FileNotFoundError, json.JSONDecodeError):
-        return []
-
-
-def get_workspaces() -> list[dict]:
-    """Get all workspaces from Hyprland"""
-    try:
-        result = subprocess.run(
-            ["hyprctl", "workspaces", "-j"],
-            capture_output=True,
-            text=True,
-            check=True,
-        )
-        workspaces = json.loads(result.stdout)
-        workspaces.sort(key=lambda w: w.get("id", 0))
-        return workspaces
-    except (subprocess.CalledProcessError, FileNotFoundError, json.JSONDecodeError):
-        return []
-
-
 def window_to_index_item(window: dict) -> dict:
     """Convert window to index item format"""
     address = window.get("address", "")
@@ -691,44 +668,29 @@ def window_to_result(window: dict, workspaces: list[dict] | None = None) -> dict
 def focus_window(address: str) -> tuple[bool, str]:
     """Focus a window by address"""
     try:
-        subprocess.run(
-            ["hyprctl", "dispatch", "focuswindow", f"address:{address}"],
-            check=True,
-            capture_output=True,
-        )
+        hyprland_ipc.dispatch("focuswindow", f"address:{address}")
         return True, "Window focused"
-    except subprocess.CalledProcessError:
+    except HyprlandError:
         return False, f"Failed to focus window {address}"
 
 
 def close_window(address: str) -> tuple[bool, str]:
     """Close a window by address"""
     try:
-        subprocess.run(
-            ["hyprctl", "dispatch", "closewindow", f"address:{address}"],
-            check=True,
-            capture_output=True,
-        )
+        hyprland_ipc.dispatch("closewindow", f"address:{address}")
         return True, "Window closed"
-    except subprocess.CalledProcessError:
+    except HyprlandError:
         return False, f"Failed to close window {address}"
 
 
 def move_window_to_workspace(address: str, workspace_id: int) -> tuple[bool, str]:
     """Move a window to a workspace (silently, without switching to it)"""
     try:
-        subprocess.run(
-            [
-                "hyprctl",
-                "dispatch",
-                "movetoworkspacesilent",
-                f"{workspace_id},address:{address}",
-            ],
-            check=True,
-            capture_output=True,
+        hyprland_ipc.dispatch(
+            "movetoworkspacesilent", f"{workspace_id},address:{address}"
         )
         return True, f"Moved to workspace {workspace_id}"
-    except subprocess.CalledProcessError:
+    except HyprlandError:
         return False, f"Failed to move window to workspace {workspace_id}"
 
 
@@ -1010,18 +972,143 @@ def execute_dispatcher(dispatcher: dict, param: str | None = None) -> tuple[bool
     dispatcher_param = param or dispatcher.get("param", "")
 
     try:
-        cmd = ["hyprctl", "dispatch", dispatcher_name]
-        if dispatcher_param:
-            cmd.append(dispatcher_param)
-        subprocess.run(cmd, check=True, capture_output=True)
+        hyprland_ipc.dispatch(dispatcher_name, dispatcher_param)
         return True, f"{dispatcher.get('name', dispatcher_name)} executed"
-    except subprocess.CalledProcessError as e:
+    except HyprlandError as e:
         return False, f"Failed to execute {dispatcher_name}: {e}"
 
 
-def get_index_items() -> list[dict]:
+class WindowTable:
+    """Open windows keyed by address, kept current from socket events.
+
+    Windows touched by events are marked dirty; flush() turns them into index
+    changes, skipping windows whose index item ended up unchanged.
+    """
+
+    def __init__(self):
+        self.windows: dict[str, dict] = {}
+        self.indexed: dict[str, dict] = {}
+        self.dirty: set[str] = set()
+        # Workspace id -> name, so windows added from events that only carry a
+        # workspace name (openwindow, legacy movewindow) still get an id
+        self.workspaces: dict[int, str] = {}
+        # Older Hyprland only sends windowtitle (no title in the payload)
+        self.has_title_v2 = False
+        self.titles_stale = False
+
+    def load(self, windows: list[dict]) -> None:
+        """Replace the table with windows from a clients query."""
+        self.dirty |= self.windows.keys()
+        self.windows = {w["address"]: w for w in windows if w.get("address")}
+        self.dirty |= self.windows.keys()
+        for window in self.windows.values():
+            workspace = window.get("workspace") or {}
+            if isinstance(workspace.get("id"), int):
+                self.workspaces[workspace["id"]] = workspace.get("name", "")
+
+    def workspace_named(self, workspace_name: str) -> dict:
+        """Build a window's workspace field from a name, adding the id if known."""
+        for workspace_id, name in self.workspaces.items():
+            if name == workspace_name:
+                return {"id": workspace_id, "name": workspace_name}
+        return {"name": workspace_name}
+
+    def apply(self, name: str, payload: str) -> None:
+        """Apply one event to the table. Event addresses lack the 0x prefix."""
+        if name == "openwindow":
+            fields = payload.split(",", 3)
+            if len(fields) < 4:
+                return
+            address, workspace_name, window_class, title = fields
+            self.windows[f"0x{address}"] = {
+                "address": f"0x{address}",
+                "title": title,
+                "class": window_class,
+                "workspace": self.workspace_named(workspace_name),
+            }
+            self.dirty.add(f"0x{address}")
+        elif name == "closewindow":
+            self.windows.pop(f"0x{payload}", None)
+            self.dirty.add(f"0x{payload}")
+        elif name == "windowtitlev2":
+            address, _, title = payload.partition(",")
+            self.has_title_v2 = True
+            self.update(f"0x{address}", title=title)
+        elif name == "windowtitle":
+            self.titles_stale = True
+        elif name == "movewindowv2":
+            fields = payload.split(",", 2)
+            if len(fields) == 3 and fields[1].lstrip("-").isdigit():
+                address, workspace_id, workspace_name = fields
+                workspace = {"id": int(workspace_id), "name": workspace_name}
+                self.workspaces[workspace["id"]] = workspace_name
+                self.update(f"0x{address}", workspace=workspace)
+        elif name == "movewindow":
+            address, _, workspace_name = payload.partition(",")
+            window = self.windows.get(f"0x{address}")
+            if window and window["workspace"].get("name") != workspace_name:
+                workspace = self.workspace_named(workspace_name)
+                self.update(f"0x{address}", workspace=workspace)
+        elif name == "createworkspacev2":
+            workspace_id, _, workspace_name = payload.partition(",")
+            if workspace_id.lstrip("-").isdigit():
+                self.workspaces[int(workspace_id)] = workspace_name
+        elif name == "destroyworkspacev2":
+            workspace_id, _, _ = payload.partition(",")
+            if workspace_id.lstrip("-").isdigit():
+                self.workspaces.pop(int(workspace_id), None)
+        elif name == "renameworkspace":
+            workspace_id, _, workspace_name = payload.partition(",")
+            if not workspace_id.lstrip("-").isdigit():
+                return
+            old_name = self.workspaces.get(int(workspace_id))
+            self.workspaces[int(workspace_id)] = workspace_name
+            for address, window in self.windows.items():
+                workspace = window["workspace"]
+                if "id" in workspace:
+                    matches = str(workspace["id"]) == workspace_id
+                else:
+                    # Added from a name-only event before the id was known
+                    matches = old_name is not None and workspace.get("name") == old_name
+                if matches:
+                    window["workspace"] = {
+                        **workspace,
+                        "id": int(workspace_id),
+                        "name": workspace_name,
+                    }
+                    self.dirty.add(address)
+
+    def update(self, address: str, **fields) -> None:
+        window = self.windows.get(address)
+        if window is not None:
+            window.update(fields)
+            self.dirty.add(address)
+
+    def flush(self) -> tuple[list[dict], list[str]]:
+        """Get (added or changed index items, removed item ids) since last flush."""
+        if self.titles_stale and not self.has_title_v2:
+            windows, _, _ = get_hyprland_state()
+            self.load(windows)
+        self.titles_stale = False
+
+        items = []
+        removed = []
+        for address in self.dirty:
+            window = self.windows.get(address)
+            if window is None:
+                if self.indexed.pop(address, None) is not None:
+                    removed.append(f"window:{address}")
+                continue
+            item = window_to_index_item(window)
+            if self.indexed.get(address) != item:
+                self.indexed[address] = item
+                items.append(item)
+        self.dirty.clear()
+        return items, removed
+
+
+def get_index_items(windows: list[dict], shortcuts: list[dict]) -> list[dict]:
     """Generate full index items (windows + dispatchers + shortcuts)."""
-    windows = get_windows()
     items = [window_to_index_item(w) for w in windows]
     # Only index dispatchers that have static params (can be executed directly)
     for d in HYPR_DISPATCHERS:
@@ -1029,7 +1116,6 @@ def get_index_items() -> list[dict]:
             items.append(dispatcher_to_index_item(d))
     items.extend(generate_workspace_index_items())
     # Add global shortcuts
-    shortcuts = get_global_shortcuts()
     items.extend([shortcut_to_index_item(s) for s in shortcuts])
     return items
 
@@ -1041,18 +1127,16 @@ def handle_request(input_data: dict):
     selected = input_data.get("selected", {})
     action = input_data.get("action", "")
 
-    windows = get_windows()
-    workspaces = get_workspaces()
+    windows, workspaces, shortcuts = get_hyprland_state()
 
     if step == "index":
-        items = get_index_items()
+        items = get_index_items(windows, shortcuts)
         print(json.dumps({"type": "index", "items": items}))
         return
 
     if step == "initial":
         results = [window_to_result(w, workspaces) for w in windows]
         results.extend(get_common_commands())
-        shortcuts = get_global_shortcuts()
         results.extend([shortcut_to_result(s) for s in shortcuts])
         print(
             json.dumps(
@@ -1087,7 +1171,6 @@ def handle_request(input_data: dict):
         ]
 
         # Filter global shortcuts
-        shortcuts = get_global_shortcuts()
         filtered_shortcuts = [
             s
             for s in shortcuts
@@ -1125,15 +1208,12 @@ def handle_request(input_data: dict):
 
         if item_id.startswith("shortcut:"):
             shortcut_id = item_id.replace("shortcut:", "")
-            cmd = ["hyprctl", "dispatch", "global", shortcut_id]
-
             # Find the shortcut description for the notification
-            shortcuts = get_global_shortcuts()
             shortcut = next((s for s in shortcuts if s["id"] == shortcut_id), None)
             name = shortcut["description"] if shortcut else shortcut_id
 
             try:
-                subprocess.run(cmd, check=True, capture_output=True)
+                hyprland_ipc.dispatch("global", shortcut_id)
                 print(
                     json.dumps(
                         {
@@ -1143,7 +1223,7 @@ def handle_request(input_data: dict):
                         }
                     )
                 )
-            except subprocess.CalledProcessError as e:
+            except HyprlandError as e:
                 print(json.dumps({"type": "error", "message": f"Failed: {e}"}))
             return
 
@@ -1153,23 +1233,23 @@ def handle_request(input_data: dict):
             # Handle generated workspace commands (workspace-next, goto-special, etc.)
             static_commands = {
                 "workspace-next": (
-                    ["hyprctl", "dispatch", "workspace", "+1"],
+                    ("workspace", "+1"),
                     "Next Workspace",
                 ),
                 "workspace-prev": (
-                    ["hyprctl", "dispatch", "workspace", "-1"],
+                    ("workspace", "-1"),
                     "Previous Workspace",
                 ),
                 "workspace-empty": (
-                    ["hyprctl", "dispatch", "workspace", "empty"],
+                    ("workspace", "empty"),
                     "Go to Empty Workspace",
                 ),
                 "goto-special": (
-                    ["hyprctl", "dispatch", "togglespecialworkspace"],
+                    ("togglespecialworkspace", ""),
                     "Toggle Scratchpad",
                 ),
                 "move-to-special": (
-                    ["hyprctl", "dispatch", "movetoworkspacesilent", "special"],
+                    ("movetoworkspacesilent", "special"),
                     "Move to Scratchpad",
                 ),
             }
@@ -1177,7 +1257,7 @@ def handle_request(input_data: dict):
             if dispatcher_id_full in static_commands:
                 cmd, name = static_commands[dispatcher_id_full]
                 try:
-                    subprocess.run(cmd, check=True, capture_output=True)
+                    hyprland_ipc.dispatch(*cmd)
                     print(
                         json.dumps(
                             {
@@ -1187,17 +1267,17 @@ def handle_request(input_data: dict):
                             }
                         )
                     )
-                except subprocess.CalledProcessError as e:
+                except HyprlandError as e:
                     print(json.dumps({"type": "error", "message": f"Failed: {e}"}))
                 return
 
             # Handle goto-workspace:N and move-to-workspace:N
             if dispatcher_id_full.startswith("goto-workspace:"):
                 ws = dispatcher_id_full.split(":")[1]
-                cmd = ["hyprctl", "dispatch", "workspace", ws]
+                cmd = ("workspace", ws)
                 name = f"Go to Workspace {ws}"
                 try:
-                    subprocess.run(cmd, check=True, capture_output=True)
+                    hyprland_ipc.dispatch(*cmd)
                     print(
                         json.dumps(
                             {
@@ -1207,16 +1287,16 @@ def handle_request(input_data: dict):
                             }
                         )
                     )
-                except subprocess.CalledProcessError as e:
+                except HyprlandError as e:
                     print(json.dumps({"type": "error", "message": f"Failed: {e}"}))
                 return
 
             if dispatcher_id_full.startswith("move-to-workspace:"):
                 ws = dispatcher_id_full.split(":")[1]
-                cmd = ["hyprctl", "dispatch", "movetoworkspace", ws]
+                cmd = ("movetoworkspace", ws)
                 name = f"Move to Workspace {ws}"
                 try:
-                    subprocess.run(cmd, check=True, capture_output=True)
+                    hyprland_ipc.dispatch(*cmd)
                     print(
                         json.dumps(
                             {
@@ -1226,7 +1306,7 @@ def handle_request(input_data: dict):
                             }
                         )
                     )
-                except subprocess.CalledProcessError as e:
+                except HyprlandError as e:
                     print(json.dumps({"type": "error", "message": f"Failed: {e}"}))
                 return
 
@@ -1273,8 +1353,7 @@ def handle_request(input_data: dict):
 
             if action == "close":
                 success, message = close_window(address)
-                windows = get_windows()
-                workspaces = get_workspaces()
+                windows, workspaces, _ = get_hyprland_state()
                 results = [window_to_result(w, workspaces) for w in windows]
                 if not results:
                     results = [
@@ -1298,8 +1377,7 @@ def handle_request(input_data: dict):
             if action.startswith("move:"):
                 workspace_id = int(action.replace("move:", ""))
                 success, message = move_window_to_workspace(address, workspace_id)
-                windows = get_windows()
-                workspaces = get_workspaces()
+                windows, workspaces, _ = get_hyprland_state()
                 results = [window_to_result(w, workspaces) for w in windows]
                 if not results:
                     results = [
@@ -1330,67 +1408,76 @@ def handle_request(input_data: dict):
     print(json.dumps({"type": "error", "message": f"Unknown step: {step}"}))
 
 
+def emit_full_index(table: WindowTable) -> None:
+    """Reload the window table and send a full index."""
+    windows, _, shortcuts = get_hyprland_state()
+    table.load(windows)
+    table.flush()
+    items = get_index_items(windows, shortcuts)
+    print(json.dumps({"type": "index", "mode": "full", "items": items}), flush=True)
+
+
 def main():
     """Daemon main loop with Hyprland IPC socket watching."""
-    # Emit full index on startup
-    items = get_index_items()
-    print(json.dumps({"type": "index", "mode": "full", "items": items}), flush=True)
+    table = WindowTable()
+    emit_full_index(table)
 
-    # Try to connect to Hyprland's event socket
+    # Try to connect to Hyprland's event socket; without it only stdin
+    # requests are handled
     hypr_socket = connect_hyprland_socket()
-
-    if hypr_socket is not None:
-        # Daemon mode with Hyprland IPC socket
-        while True:
-            try:
-                readable, _, _ = select.select([sys.stdin, hypr_socket], [], [], 1.0)
-            except (ValueError, OSError):
-                # Socket closed, try to reconnect
+    events = EventReader(hypr_socket) if hypr_socket is not None else None
+    flush_at = None
+
+    while True:
+        watched = [sys.stdin] if events is None else [sys.stdin, events]
+        timeout = None
+        if flush_at is not None:
+            timeout = max(0.0, flush_at - time.monotonic())
+        try:
+            readable, _, _ = select.select(watched, [], [], timeout)
+        except (ValueError, OSError):
+            break
+
+        if events is not None and events in readable:
+            pending = events.read()
+            if pending is None:
+                # Socket closed (Hyprland restarted?): reconnect and resync
                 hypr_socket = connect_hyprland_socket()
-                if hypr_socket is None:
-                    break
-                continue
+                events = EventReader(hypr_socket) if hypr_socket is not None else None
+                if events is not None:
+                    emit_full_index(table)
+            else:
+                for name, payload in pending:
+                    table.apply(name, payload)
+                if (table.dirty or table.titles_stale) and flush_at is None:
+                    flush_at = time.monotonic() + EVENT_DEBOUNCE_SECONDS
+
+        if flush_at is not None and time.monotonic() >= flush_at:
+            flush_at = None
+            items, removed = table.flush()
+            if items or removed:
+                print(
+                    json.dumps(
+                        {
+                            "type": "index",
+                            "mode": "incremental",
+                            "items": items,
+                            "remove": removed,
+                        }
+                    ),
+                    flush=True,
+                )
 
-            for r in readable:
-                if r == sys.stdin:
-                    try:
-                        line = sys.stdin.readline()
-                        if not line:
-                            return
-                        input_data = json.loads(line)
-                        handle_request(input_data)
-                        sys.stdout.flush()
-                    except json.JSONDecodeError:
-                        continue
-
-                elif r == hypr_socket:
-                    events = read_hyprland_events(hypr_socket)
-                    if any(ev in WATCH_EVENTS for ev in events):
-                        items = get_index_items()
-                        print(
-                            json.dumps(
-                                {"type": "index", "mode": "full", "items": items}
-                            )
-                        )
-                        sys.stdout.flush()
-    else:
-        # Fallback: no socket, just handle stdin requests (polling mode)
-        while True:
+        if sys.stdin in readable:
             try:
-                readable, _, _ = select.select([sys.stdin], [], [], 2.0)
-            except (ValueError, OSError):
-                break
-
-            if readable:
-                try:
-                    line = sys.stdin.readline()
-                    if not line:
-                        return
-                    input_data = json.loads(line)
-                    handle_request(input_data)
-                    sys.stdout.flush()
-                except json.JSONDecodeError:
-                    continue
+                line = sys.stdin.readline()
+                if not line:
+                    return
+                input_data = json.loads(line)
+                handle_request(input_data)
+                sys.stdout.flush()
+            except json.JSONDecodeError:
+                continue
 
 
 if __name__ == "__main__":
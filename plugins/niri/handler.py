@@ -2,19 +2,39 @@
 """
 Niri plugin handler - window management and compositor actions.
 
-Uses niri msg to query windows and execute Niri actions.
-Runs as a daemon emitting full index on startup.
+Talks to niri over $NIRI_SOCKET (see scripts/niri/niri_ipc.py) without
+spawning `niri msg`. Runs as a daemon emitting a full index on startup, then
+keeps a window/workspace model from niri's event stream and sends only the
+windows that changed as incremental index updates.
 """
 
 import json
-import os
 import select
 import signal
-import subprocess
 import sys
 import time
-
-INDEX_DEBOUNCE_INTERVAL = 2.0
+from pathlib import Path
+
+# Shared niri socket client, bundled with hamr in scripts/niri
+HAMR_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(HAMR_DIR / "scripts" / "niri"))
+import niri_ipc  # noqa: E402
+from niri_ipc import NiriError  # noqa: E402
+
+# Window changes are collected for this long before an index update is sent
+INDEX_DEBOUNCE_INTERVAL = 0.25
+
+# Fields niri requires when an action is sent over IPC (`niri msg action`
+# fills these in with its CLI defaults)
+ACTION_FIELDS = {
+    "screenshot": {"show_pointer": True},
+    "screenshot-screen": {"write_to_disk": True, "show_pointer": True},
+    "screenshot-window": {"write_to_disk": True},
+    "move-column-to-workspace-down": {"focus": True},
+    "move-column-to-workspace-up": {"focus": True},
+    "move-window-to-workspace-down": {"focus": True},
+    "move-window-to-workspace-up": {"focus": True},
+}
 
 NIRI_ACTIONS = [
     # Window State
@@ -448,39 +468,101 @@ NIRI_ACTIONS = [
 ]
 
 
-def get_windows() -> list[dict]:
-    try:
-        result = subprocess.run(
-            ["niri", "msg", "--json", "windows"],
-            capture_output=True,
-            text=True,
-            check=True,
-        )
-        windows = json.loads(result.stdout)
-        windows.sort(
+class NiriState:
+    """Windows and workspaces, kept current from niri's event stream.
+
+    Windows touched by events are marked dirty; flush() turns them into index
+    changes, skipping windows whose index item ended up unchanged.
+    """
+
+    def __init__(self):
+        self.windows: dict[int, dict] = {}
+        self.workspaces: dict[int, dict] = {}
+        self.indexed: dict[int, dict] = {}
+        self.dirty: set[int] = set()
+
+    def set_windows(self, windows: list[dict]) -> None:
+        self.dirty |= self.windows.keys()
+        self.windows = {w["id"]: w for w in windows}
+        self.dirty |= self.windows.keys()
+
+    def load(self) -> None:
+        """Query windows and workspaces directly (when there's no stream)."""
+        try:
+            windows = niri_ipc.query("Windows")
+            workspaces = niri_ipc.query("Workspaces")
+        except NiriError:
+            return
+        self.set_windows(windows)
+        self.workspaces = {ws["id"]: ws for ws in workspaces}
+
+    def apply(self, event: dict) -> None:
+        """Apply one event-stream event. Events that don't affect windows or
+        workspaces as shown here are ignored."""
+        for name, data in event.items():
+            if name == "WindowsChanged":
+                self.set_windows(data["windows"])
+            elif name == "WindowOpenedOrChanged":
+                window = data["window"]
+                if window.get("is_focused"):
+                    for other in self.windows.values():
+                        other["is_focused"] = False
+                self.windows[window["id"]] = window
+                self.dirty.add(window["id"])
+            elif name == "WindowClosed":
+                self.windows.pop(data["id"], None)
+                self.dirty.add(data["id"])
+            elif name == "WindowFocusChanged":
+                for window in self.windows.values():
+                    window["is_focused"] = window["id"] == data["id"]
+            elif name == "WindowFocusTimestampChanged":
+                window = self.windows.get(data["id"])
+                if window is not None:
+                    window["focus_timestamp"] = data["focus_timestamp"]
+            elif name == "WorkspacesChanged":
+                self.workspaces = {ws["id"]: ws for ws in data["workspaces"]}
+            elif name == "WorkspaceActivated":
+                activated = self.workspaces.get(data["id"])
+                if activated is None:
+                    continue
+                for ws in self.workspaces.values():
+                    if ws.get("output") == activated.get("output"):
+                        ws["is_active"] = ws is activated
+                    if data["focused"]:
+                        ws["is_focused"] = ws is activated
+
+    def sorted_windows(self) -> list[dict]:
+        """Windows, focused first, then most recently focused."""
+        return sorted(
+            self.windows.values(),
             key=lambda w: (
                 0 if w.get("is_focused") else 1,
                 -(w.get("focus_timestamp") or {}).get("secs", 0),
-            )
+            ),
         )
-        return windows
-    except (subprocess.CalledProcessError, FileNotFoundError, json.JSONDecodeError):
-        return []
 
-
-def get_workspaces() -> list[dict]:
-    try:
-        result = subprocess.run(
-            ["niri", "msg", "--json", "workspaces"],
-            capture_output=True,
-            text=True,
-            check=True,
+    def sorted_workspaces(self) -> list[dict]:
+        return sorted(
+            self.workspaces.values(),
+            key=lambda w: (w.get("output") or "", w.get("idx", 0)),
         )
-        workspaces = json.loads(result.stdout)
-        workspaces.sort(key=lambda w: (w.get("output", ""), w.get("idx", 0)))
-        return workspaces
-    except (subprocess.CalledProcessError, FileNotFoundError, json.JSONDecodeError):
-        return []
+
+    def flush(self) -> tuple[list[dict], list[str]]:
+        """Get (added or changed index items, removed item ids) since last flush."""
+        items = []
+        removed = []
+        for window_id in self.dirty:
+            window = self.windows.get(window_id)
+            if window is None:
+                if self.indexed.pop(window_id, None) is not None:
+                    removed.append(f"window:{window_id}")
+                continue
+            item = window_to_index_item(window)
+            if self.indexed.get(window_id) != item:
+                self.indexed[window_id] = item
+                items.append(item)
+        self.dirty.clear()
+        return items, removed
 
 
 def window_to_index_item(window: dict) -> dict:
@@ -582,47 +664,30 @@ def action_to_result(action: dict) -> dict:
 
 def focus_window(window_id: int) -> tuple[bool, str]:
     try:
-        subprocess.run(
-            ["niri", "msg", "action", "focus-window", "--id", str(window_id)],
-            check=True,
-            capture_output=True,
-        )
+        niri_ipc.action("focus-window", id=window_id)
         return True, "Window focused"
-    except subprocess.CalledProcessError:
+    except NiriError:
         return False, f"Failed to focus window {window_id}"
 
 
 def close_window(window_id: int) -> tuple[bool, str]:
     try:
-        subprocess.run(
-            ["niri", "msg", "action", "focus-window", "--id", str(window_id)],
-            check=True,
-            capture_output=True,
-        )
-        subprocess.run(
-            ["niri", "msg", "action", "close-window"],
-            check=True,
-            capture_output=True,
-        )
+        niri_ipc.action("close-window", id=window_id)
         return True, "Window closed"
-    except subprocess.CalledProcessError:
+    except NiriError:
         return False, f"Failed to close window {window_id}"
 
 
 def move_window_to_workspace(window_id: int, workspace_idx: int) -> tuple[bool, str]:
     try:
-        subprocess.run(
-            ["niri", "msg", "action", "focus-window", "--id", str(window_id)],
-            check=True,
-            capture_output=True,
-        )
-        subprocess.run(
-            ["niri", "msg", "action", "move-window-to-workspace", str(workspace_idx)],
-            check=True,
-            capture_output=True,
+        niri_ipc.action(
+            "move-window-to-workspace",
+            window_id=window_id,
+            reference={"Index": workspace_idx},
+            focus=True,
         )
         return True, f"Moved to workspace {workspace_idx}"
-    except subprocess.CalledProcessError:
+    except NiriError:
         return False, f"Failed to move window to workspace {workspace_idx}"
 
 
@@ -630,13 +695,9 @@ def execute_action(action: dict) -> tuple[bool, str]:
     action_name = action.get("action", "")
 
     try:
-        subprocess.run(
-            ["niri", "msg", "action", action_name],
-            check=True,
-            capture_output=True,
-        )
+        niri_ipc.action(action_name, **ACTION_FIELDS.get(action_name, {}))
         return True, f"{action.get('name', action_name)} executed"
-    except subprocess.CalledProcessError as e:
+    except NiriError as e:
         return False, f"Failed to execute {action_name}: {e}"
 
 
@@ -711,10 +772,9 @@ def generate_workspace_index_items() -> list[dict]:
     return items
 
 
-def get_index_items() -> list[dict]:
-    """Get full index of windows and actions on startup."""
+def get_index_items(windows: list[dict]) -> list[dict]:
+    """Get full index of windows and actions."""
     items = []
-    windows = get_windows()
     for w in windows:
         items.append(window_to_index_item(w))
     for a in NIRI_ACTIONS:
@@ -723,61 +783,26 @@ def get_index_items() -> list[dict]:
     return items
 
 
-def start_niri_event_stream() -> subprocess.Popen | None:
-    """Start niri event-stream subprocess. Returns Popen or None."""
+def connect_event_stream() -> niri_ipc.EventStream | None:
+    """Open niri's event stream. Returns None if niri isn't reachable."""
     try:
-        proc = subprocess.Popen(
-            ["niri", "msg", "-j", "event-stream"],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.DEVNULL,
-            text=True,
-            bufsize=1,
-        )
-        return proc
-    except (OSError, FileNotFoundError):
+        return niri_ipc.EventStream()
+    except NiriError:
         return None
 
 
-def read_niri_event(proc: subprocess.Popen) -> str | None:
-    """Read a single event from niri event stream. Returns event type or None."""
-    import fcntl
-
-    try:
-        if proc.stdout is None:
-            return None
-
-        fd = proc.stdout.fileno()
-        fl = fcntl.fcntl(fd, fcntl.F_GETFL)
-        fcntl.fcntl(fd, fcntl.F_SETFL, fl | os.O_NONBLOCK)
-
-        try:
-            line = proc.stdout.readline()
-            if not line:
-                return None
-            data = json.loads(line)
-            keys = list(data.keys())
-            return keys[0] if keys else None
-        finally:
-            fcntl.fcntl(fd, fcntl.F_SETFL, fl)
-    except (json.JSONDecodeError, OSError, IOError, BlockingIOError):
-        return None
-
-
-WATCH_EVENTS = {"WindowOpenedOrChanged", "WindowClosed"}
-
-
-def handle_request(input_data: dict):
+def handle_request(input_data: dict, state: NiriState):
     """Handle a single request (initial, search, action, index)."""
     step = input_data.get("step", "initial")
     query = input_data.get("query", "").strip()
     selected = input_data.get("selected", {})
     action = input_data.get("action", "")
 
-    windows = get_windows()
-    workspaces = get_workspaces()
+    windows = state.sorted_windows()
+    workspaces = state.sorted_workspaces()
 
     if step == "index":
-        items = get_index_items()
+        items = get_index_items(windows)
         print(json.dumps({"type": "index", "mode": "full", "items": items}), flush=True)
         return
 
@@ -851,10 +876,9 @@ def handle_request(input_data: dict):
 
             if action_id_full.startswith("goto-workspace:"):
                 ws_idx = action_id_full.split(":")[1]
-                cmd = ["niri", "msg", "action", "focus-workspace", ws_idx]
                 name = f"Go to Workspace {ws_idx}"
                 try:
-                    subprocess.run(cmd, check=True, capture_output=True)
+                    niri_ipc.action("focus-workspace", reference={"Index": int(ws_idx)})
                     print(
                         json.dumps(
                             {
@@ -865,7 +889,7 @@ def handle_request(input_data: dict):
                         ),
                         flush=True,
                     )
-                except subprocess.CalledProcessError as e:
+                except NiriError as e:
                     print(
                         json.dumps({"type": "error", "message": f"Failed: {e}"}),
                         flush=True,
@@ -874,10 +898,14 @@ def handle_request(input_data: dict):
 
             if action_id_full.startswith("move-to-workspace:"):
                 ws_idx = action_id_full.split(":")[1]
-                cmd = ["niri", "msg", "action", "move-window-to-workspace", ws_idx]
                 name = f"Move to Workspace {ws_idx}"
                 try:
-                    subprocess.run(cmd, check=True, capture_output=True)
+                    niri_ipc.action(
+                        "move-window-to-workspace",
+                        window_id=None,
+                        reference={"Index": int(ws_idx)},
+                        focus=True,
+                    )
                     print(
                         json.dumps(
                             {
@@ -888,7 +916,7 @@ def handle_request(input_data: dict):
                         ),
                         flush=True,
                     )
-                except subprocess.CalledProcessError as e:
+                except NiriError as e:
                     print(
                         json.dumps({"type": "error", "message": f"Failed: {e}"}),
                         flush=True,
@@ -931,8 +959,10 @@ def handle_request(input_data: dict):
 
             if action == "close":
                 success, message = close_window(window_id)
-                windows = get_windows()
-                workspaces = get_workspaces()
+                # Query now rather than wait for the event stream to catch up
+                state.load()
+                windows = state.sorted_windows()
+                workspaces = state.sorted_workspaces()
                 results = [window_to_result(w, workspaces) for w in windows]
                 if not results:
                     results = [
@@ -953,8 +983,10 @@ def handle_request(input_data: dict):
             if action.startswith("move:"):
                 workspace_idx = int(action.replace("move:", ""))
                 success, message = move_window_to_workspace(window_id, workspace_idx)
-                windows = get_windows()
-                workspaces = get_workspaces()
+                # Query now rather than wait for the event stream to catch up
+                state.load()
+                windows = state.sorted_windows()
+                workspaces = state.sorted_workspaces()
                 results = [window_to_result(w, workspaces) for w in windows]
                 if not results:
                     results = [
@@ -986,82 +1018,76 @@ def handle_request(input_data: dict):
 
 
 def main():
-    event_proc = None
-    running = True
+    stream = None
 
     def shutdown(signum, frame):
-        nonlocal running, event_proc
-        running = False
-        if event_proc is not None:
-            event_proc.terminate()
+        if stream is not None:
+            stream.close()
         sys.exit(0)
 
     signal.signal(signal.SIGTERM, shutdown)
     signal.signal(signal.SIGINT, shutdown)
 
-    items = get_index_items()
+    # Connect before the initial query so no change is missed in between;
+    # the stream starts with the full state, which flush() finds unchanged
+    stream = connect_event_stream()
+    state = NiriState()
+    state.load()
+    state.flush()
+    items = get_index_items(state.sorted_windows())
     print(json.dumps({"type": "index", "mode": "full", "items": items}), flush=True)
 
-    event_proc = start_niri_event_stream()
-    last_index_time = 0.0
-    pending_index = False
+    flush_at = None
 
-    if event_proc is not None:
-        while running:
-            now = time.time()
-            if pending_index and now - last_index_time >= INDEX_DEBOUNCE_INTERVAL:
-                items = get_index_items()
-                print(
-                    json.dumps({"type": "index", "mode": "full", "items": items}),
-                    flush=True,
-                )
-                last_index_time = now
-                pending_index = False
+    while True:
+        watched = [sys.stdin] if stream is None else [sys.stdin, stream]
+        timeout = None
+        if flush_at is not None:
+            timeout = max(0.0, flush_at - time.monotonic())
+        try:
+            readable, _, _ = select.select(watched, [], [], timeout)
+        except (ValueError, OSError):
+            break
+
+        if stream is not None and stream in readable:
+            events = stream.read()
+            if events is None:
+                # niri restarted or went away: reconnect, or fall back to
+                # querying on each request
+                stream = connect_event_stream()
+            else:
+                for event in events:
+                    state.apply(event)
 
+        if sys.stdin in readable:
             try:
-                readable, _, _ = select.select(
-                    [sys.stdin, event_proc.stdout], [], [], 0.2
+                line = sys.stdin.readline()
+                if not line:
+                    return
+                input_data = json.loads(line)
+                if stream is None:
+                    state.load()
+                handle_request(input_data, state)
+            except json.JSONDecodeError:
+                pass
+
+        if state.dirty and flush_at is None:
+            flush_at = time.monotonic() + INDEX_DEBOUNCE_INTERVAL
+        if flush_at is not None and time.monotonic() >= flush_at:
+            flush_at = None
+            items, removed = state.flush()
+            if items or removed:
+                print(
+                    json.dumps(
+                        {
+                            "type": "index",
+                            "mode": "incremental",
+                            "items": items,
+                            "remove": removed,
+                        }
+                    ),
+                    flush=True,
                 )
-            except (ValueError, OSError):
-                break
-
-            for r in readable:
-                if r == sys.stdin:
-                    try:
-                        line = sys.stdin.readline()
-                        if not line:
-                            event_proc.terminate()
-                            return
-                        input_data = json.loads(line)
-                        handle_request(input_data)
-                    except json.JSONDecodeError:
-                        continue
-
-                elif r == event_proc.stdout:
-                    event = read_niri_event(event_proc)
-                    if event in WATCH_EVENTS:
-                        pending_index = True
-
-            if event_proc.poll() is not None:
-                event_proc = start_niri_event_stream()
-                if event_proc is None:
-                    break
-    else:
-        while True:
-            try:
-                readable, _, _ = select.select([sys.stdin], [], [], 2.0)
-            except (ValueError, OSError):
-                break
-
-            if readable:
-                try:
-                    line = sys.stdin.readline()
-                    if not line:
-                        return
-                    input_data = json.loads(line)
-                    handle_request(input_data)
-                except json.JSONDecodeError:
-                    continue
 
 
 if __name__ == "__main__":
@@ -2,10 +2,19 @@
 """
 Pictures workflow handler - searches for images in XDG Pictures directory
 Demonstrates multi-turn workflow: browse -> select -> actions
+
+Images are listed from a catalog (~/.cache/hamr/pictures-catalog.json) that
+records size, mtime and header-parsed dimensions per file, and is refreshed
+incrementally: only directories whose mtime changed or that hold a rewritten
+file are re-read. Runs as a daemon while open so the catalog is refreshed
+once per session and searched in memory on each keystroke.
 """
 
 import json
 import os
+import signal
+import stat
+import struct
 import subprocess
 import sys
 from datetime import datetime
@@ -14,15 +23,91 @@ from pathlib import Path
 PICTURES_DIR = Path(os.environ.get("XDG_PICTURES_DIR", Path.home() / "Pictures"))
 IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".gif", ".webp", ".bmp", ".svg"}
 
+CATALOG_FILE = (
+    Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache"))
+    / "hamr"
+    / "pictures-catalog.json"
+)
+CATALOG_VERSION = 1
 
-def get_image_dimensions(path: str) -> tuple[int, int] | None:
-    """Get image dimensions using PIL if available, else return None"""
+HAMR_CONFIG_PATH = (
+    Path(os.environ.get("XDG_CONFIG_HOME", Path.home() / ".config"))
+    / "hamr"
+    / "config.json"
+)
+
+# Bytes read from the start of a file to find its dimensions (JPEG SOF markers
+# usually sit after EXIF data, well within this)
+HEADER_BYTES = 65536
+
+# Catalog entry fields: [inode, mtime_ns, size, width, height]
+INO, MTIME, SIZE, WIDTH, HEIGHT = range(5)
+
+
+def is_recursive() -> bool:
+    """Whether subfolders of Pictures are included (plugins.pictures.recursive)."""
     try:
-        from PIL import Image
+        config = json.loads(HAMR_CONFIG_PATH.read_text())
+        return bool(
+            config.get("plugins", {}).get("pictures", {}).get("recursive", True)
+        )
+    except (json.JSONDecodeError, OSError, AttributeError):
+        return True
+
+
+def parse_dimensions(header: bytes) -> tuple[int, int] | None:
+    """Get (width, height) from PNG, GIF, WebP, JPEG or BMP header bytes."""
+    if header.startswith(b"\x89PNG\r\n\x1a\n") and len(header) >= 24:
+        return struct.unpack(">II", header[16:24])
+
+    if header[:6] in (b"GIF87a", b"GIF89a") and len(header) >= 10:
+        return struct.unpack("<HH", header[6:10])
+
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP" and len(header) >= 30:
+        chunk = header[12:16]
+        if chunk == b"VP8 ":
+            w, h = struct.unpack("<HH", header[26:30])
+            return w & 0x3FFF, h & 0x3FFF
+        if chunk == b"VP8L":
+            bits = int.from_bytes(header[21:25], "little")
+            return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+        if chunk == b"VP8X":
+            w = int.from_bytes(header[24:27], "little") + 1
+            h = int.from_bytes(header[27:30], "little") + 1
+            return w, h
+        return None
 
-        with Image.open(path) as img:
-            return img.size
-    except Exception:
+    if header[:2] == b"\xff\xd8":
+        # Walk JPEG segments to the first start-of-frame marker
+        pos = 2
+        while pos + 9 <= len(header):
+            if header[pos] != 0xFF:
+                pos += 1
+                continue
+            marker = header[pos + 1]
+            if marker == 0xFF or marker == 0x01 or 0xD0 <= marker <= 0xD9:
+                pos += 2 if marker != 0xFF else 1
+                continue
+            length = struct.unpack(">H", header[pos + 2 : pos + 4])[0]
+            if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+                h, w = struct.unpack(">HH", header[pos + 5 : pos + 9])
+                return w, h
+            pos += 2 + length
+        return None
+
+    if header[:2] == b"BM" and len(header) >= 26:
+        w, h = struct.unpack("<ii", header[18:26])
+        return w, abs(h)
+
+    return None
+
+
+def get_image_dimensions(path: str) -> tuple[int, int] | None:
+    """Get image dimensions from the file header, without decoding the image"""
+    try:
+        with open(path, "rb") as f:
+            return parse_dimensions(f.read(HEADER_BYTES))
+    except (OSError, struct.error):
         return None
 
 
@@ -32,25 +117,150 @@ def format_date(timestamp: float) -> str:
     return dt.strftime("%Y-%m-%d %H:%M")
 
 
-def find_images(query: str = "") -> list[dict]:
-    """Find images in Pictures folder, optionally filtered by query"""
-    images = []
+def load_catalog() -> dict:
+    """Load the saved catalog: {"dirs": {dir: {"mtime": ns, "files": {...}}}}."""
+    try:
+        catalog = json.loads(CATALOG_FILE.read_text())
+        if catalog.get("version") == CATALOG_VERSION:
+            return catalog
+    except (OSError, json.JSONDecodeError, AttributeError):
+        pass
+    return {"version": CATALOG_VERSION, "dirs": {}}
 
-    if not PICTURES_DIR.exists():
-        return images
-
-    for file in PICTURES_DIR.iterdir():
-        if file.is_file() and file.suffix.lower() in IMAGE_EXTENSIONS:
-            if not query or query.lower() in file.name.lower():
-                images.append(
-                    {
-                        "id": str(file),
-                        "name": file.name,
-                        "path": str(file),
-                        "size": file.stat().st_size,
-                        "mtime": file.stat().st_mtime,
-                    }
-                )
+
+def save_catalog(catalog: dict) -> None:
+    """Write the catalog atomically."""
+    try:
+        CATALOG_FILE.parent.mkdir(parents=True, exist_ok=True)
+        tmp = CATALOG_FILE.with_suffix(".tmp")
+        tmp.write_text(json.dumps(catalog, separators=(",", ":")))
+        os.replace(tmp, CATALOG_FILE)
+    except OSError:
+        pass
+
+
+def scan_catalog_dir(path: str, mtime_ns: int, old: dict | None) -> dict:
+    """Re-read one directory into a catalog record.
+
+    Files whose inode and mtime are unchanged keep their recorded dimensions;
+    only new or modified images have their headers read.
+    """
+    old_files = old["files"] if old else {}
+    files = {}
+    subdirs = []
+    with os.scandir(path) as it:
+        for entry in it:
+            if entry.name.startswith("."):
+                continue
+            try:
+                if entry.is_dir():
+                    subdirs.append(entry.path)
+                    continue
+                if os.path.splitext(entry.name)[1].lower() not in IMAGE_EXTENSIONS:
+                    continue
+                st = entry.stat()
+            except OSError:
+                continue
+            if not stat.S_ISREG(st.st_mode):
+                continue
+            prev = old_files.get(entry.name)
+            if prev and prev[INO] == st.st_ino and prev[MTIME] == st.st_mtime_ns:
+                files[entry.name] = prev
+                continue
+            dims = get_image_dimensions(entry.path) or (0, 0)
+            files[entry.name] = [st.st_ino, st.st_mtime_ns, st.st_size, *dims]
+    return {"mtime": mtime_ns, "subdirs": subdirs, "files": files}
+
+
+def files_changed(path: str, files: dict) -> bool:
+    """Whether any cataloged file in a directory was rewritten in place.
+
+    Rewriting a file doesn't touch its directory's mtime, so each file's
+    inode and mtime are checked against the catalog.
+    """
+    for name, info in files.items():
+        try:
+            st = os.stat(f"{path}/{name}")
+        except OSError:
+            return True
+        if st.st_ino != info[INO] or st.st_mtime_ns != info[MTIME]:
+            return True
+    return False
+
+
+def refresh_catalog(catalog: dict, recursive: bool) -> bool:
+    """Bring the catalog up to date. Returns True if anything changed.
+
+    A directory is only re-read when its mtime changed (a file was added,
+    removed or renamed in it) or one of its files was rewritten; unchanged
+    directories cost one stat per entry.
+    """
+    old_dirs = catalog["dirs"]
+    new_dirs = {}
+    changed = False
+    queue = [str(PICTURES_DIR)]
+    seen = set()
+    while queue:
+        path = queue.pop()
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        key = (st.st_dev, st.st_ino)
+        if key in seen:
+            continue  # Symlink loop
+        seen.add(key)
+
+        old = old_dirs.get(path)
+        if (
+            old
+            and old["mtime"] == st.st_mtime_ns
+            and not files_changed(path, old["files"])
+        ):
+            record = old
+        else:
+            try:
+                record = scan_catalog_dir(path, st.st_mtime_ns, old)
+            except OSError:
+                continue
+            changed = True
+        new_dirs[path] = record
+        if recursive:
+            queue.extend(record["subdirs"])
+
+    if changed or new_dirs.keys() != old_dirs.keys():
+        catalog["dirs"] = new_dirs
+        return True
+    return False
+
+
+def get_catalog() -> dict:
+    """Load and refresh the picture catalog, saving it if it changed."""
+    catalog = load_catalog()
+    if refresh_catalog(catalog, is_recursive()):
+        save_catalog(catalog)
+    return catalog
+
+
+def find_images(catalog: dict, query: str = "") -> list[dict]:
+    """Find images in the Pictures catalog, optionally filtered by query"""
+    query = query.lower()
+    images = []
+    for folder, record in catalog["dirs"].items():
+        for name, info in record["files"].items():
+            if query and query not in name.lower():
+                continue
+            path = f"{folder}/{name}"
+            images.append(
+                {
+                    "id": path,
+                    "name": name,
+                    "path": path,
+                    "size": info[SIZE],
+                    "mtime": info[MTIME] / 1e9,
+                    "dims": (info[WIDTH], info[HEIGHT]) if info[WIDTH] else None,
+                }
+            )
 
     # Sort by modification time (newest first)
     images.sort(key=lambda x: x["mtime"], reverse=True)
@@ -75,8 +285,8 @@ def get_image_list_results(images: list[dict]) -> list[dict]:
             {"label": "Size", "value": format_size(img["size"])},
         ]
 
-        # Try to get image dimensions
-        dims = get_image_dimensions(img["path"])
+        # Dimensions come from the catalog (parsed from the file header)
+        dims = img["dims"]
         if dims:
             metadata.append({"label": "Dimensions", "value": f"{dims[0]} x {dims[1]}"})
 
@@ -148,27 +358,26 @@ def get_image_detail_results(image_path: str) -> list[dict]:
     ]
 
 
-def main():
-    input_data = json.load(sys.stdin)
+def emit(data: dict) -> None:
+    print(json.dumps(data), flush=True)
+
+
+def handle_request(input_data: dict, catalog: dict) -> None:
     step = input_data.get("step", "initial")
     query = input_data.get("query", "").strip()
     selected = input_data.get("selected", {})
     action = input_data.get("action", "")
 
     if step == "initial":
-        images = find_images()
+        images = find_images(catalog)
         results = get_image_list_results(images)
-        print(
-            json.dumps({"type": "results", "results": results, "inputMode": "realtime"})
-        )
+        emit({"type": "results", "results": results, "inputMode": "realtime"})
         return
 
     if step == "search":
-        images = find_images(query)
+        images = find_images(catalog, query)
         results = get_image_list_results(images)
-        print(
-            json.dumps({"type": "results", "results": results, "inputMode": "realtime"})
-        )
+        emit({"type": "results", "results": results, "inputMode": "realtime"})
         return
 
     # Action: handle item click or action button
@@ -177,84 +386,72 @@ def main():
 
         # Back button - return to list
         if item_id == "__back__":
-            images = find_images()
+            images = find_images(catalog)
             results = get_image_list_results(images)
-            print(
-                json.dumps(
-                    {
-                        "type": "results",
-                        "results": results,
-                        "navigateBack": True,  # Going back to list
-                    }
-                )
+            emit(
+                {
+                    "type": "results",
+                    "results": results,
+                    "navigateBack": True,  # Going back to list
+                }
             )
             return
 
         # Action button clicks (open, copy-path from list view)
         if action == "open":
-            print(
-                json.dumps(
-                    {
-                        "type": "execute",
-                        "open": item_id,
-                        "close": True,
-                    }
-                )
+            emit(
+                {
+                    "type": "execute",
+                    "open": item_id,
+                    "close": True,
+                }
             )
             return
 
         if action == "copy-path":
-            print(
-                json.dumps(
-                    {
-                        "type": "execute",
-                        "copy": item_id,
-                        "notify": f"Copied: {item_id}",
-                        "close": True,
-                    }
-                )
+            emit(
+                {
+                    "type": "execute",
+                    "copy": item_id,
+                    "notify": f"Copied: {item_id}",
+                    "close": True,
+                }
             )
             return
 
         # Detail view actions (from clicking items in detail view)
         if item_id.startswith("open:"):
             path = item_id.split(":", 1)[1]
-            print(
-                json.dumps(
-                    {
-                        "type": "execute",
-                        "open": path,
-                        "close": True,
-                    }
-                )
+            emit(
+                {
+                    "type": "execute",
+                    "open": path,
+                    "close": True,
+                }
             )
             return
 
         if item_id.startswith("copy-path:"):
             path = item_id.split(":", 1)[1]
-            print(
-                json.dumps(
-                    {
-                        "type": "execute",
-                        "copy": path,
-                        "notify": f"Copied: {path}",
-                        "close": True,
-                    }
-                )
+            emit(
+                {
+                    "type": "execute",
+                    "copy": path,
+                    "notify": f"Copied: {path}",
+                    "close": True,
+                }
             )
             return
 
         if item_id.startswith("copy-image:"):
             path = item_id.split(":", 1)[1]
             subprocess.Popen(["wl-copy", "-t", "image/png", path])
-            print(
-                json.dumps(
-                    {
-                        "type": "execute",
-                        "notify": "Image copied to clipboard",
-                        "close": True,
-                    }
-                )
+            emit(
+                {
+                    "type": "execute",
+                    "notify": "Image copied to clipboard",
+                    "close": True,
+                }
             )
             return
 
@@ -262,34 +459,49 @@ def main():
             path = item_id.split(":", 1)[1]
             filename = Path(path).name
             subprocess.Popen(["gio", "trash", path])
-            print(
-                json.dumps(
-                    {
-                        "type": "execute",
-                        "notify": f"Moved to trash: {filename}",
-                        "close": True,
-                    }
-                )
+            emit(
+                {
+                    "type": "execute",
+                    "notify": f"Moved to trash: {filename}",
+                    "close": True,
+                }
             )
             return
 
         # Default click on image - show detail view (multi-turn!)
         if Path(item_id).exists():
             results = get_image_detail_results(item_id)
-            print(
-                json.dumps(
-                    {
-                        "type": "results",
-                        "results": results,
-                        "inputMode": "realtime",
-                        "navigateForward": True,  # Drilling into image detail
-                    }
-                )
+            emit(
+                {
+                    "type": "results",
+                    "results": results,
+                    "inputMode": "realtime",
+                    "navigateForward": True,  # Drilling into image detail
+                }
             )
             return
 
         # Unknown action
-        print(json.dumps({"type": "error", "message": f"Unknown action: {item_id}"}))
+        emit({"type": "error", "message": f"Unknown action: {item_id}"})
+
+
+def main():
+    def shutdown_handler(signum, frame):
+        sys.exit(0)
+
+    signal.signal(signal.SIGTERM, shutdown_handler)
+    signal.signal(signal.SIGINT, shutdown_handler)
+
+    # Refreshed once per session (initial step) and then searched in memory
+    catalog = None
+    for line in sys.stdin:
+        try:
+            input_data = json.loads(line.strip())
+        except json.JSONDecodeError:
+            continue
+        if catalog is None or input_data.get("step", "initial") == "initial":
+            catalog = get_catalog()
+        handle_request(input_data, catalog)
 
 
 if __name__ == "__main__":
@@ -1,12 +1,65 @@
 #!/usr/bin/env python3
+"""
+Player plugin handler - media player controls via playerctl.
+
+Player state is kept in memory from a single `playerctl --all-players --follow`
+stream; nothing is polled. Changes are pushed to the open view as update
+patches (or fresh results when players come or go), and playback position is
+interpolated locally from the last known position and status. Positions are
+re-read once, in one playerctl call, each time the plugin is opened.
+
+Remote album art (http/https mpris:artUrl, e.g. browsers and Spotify) is
+downloaded and downscaled in the background into a local cache, and shown as
+soon as it is ready.
+"""
+
+import hashlib
 import json
-import signal
+import os
+import queue
 import select
+import signal
 import subprocess
 import sys
+import threading
 import time
-
-shutdown = False
+import urllib.error
+import urllib.parse
+import urllib.request
+from pathlib import Path
+
+# Fields sent by the follow stream, one tab-separated line per player change
+FOLLOW_FIELDS = ["name", "status", "title", "artist", "album", "artUrl", "length"]
+FOLLOW_FORMAT = "\t".join(
+    [
+        "{{playerInstance}}",
+        "{{status}}",
+        "{{title}}",
+        "{{artist}}",
+        "{{album}}",
+        "{{mpris:artUrl}}",
+        "{{mpris:length}}",
+    ]
+)
+# One-shot snapshot also includes the position (microseconds)
+SYNC_FORMAT = FOLLOW_FORMAT + "\t{{position}}"
+
+# How often progress is advanced while a player is playing
+PROGRESS_INTERVAL_SECONDS = 1.0
+# How often players are polled while `playerctl --follow` isn't running
+POLL_INTERVAL_SECONDS = 2.0
+
+# Album art cache: content-addressed thumbnails, least recently used evicted
+ART_CACHE_DIR = (
+    Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache"))
+    / "hamr"
+    / "player-art"
+)
+ART_INDEX = ART_CACHE_DIR / "index.json"
+ART_CACHE_MAX_BYTES = 20 * 1024 * 1024
+ART_THUMB_SIZE = 256
+ART_DOWNLOAD_MAX_BYTES = 10 * 1024 * 1024
+ART_DOWNLOAD_TIMEOUT = 10
 
 
 def emit(data: dict):
@@ -14,8 +67,7 @@ def emit(data: dict):
 
 
 def handle_shutdown(signum, frame):
-    global shutdown
-    shutdown = True
+    sys.exit(0)
 
 
 def run_playerctl(args: list[str]) -> tuple[str, int]:
@@ -31,45 +83,148 @@ def run_playerctl(args: list[str]) -> tuple[str, int]:
         return "", 1
 
 
-def get_players() -> list[dict]:
-    output, code = run_playerctl(["-l"])
-    if code != 0 or not output:
-        return []
-
-    players = []
-    for player_name in output.split("\n"):
-        if not player_name:
-            continue
-
-        status, _ = run_playerctl(["-p", player_name, "status"])
-        metadata, _ = run_playerctl(
-            [
-                "-p",
-                player_name,
-                "metadata",
-                "--format",
-                "{{title}}\t{{artist}}\t{{album}}\t{{mpris:artUrl}}",
-            ]
-        )
+def parse_player_line(line: str) -> dict | None:
+    """Parse a FOLLOW_FORMAT/SYNC_FORMAT line into player fields."""
+    parts = line.split("\t")
+    if len(parts) < len(FOLLOW_FIELDS) or not parts[0]:
+        return None
+    fields = dict(zip(FOLLOW_FIELDS, parts))
+    fields["status"] = fields["status"] or "Unknown"
+    try:
+        fields["length"] = int(fields["length"]) // 1000000
+    except ValueError:
+        fields["length"] = 0
+    if len(parts) > len(FOLLOW_FIELDS):
+        try:
+            fields["position"] = int(parts[len(FOLLOW_FIELDS)]) / 1000000
+        except ValueError:
+            pass
+    return fields
+
+
+class PlayerState:
+    """Known players, updated from the follow stream.
+
+    Position is stored as (position, when) and advanced locally while playing.
+    """
+
+    def __init__(self):
+        self.players: dict[str, dict] = {}
+
+    def sync(self) -> None:
+        """Snapshot every player (with positions) in one playerctl call each
+        for the list and the metadata."""
+        names_output, _ = run_playerctl(["-l"])
+        names = [n for n in names_output.split("\n") if n]
+        output, _ = run_playerctl(["-a", "metadata", "--format", SYNC_FORMAT])
+        snapshot = {}
+        for line in output.split("\n"):
+            fields = parse_player_line(line)
+            if fields:
+                snapshot[fields["name"]] = fields
+        now = time.monotonic()
+        players = {}
+        for name in names:
+            player = self.players.get(name) or {
+                "name": name,
+                "status": "Unknown",
+                "title": "",
+                "artist": "",
+                "album": "",
+                "artUrl": "",
+                "length": 0,
+                "position": 0.0,
+                "position_at": now,
+            }
+            if name in snapshot:
+                player.update(snapshot[name])
+                player["position_at"] = now
+            players[name] = player
+        self.players = players
+
+    def apply(self, line: str) -> bool:
+        """Apply one follow line. Returns False if the player set may have
+        changed (a player exited), which needs a sync()."""
+        fields = parse_player_line(line)
+        if fields is None:
+            # playerctl prints an empty line when a player goes away
+            return False
+        now = time.monotonic()
+        player = self.players.get(fields["name"])
+        if player is None:
+            self.players[fields["name"]] = {
+                **fields,
+                "position": 0.0,
+                "position_at": now,
+            }
+            return True
+        track = (fields["title"], fields["artUrl"], fields["length"])
+        if track != (player["title"], player["artUrl"], player["length"]):
+            player["position"] = 0.0
+        else:
+            player["position"] = self.position(player)
+        player["position_at"] = now
+        player.update(fields)
+        return True
+
+    @staticmethod
+    def position(player: dict) -> float:
+        """Current position, advanced since the last update while playing."""
+        position = player["position"]
+        if player["status"].lower() == "playing":
+            position += time.monotonic() - player["position_at"]
+        if player["length"] > 0:
+            position = min(position, player["length"])
+        return position
+
+    def any_playing(self) -> bool:
+        return any(p["status"].lower() == "playing" for p in self.players.values())
+
+
+class PlayerFollower:
+    """Long-lived `playerctl --all-players --follow metadata` process."""
+
+    def __init__(self, proc: subprocess.Popen):
+        self.proc = proc
+        self.buffer = b""
+
+    @classmethod
+    def start(cls) -> "PlayerFollower | None":
+        try:
+            proc = subprocess.Popen(
+                [
+                    "playerctl",
+                    "--all-players",
+                    "--follow",
+                    "metadata",
+                    "--format",
+                    FOLLOW_FORMAT,
+                ],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                stdin=subprocess.DEVNULL,
+            )
+        except OSError:
+            return None
+        return cls(proc)
 
-        parts = metadata.split("\t") if metadata else ["", "", "", ""]
-        title = parts[0] if len(parts) > 0 else ""
-        artist = parts[1] if len(parts) > 1 else ""
-        album = parts[2] if len(parts) > 2 else ""
-        art_url = parts[3] if len(parts) > 3 else ""
+    def fileno(self) -> int:
+        return self.proc.stdout.fileno()
 
-        players.append(
-            {
-                "name": player_name,
-                "status": status or "Unknown",
-                "title": title,
-                "artist": artist,
-                "album": album,
-                "artUrl": art_url,
-            }
-        )
+    def read(self) -> list[str] | None:
+        """Read complete lines. Returns None once playerctl has exited."""
+        data = os.read(self.fileno(), 65536)
+        if not data:
+            self.stop()
+            return None
+        *lines, self.buffer = (self.buffer + data).split(b"\n")
+        return [line.decode(errors="replace") for line in lines]
 
-    return players
+    def stop(self) -> None:
+        if self.proc.poll() is None:
+            self.proc.terminate()
+        self.proc.wait()
+        self.proc.stdout.close()
 
 
 def format_time(seconds: int) -> str:
@@ -80,19 +235,6 @@ def format_time(seconds: int) -> str:
     return f"{mins}:{secs:02d}"
 
 
-def get_player_position(player_name: str) -> tuple[int, int]:
-    position_str, _ = run_playerctl(["-p", player_name, "position"])
-    duration_str, _ = run_playerctl(
-        ["-p", player_name, "metadata", "--format", "{{mpris:length}}"]
-    )
-    try:
-        position = int(float(position_str)) if position_str else 0
-        duration = int(duration_str) // 1000000 if duration_str else 0
-        return position, duration
-    except ValueError:
-        return 0, 0
-
-
 def get_status_icon(status: str) -> str:
     status_lower = status.lower()
     if status_lower == "playing":
@@ -115,12 +257,162 @@ def get_status_badge(status: str) -> dict:
     return {"icon": "music_note", "color": "#2196f3"}
 
 
+class ArtCache:
+    """Local, downscaled copies of remote album art.
+
+    Files are named by a hash of the downloaded image, so art shared by several
+    URLs is stored once. The index maps URL -> [hash, size, last used]; past
+    ART_CACHE_MAX_BYTES the least recently used URLs are dropped, along with
+    files no URL points at anymore. Downloads run on a worker thread, which
+    wakes the main loop through a pipe (see fileno) when art is ready.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.urls: dict[str, list] = {}
+        self.queued: set[str] = set()
+        self.failed: set[str] = set()  # Not retried until the next open
+        self.jobs: queue.Queue[str] = queue.Queue()
+        self.wake_r, self.wake_w = os.pipe()
+        os.set_blocking(self.wake_r, False)
+        self.load()
+        threading.Thread(target=self.worker, daemon=True).start()
+
+    def fileno(self) -> int:
+        return self.wake_r
+
+    def drain(self) -> None:
+        try:
+            os.read(self.wake_r, 4096)
+        except BlockingIOError:
+            pass
+
+    def load(self) -> None:
+        try:
+            data = json.loads(ART_INDEX.read_text())
+        except (OSError, json.JSONDecodeError):
+            return
+        if data.get("version") == 1:
+            self.urls = data.get("urls", {})
+
+    def save(self) -> None:
+        with self.lock:
+            data = json.dumps({"version": 1, "urls": self.urls})
+        try:
+            ART_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            tmp = ART_INDEX.with_suffix(".tmp")
+            tmp.write_text(data)
+            os.replace(tmp, ART_INDEX)
+        except OSError:
+            pass
+
+    def lookup(self, url: str) -> str | None:
+        """Get the cached art path for a URL, queueing a download if missing."""
+        with self.lock:
+            entry = self.urls.get(url)
+            if entry:
+                path = ART_CACHE_DIR / f"{entry[0]}.png"
+                if path.exists():
+                    entry[2] = time.time()
+                    return str(path)
+                del self.urls[url]
+            if url not in self.queued and url not in self.failed:
+                self.queued.add(url)
+                self.jobs.put(url)
+        return None
+
+    def worker(self) -> None:
+        while True:
+            url = self.jobs.get()
+            stored = self.fetch(url)
+            with self.lock:
+                self.queued.discard(url)
+                if stored is None:
+                    self.failed.add(url)
+                    continue
+                self.urls[url] = [*stored, time.time()]
+                self.evict()
+            self.save()
+            os.write(self.wake_w, b".")
+
+    def fetch(self, url: str) -> tuple[str, int] | None:
+        """Download and downscale art. Returns (content hash, stored size)."""
+        try:
+            request = urllib.request.Request(url, headers={"User-Agent": "hamr"})
+            with urllib.request.urlopen(
+                request, timeout=ART_DOWNLOAD_TIMEOUT
+            ) as response:
+                image_data = response.read(ART_DOWNLOAD_MAX_BYTES + 1)
+        except (urllib.error.URLError, OSError, ValueError):
+            return None
+        if not image_data or len(image_data) > ART_DOWNLOAD_MAX_BYTES:
+            return None
+
+        content_hash = hashlib.blake2b(image_data, digest_size=16).hexdigest()
+        path = ART_CACHE_DIR / f"{content_hash}.png"
+        if not path.exists():
+            tmp = path.with_suffix(".tmp")
+            try:
+                ART_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+                try:
+                    resized = subprocess.run(
+                        [
+                            "magick",
+                            "-",
+                            "-thumbnail",
+                            f"{ART_THUMB_SIZE}x{ART_THUMB_SIZE}>",
+                            f"png:{tmp}",
+                        ],
+                        input=image_data,
+                        capture_output=True,
+                        timeout=10,
+                    )
+                    downscaled = resized.returncode == 0 and tmp.exists()
+                except (subprocess.TimeoutExpired, FileNotFoundError):
+                    downscaled = False
+                if not downscaled:
+                    # Store as-is if ImageMagick is missing or failed
+                    tmp.write_bytes(image_data)
+                os.replace(tmp, path)
+            except OSError:
+                return None
+        try:
+            return content_hash, path.stat().st_size
+        except OSError:
+            return None
+
+    def evict(self) -> None:
+        """Drop least recently used URLs until the cache fits (lock held)."""
+        sizes = {entry[0]: entry[1] for entry in self.urls.values()}
+        total = sum(sizes.values())
+        for url, entry in sorted(self.urls.items(), key=lambda item: item[1][2]):
+            if total <= ART_CACHE_MAX_BYTES:
+                break
+            del self.urls[url]
+            if all(other[0] != entry[0] for other in self.urls.values()):
+                total -= sizes[entry[0]]
+                (ART_CACHE_DIR / f"{entry[0]}.png").unlink(missing_ok=True)
+
+
+_art_cache: ArtCache | None = None
+
+
+def get_art_cache() -> ArtCache:
+    global _art_cache
+    if _art_cache is None:
+        _art_cache = ArtCache()
+    return _art_cache
+
+
 def get_art_path(art_url: str) -> str | None:
-    """Convert art URL to local file path if it's a file:// URL"""
+    """Get a local file path for art: file:// URLs directly, http(s) URLs
+    from the art cache once downloaded (None until then)."""
     if not art_url:
         return None
     if art_url.startswith("file://"):
-        return art_url[7:]  # Strip "file://"
+        return urllib.parse.unquote(art_url[7:])  # Strip "file://"
+    if art_url.startswith(("http://", "https://")):
+        return get_art_cache().lookup(art_url)
     return None
 
 
@@ -153,7 +445,8 @@ def player_to_result(player: dict) -> dict:
         "chips": [{"text": player["name"], "icon": "music_note"}],
     }
 
-    position, duration = get_player_position(player["name"])
+    position = int(PlayerState.position(player))
+    duration = player["length"]
     if duration > 0:
         result["progress"] = {
             "value": position,
@@ -231,33 +524,84 @@ def run_player_command(player_name: str, cmd: list[str]):
     run_playerctl(["-p", player_name] + cmd)
 
 
-def return_players_view():
-    players = get_players()
-    if not players:
-        emit(
-            {
-                "type": "results",
-                "results": [
-                    {
-                        "id": "__no_players__",
-                        "name": "No media players detected",
-                        "description": "Start playing media in a supported application",
-                        "icon": "music_off",
-                    }
-                ],
-                "placeholder": "Waiting for players...",
-                "pluginActions": get_initial_plugin_actions(),
-            }
-        )
-    else:
-        emit(
+def players_results(state: PlayerState, query: str = "") -> list[dict]:
+    players = list(state.players.values())
+    if query:
+        players = [
+            p
+            for p in players
+            if query in p["name"].lower()
+            or query in p["title"].lower()
+            or query in p["artist"].lower()
+        ]
+    if players:
+        return [player_to_result(p) for p in players]
+    if query:
+        return [
             {
-                "type": "results",
-                "results": [player_to_result(p) for p in players],
-                "placeholder": "Select a player...",
-                "pluginActions": get_initial_plugin_actions(),
+                "id": "__no_match__",
+                "name": f"No players matching '{query}'",
+                "icon": "search_off",
             }
+        ]
+    return [
+        {
+            "id": "__no_players__",
+            "name": "No media players detected",
+            "description": "Start playing media in a supported application",
+            "icon": "music_off",
+        }
+    ]
+
+
+class PlayersView:
+    """The players list as last sent, so later changes go out as patches.
+
+    query is None while the players list isn't shown (e.g. controls view).
+    """
+
+    def __init__(self):
+        self.query: str | None = None
+        self.results: list[dict] = []
+
+    def show(self, state: PlayerState, query: str = "") -> None:
+        self.query = query
+        self.results = players_results(state, query)
+        response = {
+            "type": "results",
+            "results": self.results,
+            "pluginActions": get_initial_plugin_actions(),
+        }
+        if not query:
+            response["placeholder"] = (
+                "Select a player..." if state.players else "Waiting for players..."
+            )
+        emit(response)
+
+    def hide(self) -> None:
+        self.query = None
+
+    def refresh(self, state: PlayerState) -> None:
+        """Send what changed since the last results: patches if the same rows
+        are still shown with the same fields, else fresh results."""
+        if self.query is None:
+            return
+        results = players_results(state, self.query)
+        same_rows = len(results) == len(self.results) and all(
+            new["id"] == old["id"] and new.keys() == old.keys()
+            for new, old in zip(results, self.results)
         )
+        if not same_rows:
+            self.show(state, self.query)
+            return
+        patches = []
+        for new, old in zip(results, self.results):
+            changed = {k: v for k, v in new.items() if old.get(k) != v}
+            if changed:
+                patches.append({"id": new["id"], **changed})
+        self.results = results
+        if patches:
+            emit({"type": "update", "items": patches})
 
 
 def return_controls_view(player_name: str, navigate_forward: bool = False):
@@ -275,7 +619,7 @@ def return_controls_view(player_name: str, navigate_forward: bool = False):
     emit(response)
 
 
-def handle_step(input_data: dict):
+def handle_step(input_data: dict, state: PlayerState, view: PlayersView):
     step = input_data.get("step", "initial")
     query = input_data.get("query", "").strip().lower()
     selected = input_data.get("selected", {})
@@ -283,11 +627,12 @@ def handle_step(input_data: dict):
     context = input_data.get("context", "")
 
     if step == "initial":
-        return_players_view()
+        view.show(state)
         return
 
     if step == "search":
         if context.startswith("controls:"):
+            view.hide()
             player_name = context.split(":", 1)[1]
             filtered = (
                 [
@@ -317,42 +662,7 @@ def handle_step(input_data: dict):
             )
             return
 
-        players = get_players()
-        filtered = (
-            [
-                p
-                for p in players
-                if query in p["name"].lower()
-                or query in p["title"].lower()
-                or query in p["artist"].lower()
-            ]
-            if query
-            else players
-        )
-
-        if not filtered:
-            emit(
-                {
-                    "type": "results",
-                    "results": [
-                        {
-                            "id": "__no_match__",
-                            "name": f"No players matching '{query}'",
-                            "icon": "search_off",
-                        }
-                    ],
-                    "pluginActions": get_initial_plugin_actions(),
-                }
-            )
-            return
-
-        emit(
-            {
-                "type": "results",
-                "results": [player_to_result(p) for p in filtered],
-                "pluginActions": get_initial_plugin_actions(),
-            }
-        )
+        view.show(state, query)
         return
 
     if step == "action":
@@ -360,7 +670,9 @@ def handle_step(input_data: dict):
 
         if selected_id == "__plugin__":
             if action == "refresh":
-                return_players_view()
+                # Re-read positions too (seeks aren't seen by the stream)
+                state.sync()
+                view.show(state)
                 return
 
             if ":" in action:
@@ -386,13 +698,14 @@ def handle_step(input_data: dict):
             return
 
         if selected_id == "__back__":
-            return_players_view()
+            view.show(state)
             return
 
         if selected_id.startswith("player:"):
             player_name = selected_id.split(":", 1)[1]
 
             if action == "more":
+                view.hide()
                 return_controls_view(player_name, navigate_forward=True)
                 return
 
@@ -413,9 +726,8 @@ def handle_step(input_data: dict):
                 return
 
             if not action:
-                # Get current status to determine command
-                status, _ = run_playerctl(["-p", player_name, "status"])
-                if status.lower() == "playing":
+                player = state.players.get(player_name)
+                if player and player["status"].lower() == "playing":
                     run_player_command(player_name, ["pause"])
                 else:
                     run_player_command(player_name, ["play"])
@@ -456,30 +768,70 @@ def main():
     signal.signal(signal.SIGTERM, handle_shutdown)
     signal.signal(signal.SIGINT, handle_shutdown)
 
-    last_refresh = 0
-    current_context = ""  # Track current view: "" = players, "controls:X" = controls
+    state = PlayerState()
+    state.sync()
+    follower = PlayerFollower.start()
+    # Without playerctl, poll; otherwise polling only covers a follower that
+    # exited until it is restarted
+    can_follow = follower is not None
+    next_poll = time.monotonic() + POLL_INTERVAL_SECONDS
+    view = PlayersView()
+    art_cache = get_art_cache()
 
-    while not shutdown:
-        try:
-            ready, _, _ = select.select([sys.stdin], [], [], 0.5)
-            if ready:
+    try:
+        while True:
+            # Only wake up on a timer to advance progress of a playing player,
+            # or to poll while there is no follower
+            deadlines = []
+            if view.query is not None and state.any_playing():
+                deadlines.append(time.monotonic() + PROGRESS_INTERVAL_SECONDS)
+            if follower is None:
+                deadlines.append(next_poll)
+            timeout = None
+            if deadlines:
+                timeout = max(0.0, min(deadlines) - time.monotonic())
+            watched = [sys.stdin, art_cache]
+            if follower is not None:
+                watched.append(follower)
+            ready, _, _ = select.select(watched, [], [], timeout)
+
+            if art_cache in ready:
+                art_cache.drain()
+
+            if follower is not None and follower in ready:
+                lines = follower.read()
+                if lines is None:
+                    # playerctl exited: poll, and restart it on the next poll
+                    follower = None
+                    next_poll = time.monotonic() + POLL_INTERVAL_SECONDS
+                    state.sync()
+                elif not all([state.apply(line) for line in lines]):
+                    state.sync()
+
+            now = time.monotonic()
+            if follower is None and now >= next_poll:
+                next_poll = now + POLL_INTERVAL_SECONDS
+                if can_follow:
+                    follower = PlayerFollower.start()
+                state.sync()
+
+            if sys.stdin in ready:
                 line = sys.stdin.readline()
                 if not line:
                     break
-                input_data = json.loads(line.strip())
-                # Track context from input
-                current_context = input_data.get("context", "")
-                handle_step(input_data)
-                last_refresh = time.time()
-            elif time.time() - last_refresh > 1.0:
-                # Only auto-refresh on players view, not controls
-                if not current_context.startswith("controls:"):
-                    return_players_view()
-                last_refresh = time.time()
-        except json.JSONDecodeError:
-            pass
-        except Exception:
-            pass
+                try:
+                    handle_step(json.loads(line.strip()), state, view)
+                except json.JSONDecodeError:
+                    pass
+                except Exception:
+                    pass
+            else:
+                view.refresh(state)
+    finally:
+        if follower is not None:
+            follower.stop()
+        # Persist last-used times for LRU eviction
+        art_cache.save()
 
 
 if __name__ == "__main__":
@@ -2,89 +2,130 @@
 """
 Screenshot workflow handler - browse and manage screenshots using the image browser.
 Uses tesseract for OCR text extraction (Copy Text action).
+
+Runs as a daemon that OCRs screenshots as they are saved: new files in
+~/Pictures/Screenshots are picked up through inotify and OCR'd at low priority
+by a background worker, so Copy Text is normally just a read from the shared
+OCR store. Screenshots taken while hamr wasn't running are caught up on start.
 """
 
+import ctypes
 import json
 import os
+import queue
+import select
+import signal
+import sqlite3
+import struct
 import subprocess
 import sys
-import hashlib
+import threading
 from pathlib import Path
 
+# Shared OCR store, bundled with hamr in scripts/ocr
+HAMR_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(HAMR_DIR / "scripts" / "ocr"))
+import ocr_store  # noqa: E402
+
 # Directories
 PICTURES_DIR = Path.home() / "Pictures"
 SCREENSHOTS_DIR = PICTURES_DIR / "Screenshots"
-CACHE_DIR = Path.home() / ".cache" / "hamr" / "screenshot-ocr"
-CACHE_FILE = CACHE_DIR / "ocr_index.json"
 
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".webp", ".bmp"}
+# CPU priority for background OCR (the Copy Text fallback runs at normal priority)
+OCR_NICENESS = 19
+# How often to look for the screenshots directory if it doesn't exist yet
+WATCH_RETRY_SECONDS = 60
 
-def load_cache() -> dict:
-    """Load OCR cache from disk."""
-    if CACHE_FILE.exists():
-        try:
-            return json.loads(CACHE_FILE.read_text())
-        except (json.JSONDecodeError, IOError):
-            pass
-    return {}
+# inotify constants
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+EVENT_HEADER = struct.Struct("iIII")
 
 
-def save_cache(cache: dict) -> None:
-    """Save OCR cache to disk."""
-    CACHE_DIR.mkdir(parents=True, exist_ok=True)
-    CACHE_FILE.write_text(json.dumps(cache, indent=2))
+def is_image(path: Path) -> bool:
+    return path.suffix.lower() in IMAGE_EXTENSIONS
 
 
-def get_file_hash(filepath: Path) -> str:
-    """Get a hash based on file path and mtime for cache invalidation."""
-    stat = filepath.stat()
-    key = f"{filepath}:{stat.st_mtime}:{stat.st_size}"
-    return hashlib.md5(key.encode()).hexdigest()
+def get_ocr_text(filepath: Path) -> str:
+    """Get OCR text for a file from the shared OCR store, running OCR if needed."""
+    try:
+        conn = ocr_store.open_store()
+        try:
+            return ocr_store.ocr_file(conn, filepath) or ""
+        finally:
+            conn.close()
+    except (OSError, sqlite3.Error):
+        return ""
 
 
-def run_ocr(filepath: Path) -> str:
-    """Run tesseract OCR on an image file."""
+def ocr_worker(jobs: queue.Queue) -> None:
+    """OCR queued screenshots at low priority, skipping content already stored."""
     try:
-        # Get available languages
-        lang_result = subprocess.run(
-            ["tesseract", "--list-langs"],
-            capture_output=True,
-            text=True,
-            timeout=5,
-        )
-        langs = [
-            l.strip() for l in lang_result.stdout.strip().split("\n")[1:] if l.strip()
+        conn = ocr_store.open_store()
+    except (OSError, sqlite3.Error):
+        return
+    # Detected once for the session
+    lang_str = ocr_store.get_tesseract_languages()
+    while True:
+        path = jobs.get()
+        try:
+            ocr_store.ocr_file(conn, path, lang_str, niceness=OCR_NICENESS)
+        except (OSError, sqlite3.Error):
+            pass
+
+
+def queue_existing(jobs: queue.Queue) -> None:
+    """Queue screenshots already on disk, newest first (stored ones are skipped)."""
+    try:
+        entries = [
+            (entry.stat().st_mtime, Path(entry.path))
+            for entry in os.scandir(SCREENSHOTS_DIR)
+            if entry.is_file() and is_image(Path(entry.name))
         ]
-        lang_str = "+".join(langs) if langs else "eng"
-
-        # Run OCR
-        result = subprocess.run(
-            ["tesseract", str(filepath), "stdout", "-l", lang_str],
-            capture_output=True,
-            text=True,
-            timeout=30,
-        )
-        return result.stdout.strip()
-    except (subprocess.TimeoutExpired, FileNotFoundError, subprocess.SubprocessError):
-        return ""
+    except OSError:
+        return
+    for _, path in sorted(entries, reverse=True):
+        jobs.put(path)
 
 
-def get_ocr_text(filepath: Path, cache: dict) -> str:
-    """Get OCR text for a file, using cache if available."""
-    file_hash = get_file_hash(filepath)
-    str_path = str(filepath)
+class ScreenshotWatcher:
+    """inotify watch on the screenshots directory, queueing new files for OCR."""
 
-    # Check cache
-    if str_path in cache and cache[str_path].get("hash") == file_hash:
-        return cache[str_path].get("text", "")
+    def __init__(self, jobs: queue.Queue):
+        self.jobs = jobs
+        self.libc = ctypes.CDLL("libc.so.6", use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        self.watching = False
+
+    def watch(self) -> bool:
+        """Add the directory watch (once it exists) and catch up on its files."""
+        if self.fd < 0 or self.watching:
+            return self.watching
+        wd = self.libc.inotify_add_watch(
+            self.fd, str(SCREENSHOTS_DIR).encode(), IN_CLOSE_WRITE | IN_MOVED_TO
+        )
+        if wd >= 0:
+            self.watching = True
+            queue_existing(self.jobs)
+        return self.watching
 
-    # Run OCR and cache result
-    text = run_ocr(filepath)
-    cache[str_path] = {"hash": file_hash, "text": text}
-    return text
+    def read_events(self) -> None:
+        try:
+            buf = os.read(self.fd, 65536)
+        except OSError:
+            return
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(buf):
+            _wd, _mask, _cookie, length = EVENT_HEADER.unpack_from(buf, offset)
+            name = buf[offset + EVENT_HEADER.size : offset + EVENT_HEADER.size + length]
+            offset += EVENT_HEADER.size + length
+            path = SCREENSHOTS_DIR / os.fsdecode(name.rstrip(b"\0"))
+            if is_image(path):
+                self.jobs.put(path)
 
 
-def main():
-    input_data = json.load(sys.stdin)
+def handle_request(input_data: dict) -> None:
     step = input_data.get("step", "initial")
     selected = input_data.get("selected", {})
 
@@ -165,9 +206,7 @@ def main():
 
         # OCR and copy text
         if action_id == "ocr":
-            cache = load_cache()
-            ocr_text = get_ocr_text(filepath, cache)
-            save_cache(cache)
+            ocr_text = get_ocr_text(filepath)
 
             if not ocr_text:
                 print(
@@ -237,5 +276,39 @@ def main():
     print(json.dumps({"type": "error", "message": f"Unknown step: {step}"}))
 
 
+def main():
+    """Run screenshot handler in daemon mode, OCRing new screenshots on ingest."""
+    signal.signal(signal.SIGTERM, lambda s, f: sys.exit(0))
+    signal.signal(signal.SIGINT, lambda s, f: sys.exit(0))
+
+    jobs: queue.Queue = queue.Queue()
+    threading.Thread(target=ocr_worker, args=(jobs,), daemon=True).start()
+    watcher = ScreenshotWatcher(jobs)
+    watcher.watch()
+
+    while True:
+        watched = [sys.stdin]
+        if watcher.watching:
+            watched.append(watcher.fd)
+        timeout = None if watcher.watching or watcher.fd < 0 else WATCH_RETRY_SECONDS
+        readable, _, _ = select.select(watched, [], [], timeout)
+
+        if watcher.watching and watcher.fd in readable:
+            watcher.read_events()
+        elif not readable:
+            watcher.watch()
+
+        if sys.stdin in readable:
+            line = sys.stdin.readline()
+            if not line:
+                break
+            try:
+                request = json.loads(line.strip())
+            except json.JSONDecodeError:
+                continue
+            handle_request(request)
+            sys.stdout.flush()
+
+
 if __name__ == "__main__":
     main()
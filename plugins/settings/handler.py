@@ -284,6 +284,41 @@ SETTINGS_SCHEMA: dict = {
             "description": "Icon font family",
         },
     },
+    "plugins.clipboard": {
+        "watchMode": {
+            "default": "inotify",
+            "type": "select",
+            "options": ["inotify", "wl-paste", "poll"],
+            "description": "Clipboard change detection (wl-paste also stores entries in cliphist)",
+        },
+    },
+    "plugins.pictures": {
+        "recursive": {
+            "default": True,
+            "type": "boolean",
+            "description": "Include subfolders of the Pictures directory",
+        },
+    },
+    "plugins.files": {
+        "exclude": {
+            "default": [
+                ".git",
+                "node_modules",
+                ".cache",
+                ".local/share",
+                ".mozilla",
+                ".thunderbird",
+                ".steam",
+                ".wine",
+                "__pycache__",
+                ".npm",
+                ".cargo",
+                ".rustup",
+            ],
+            "type": "list",
+            "description": "Names or ~-relative paths left out of the file index",
+        },
+    },
     "paths": {
         "wallpaperDir": {
             "default": "",
@@ -307,6 +342,9 @@ CATEGORY_ICONS = {
     "appearance": "palette",
     "sizes": "straighten",
     "fonts": "font_download",
+    "plugins.clipboard": "content_paste",
+    "plugins.files": "folder_open",
+    "plugins.pictures": "image",
     "paths": "folder",
 }
 
@@ -319,6 +357,9 @@ CATEGORY_NAMES = {
     "appearance": "Appearance",
     "sizes": "Sizes",
     "fonts": "Fonts",
+    "plugins.clipboard": "Clipboard",
+    "plugins.files": "Files",
+    "plugins.pictures": "Pictures",
     "paths": "Paths",
 }
 
@@ -14,10 +14,27 @@ import select
 import struct
 import subprocess
 import sys
+import threading
+import time
+from collections.abc import Callable
 from pathlib import Path
 
+# Shared Hyprland socket client, bundled with hamr in scripts/hyprland
+HAMR_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(HAMR_DIR / "scripts" / "hyprland"))
+import hyprland_ipc  # noqa: E402
+from hyprland_ipc import HyprlandError  # noqa: E402
+
 IS_NIRI = bool(os.environ.get("NIRI_SOCKET"))
 
+# Unique history commands kept for search and indexing
+MAX_HISTORY_COMMANDS = 500
+
+# Terminal classes to wait for before typing into a newly opened terminal
+TERMINAL_CLASSES = ("ghostty", "kitty", "alacritty", "foot")
+TERMINAL_WAIT_TRIES = 50
+TERMINAL_WAIT_INTERVAL = 0.02
+
 IN_CLOSE_WRITE = 0x00000008
 IN_MOVED_TO = 0x00000080
 IN_CREATE = 0x00000100
@@ -69,91 +86,200 @@ def read_inotify_events(fd: int) -> list[str]:
     return filenames
 
 
+# PATH dir -> (mtime_ns, executable names), rescanned when the dir changes
+_path_executables: dict[str, tuple[int, frozenset[str]]] = {}
+
+
+def scan_executables(dir_path: str) -> frozenset[str]:
+    """Names of executable files in one directory"""
+    names = set()
+    try:
+        with os.scandir(dir_path) as it:
+            for entry in it:
+                try:
+                    if entry.is_file() and os.access(entry.path, os.X_OK):
+                        names.add(entry.name)
+                except OSError:
+                    continue
+    except OSError:
+        pass
+    return frozenset(names)
+
+
 def get_path_binaries(filter_set: set[str] | None = None) -> list[str]:
     """Get executable binaries from $PATH directories.
 
     If filter_set is provided, only return binaries whose names are in the set.
     This allows filtering to only commands that appear in shell history.
+    Each directory is only rescanned when its mtime changes.
     """
-    path_dirs = os.environ.get("PATH", "").split(":")
     binaries = set()
 
-    for dir_path in path_dirs:
+    for dir_path in dict.fromkeys(os.environ.get("PATH", "").split(":")):
         if not dir_path:
             continue
         try:
-            p = Path(dir_path)
-            if p.exists() and p.is_dir():
-                for entry in p.iterdir():
-                    if entry.is_file() and os.access(entry, os.X_OK):
-                        name = entry.name
-                        if filter_set is None or name in filter_set:
-                            binaries.add(name)
-        except (PermissionError, OSError):
+            mtime = os.stat(dir_path).st_mtime_ns
+        except OSError:
+            _path_executables.pop(dir_path, None)
             continue
+        cached = _path_executables.get(dir_path)
+        if cached and cached[0] == mtime:
+            executables = cached[1]
+        else:
+            executables = scan_executables(dir_path)
+            _path_executables[dir_path] = (mtime, executables)
+        if filter_set is None:
+            binaries |= executables
+        else:
+            binaries |= executables & filter_set
 
     return sorted(binaries)
 
 
-def get_shell_history() -> list[str]:
-    """Get shell history from zsh, bash, or fish"""
-    shell = os.environ.get("SHELL", "/bin/bash")
-    home = Path.home()
+def parse_zsh(line: str) -> str:
+    # Format: : TIMESTAMP:DURATION;COMMAND
+    if line.startswith(": "):
+        parts = line.split(";", 1)
+        if len(parts) > 1:
+            return parts[1].strip()
+    return line.strip()
+
+
+def parse_fish(line: str) -> str | None:
+    # Format: - cmd: COMMAND
+    if line.startswith("- cmd: "):
+        return line[7:].strip()
+    return None
+
 
-    history_file = None
-    parse_func = None
+def parse_bash(line: str) -> str:
+    return line.strip()
 
+
+def get_history_file() -> tuple[Path, Callable[[str], str | None]]:
+    """Get the history file and line parser for the user's shell"""
+    shell = os.environ.get("SHELL", "/bin/bash")
+    home = Path.home()
     if "zsh" in shell:
-        history_file = home / ".zsh_history"
-
-        def parse_zsh(line):
-            # Format: : TIMESTAMP:DURATION;COMMAND
-            if line.startswith(": "):
-                parts = line.split(";", 1)
-                if len(parts) > 1:
-                    return parts[1].strip()
-            return line.strip()
-
-        parse_func = parse_zsh
-    elif "fish" in shell:
-        history_file = home / ".local/share/fish/fish_history"
-
-        def parse_fish(line):
-            # Format: - cmd: COMMAND
-            if line.startswith("- cmd: "):
-                return line[7:].strip()
-            return None
-
-        parse_func = parse_fish
-    else:
-        history_file = home / ".bash_history"
+        return home / ".zsh_history", parse_zsh
+    if "fish" in shell:
+        return home / ".local/share/fish/fish_history", parse_fish
+    return home / ".bash_history", parse_bash
 
-        def parse_bash(line: str) -> str:
-            return line.strip()
 
-        parse_func = parse_bash
+class ShellHistory:
+    """Parsed shell history, kept up to date by reading only appended bytes.
 
-    if not history_file or not history_file.exists():
-        return []
+    The file offset and the bytes just before it are remembered; if the file
+    was replaced (new inode), shrank, or no longer ends with those bytes where
+    we left off (rewritten in place), it is re-read from the start.
+    """
 
-    try:
-        with open(history_file, "r", errors="ignore") as f:
-            lines = f.readlines()
-    except Exception:
-        return []
-
-    # Parse and deduplicate
-    seen = set()
-    commands = []
-    for line in reversed(lines):
-        cmd = parse_func(line)
-        if cmd and cmd not in seen and len(cmd) > 1:
-            seen.add(cmd)
-            commands.append(cmd)
-            if len(commands) >= 500:
-                break
+    # Bytes before the offset compared to detect in-place rewrites
+    TAIL_CHECK_SIZE = 64
+
+    def __init__(self, path: Path, parse_func: Callable[[str], str | None]):
+        self.path = path
+        self.parse_func = parse_func
+        self.reset()
+
+    def reset(self) -> None:
+        self.inode = 0
+        self.offset = 0
+        self.tail = b""
+        # Newest unique commands, least recently used first
+        self.order: dict[str, None] = {}
+        self._recent: list[str] | None = None
+        self._names: set[str] | None = None
+
+    def refresh(self) -> bool:
+        """Read new history from disk. Returns True if the history changed."""
+        try:
+            with open(self.path, "rb") as f:
+                st = os.fstat(f.fileno())
+                if st.st_ino != self.inode or st.st_size < self.offset:
+                    self.reset()
+                    self.inode = st.st_ino
+                elif self.tail:
+                    f.seek(self.offset - len(self.tail))
+                    if f.read(len(self.tail)) != self.tail:
+                        self.reset()
+                        self.inode = st.st_ino
+                if st.st_size == self.offset:
+                    return False
+                f.seek(self.offset)
+                data = f.read(st.st_size - self.offset)
+        except OSError:
+            if self.inode:
+                self.reset()
+                return True
+            return False
+
+        # Leave a partially written last line for the next read
+        end = data.rfind(b"\n") + 1
+        if not end:
+            return False
+        self.offset += end
+        self.tail = data[max(0, end - self.TAIL_CHECK_SIZE) : end]
+
+        lines = data[:end].decode("utf-8", errors="ignore").splitlines()
+        order = self.order
+        if not order:
+            # Full read: only the newest MAX_HISTORY_COMMANDS unique commands
+            # matter, so walk back from the end until we have them
+            newest: dict[str, None] = {}
+            for line in reversed(lines):
+                cmd = self.parse_func(line)
+                if cmd and len(cmd) > 1 and cmd not in newest:
+                    newest[cmd] = None
+                    if len(newest) >= MAX_HISTORY_COMMANDS:
+                        break
+            self.order = dict.fromkeys(reversed(newest))
+        else:
+            for line in lines:
+                cmd = self.parse_func(line)
+                if cmd and len(cmd) > 1:
+                    order.pop(cmd, None)
+                    order[cmd] = None
+            while len(order) > MAX_HISTORY_COMMANDS:
+                del order[next(iter(order))]
+        self._recent = None
+        self._names = None
+        return True
+
+    def recent(self) -> list[str]:
+        """Most recent unique commands first (at most MAX_HISTORY_COMMANDS)"""
+        if self._recent is None:
+            self._recent = list(reversed(self.order))
+        return self._recent
+
+    def command_names(self) -> set[str]:
+        """Command names (first word) of the recent commands"""
+        if self._names is None:
+            self._names = set()
+            for cmd in self.recent():
+                words = cmd.split()
+                if words:
+                    self._names.add(words[0])
+        return self._names
+
+
+_history: ShellHistory | None = None
+
+
+def get_history() -> ShellHistory:
+    """Get the daemon's shell history, reading anything appended since last time"""
+    global _history
+    if _history is None:
+        _history = ShellHistory(*get_history_file())
+    _history.refresh()
+    return _history
 
-    return commands
+
+def get_shell_history() -> list[str]:
+    """Get shell history from zsh, bash, or fish"""
+    return get_history().recent()
 
 
 def get_history_command_names() -> set[str]:
@@ -161,13 +287,7 @@ def get_history_command_names() -> set[str]:
 
     Returns a set of command names that have been used, for filtering PATH binaries.
     """
-    commands = get_shell_history()
-    names = set()
-    for cmd in commands:
-        first_word = cmd.split()[0] if cmd.split() else ""
-        if first_word:
-            names.add(first_word)
-    return names
+    return get_history().command_names()
 
 
 def fuzzy_filter(query: str, commands: list[str]) -> list[str]:
@@ -225,41 +345,68 @@ def get_cmd_hash(cmd: str) -> str:
     return hashlib.md5(cmd.encode()).hexdigest()[:12]
 
 
+def type_command(cmd: str) -> None:
+    """Type a command into the focused window and press enter."""
+    typed = subprocess.run(
+        ["ydotool", "type", "--key-delay=0", "--", cmd],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    if typed.returncode == 0:
+        subprocess.run(
+            ["ydotool", "key", "28:1", "28:0"],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+
+
+def wait_for_terminal_and_type(cmd: str, terminal: str) -> None:
+    """Poll Hyprland's active window until a terminal is focused, then type.
+
+    Falls back to typing anyway after about a second.
+    """
+    for _ in range(TERMINAL_WAIT_TRIES):
+        try:
+            active = json.loads(hyprland_ipc.request("j/activewindow")).get("class")
+        except (HyprlandError, json.JSONDecodeError, AttributeError):
+            active = None
+        if active and (
+            terminal in active or any(name in active for name in TERMINAL_CLASSES)
+        ):
+            break
+        time.sleep(TERMINAL_WAIT_INTERVAL)
+    type_command(cmd)
+
+
 def run_in_terminal(cmd: str, floating: bool = True) -> None:
     """Open terminal and type command, then press enter."""
     terminal = os.environ.get("TERMINAL", "ghostty")
-    cmd_repr = repr(cmd)
 
     if IS_NIRI:
         # Niri: spawn terminal, wait, then type command
         wait_script = f"""
 niri msg action spawn -- {terminal}
 sleep 0.3
-ydotool type --key-delay=0 -- {cmd_repr} && ydotool key 28:1 28:0
-"""
-    else:
-        # Hyprland: spawn terminal with optional float, poll for active window, then type
-        wait_script = f"""
-terminal_class="{terminal}"
-hyprctl dispatch exec '{"[float] " if floating else ""}{terminal}'
-for i in $(seq 1 50); do
-    active=$(hyprctl activewindow -j 2>/dev/null | jq -r '.class // empty' 2>/dev/null)
-    if [[ "$active" == *"$terminal_class"* ]] || [[ "$active" == *"ghostty"* ]] || [[ "$active" == *"kitty"* ]] || [[ "$active" == *"alacritty"* ]] || [[ "$active" == *"foot"* ]]; then
-        ydotool type --key-delay=0 -- {cmd_repr} && ydotool key 28:1 28:0
-        exit 0
-    fi
-    sleep 0.02
-done
-# Fallback after 1 second
-ydotool type --key-delay=0 -- {cmd_repr} && ydotool key 28:1 28:0
+ydotool type --key-delay=0 -- {repr(cmd)} && ydotool key 28:1 28:0
 """
-    # Run in background so we don't block the handler
-    subprocess.Popen(
-        ["bash", "-c", wait_script.strip()],
-        stdout=subprocess.DEVNULL,
-        stderr=subprocess.DEVNULL,
-        start_new_session=True,
-    )
+        # Run in background so we don't block the handler
+        subprocess.Popen(
+            ["bash", "-c", wait_script.strip()],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+        return
+
+    # Hyprland: spawn terminal with optional float over the socket, then poll
+    # for it to become the active window in the background and type
+    try:
+        hyprland_ipc.dispatch("exec", f"[float] {terminal}" if floating else terminal)
+    except HyprlandError:
+        return
+    threading.Thread(
+        target=wait_for_terminal_and_type, args=(cmd, terminal), daemon=True
+    ).start()
 
 
 def history_to_index_item(cmd: str) -> dict:
@@ -290,9 +437,9 @@ def history_to_index_item(cmd: str) -> dict:
 
 def get_index_items() -> list[dict]:
     """Get all indexable items (binaries and history commands)."""
-    history_cmd_names = get_history_command_names()
-    binaries = get_path_binaries(filter_set=history_cmd_names)
-    commands = get_shell_history()[:50]
+    history = get_history()
+    binaries = get_path_binaries(filter_set=history.command_names())
+    commands = history.recent()[:50]
 
     items = []
     for binary in binaries:
@@ -313,10 +460,9 @@ def handle_request(input_data: dict):
         mode = input_data.get("mode", "full")
         indexed_ids = set(input_data.get("indexedIds", []))
 
-        history_cmd_names = get_history_command_names()
-
-        binaries = get_path_binaries(filter_set=history_cmd_names)
-        commands = get_shell_history()[:50]
+        history = get_history()
+        binaries = get_path_binaries(filter_set=history.command_names())
+        commands = history.recent()[:50]
 
         current_bin_ids = {f"bin:{b}" for b in binaries}
         current_hist_ids = {f"history:{get_cmd_hash(c)}" for c in commands}
@@ -469,16 +615,8 @@ def main():
     # Force line-buffered stdout to prevent partial writes
     sys.stdout = open(sys.stdout.fileno(), "w", buffering=1, closefd=False)
 
-    shell = os.environ.get("SHELL", "/bin/bash")
-    home = Path.home()
-
-    history_files = []
-    if "zsh" in shell:
-        history_files.append(home / ".zsh_history")
-    elif "fish" in shell:
-        history_files.append(home / ".local/share/fish/fish_history")
-    else:
-        history_files.append(home / ".bash_history")
+    history = get_history()
+    history_files = [history.path]
 
     watch_dirs = list({f.parent for f in history_files if f.parent.exists()})
     history_names = {f.name for f in history_files}
@@ -506,7 +644,10 @@ def main():
 
                 elif r == inotify_fd:
                     changed = read_inotify_events(inotify_fd)
-                    if any(name in history_names for name in changed):
+                    if (
+                        any(name in history_names for name in changed)
+                        and history.refresh()
+                    ):
                         items = get_index_items()
                         print(
                             json.dumps(
@@ -1,12 +1,37 @@
 #!/usr/bin/env python3
+"""
+Sound plugin handler - volume and mute controls for the default sink/source.
+
+Runs as a daemon. Volume changes made elsewhere are picked up from a single
+long-lived `pactl subscribe` process: a sink, source or server event re-queries
+only the affected default node (falling back to polling when pactl is missing).
+Slider drags are coalesced so at most one `wpctl set-volume` per node runs per
+SET_VOLUME_INTERVAL, always with the latest value.
+"""
+
 import json
 import os
+import re
 import select
 import signal
 import subprocess
 import sys
 import time
 
+# Events within this window are handled with one re-query per node
+CHANGE_SETTLE_SECONDS = 0.05
+# Minimum time between two set-volume calls for the same slider
+SET_VOLUME_INTERVAL = 0.05
+# Used only when pactl subscribe isn't available
+POLL_INTERVAL_SECONDS = 1.0
+
+# e.g. "Event 'change' on sink #52"
+SUBSCRIBE_EVENT = re.compile(r"Event '\w+' on ([\w-]+) #")
+
+# pactl facilities that affect each slider; "server" covers default changes
+SINK_FACILITIES = {"sink", "server"}
+SOURCE_FACILITIES = {"source", "server"}
+
 
 def run_cmd(cmd: list[str]) -> tuple[str, int]:
     try:
@@ -74,18 +99,159 @@ def get_volume_icon(volume: float, muted: bool) -> str:
     return "volume_up"
 
 
-def get_results(
-    vol_override: int | None = None, mic_override: int | None = None
-) -> list[dict]:
-    vol_info = get_volume_info()
-    mic_info = get_mic_info()
+def slider_update(slider_id: str, info: dict) -> dict:
+    """Update patch for the volume or mic slider."""
+    pct = round(info["volume"] * 100)
+    if slider_id == "volume":
+        icon = get_volume_icon(info["volume"], info["muted"])
+    else:
+        icon = "mic_off" if info["muted"] else "mic"
+    return {
+        "id": slider_id,
+        "value": pct,
+        "gauge": {"value": pct, "max": 100, "label": f"{pct}%"},
+        "icon": icon,
+    }
+
+
+def mute_update(slider_id: str, muted: bool) -> dict:
+    """Update patch for the mute switch that belongs to a slider."""
+    if slider_id == "volume":
+        return {
+            "id": "volume-mute",
+            "value": muted,
+            "name": "Unmute Volume" if muted else "Mute Volume",
+            "description": "Volume is muted" if muted else "Mute system audio output",
+            "icon": "volume_off" if muted else "volume_up",
+        }
+    return {
+        "id": "mic-mute",
+        "value": muted,
+        "name": "Unmute Microphone" if muted else "Mute Microphone",
+        "description": "Microphone is muted" if muted else "Mute microphone input",
+        "icon": "mic_off" if muted else "mic",
+    }
+
+
+# Slider id -> (wpctl node, query function)
+NODES = {
+    "volume": ("@DEFAULT_AUDIO_SINK@", get_volume_info),
+    "mic": ("@DEFAULT_AUDIO_SOURCE@", get_mic_info),
+}
+
+
+class VolumeState:
+    """Last known sink/source state, plus slider values not yet applied."""
+
+    def __init__(self):
+        self.info = {slider_id: query() for slider_id, (_, query) in NODES.items()}
+        self.pending: dict[str, int] = {}
+        self.last_set: dict[str, float] = {}
+
+    def refresh(self, slider_ids: set[str]) -> list[dict]:
+        """Re-query the given nodes. Returns update patches for what changed."""
+        updates = []
+        for slider_id in slider_ids:
+            old = self.info[slider_id]
+            info = NODES[slider_id][1]()
+            self.info[slider_id] = info
+            # A newer slider value is about to be applied; don't move it back
+            if info["volume"] != old["volume"] and slider_id not in self.pending:
+                updates.append(slider_update(slider_id, info))
+            if info["muted"] != old["muted"]:
+                updates.append(mute_update(slider_id, info["muted"]))
+        return updates
+
+    def queue_volume(self, slider_id: str, volume_pct: int) -> None:
+        """Queue a slider value; the latest one wins."""
+        self.pending[slider_id] = max(0, min(100, volume_pct))
+        self.apply_pending()
+
+    def next_set_at(self) -> float | None:
+        """When the next queued slider value can be applied."""
+        if not self.pending:
+            return None
+        return min(
+            self.last_set.get(slider_id, float("-inf")) + SET_VOLUME_INTERVAL
+            for slider_id in self.pending
+        )
+
+    def apply_pending(self) -> None:
+        """Apply queued slider values whose rate limit has passed."""
+        now = time.monotonic()
+        for slider_id, volume_pct in list(self.pending.items()):
+            last = self.last_set.get(slider_id, float("-inf"))
+            if now - last < SET_VOLUME_INTERVAL:
+                continue
+            del self.pending[slider_id]
+            self.last_set[slider_id] = now
+            if slider_id == "volume":
+                set_volume(volume_pct)
+            else:
+                set_mic_volume(volume_pct)
+            self.info[slider_id] = {
+                **self.info[slider_id],
+                "volume": volume_pct / 100.0,
+            }
+
+    def set_mute(self, slider_id: str, muted: bool) -> None:
+        node = NODES[slider_id][0]
+        run_cmd(["wpctl", "set-mute", node, "1" if muted else "0"])
+        self.info[slider_id] = {**self.info[slider_id], "muted": muted}
+
+
+class PactlMonitor:
+    """Long-lived `pactl subscribe`, reporting which facilities changed."""
+
+    def __init__(self, proc: subprocess.Popen):
+        self.proc = proc
+        self.buffer = b""
 
-    vol_pct = (
-        vol_override if vol_override is not None else int(vol_info["volume"] * 100)
-    )
-    mic_pct = (
-        mic_override if mic_override is not None else int(mic_info["volume"] * 100)
-    )
+    @classmethod
+    def start(cls) -> "PactlMonitor | None":
+        try:
+            proc = subprocess.Popen(
+                ["pactl", "subscribe"],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                stdin=subprocess.DEVNULL,
+            )
+        except OSError:
+            return None
+        return cls(proc)
+
+    def fileno(self) -> int:
+        return self.proc.stdout.fileno()
+
+    def read(self) -> set[str] | None:
+        """Read pending events. Returns None once pactl has exited."""
+        try:
+            data = os.read(self.fileno(), 65536)
+        except BlockingIOError:
+            return set()
+        if not data:
+            self.stop()
+            return None
+        *lines, self.buffer = (self.buffer + data).split(b"\n")
+        facilities = set()
+        for line in lines:
+            match = SUBSCRIBE_EVENT.match(line.decode(errors="replace"))
+            if match:
+                facilities.add(match.group(1))
+        return facilities
+
+    def stop(self) -> None:
+        if self.proc.poll() is None:
+            self.proc.terminate()
+        self.proc.wait()
+        self.proc.stdout.close()
+
+
+def get_results(state: VolumeState) -> list[dict]:
+    vol_info = state.info["volume"]
+    mic_info = state.info["mic"]
+    vol_pct = round(vol_info["volume"] * 100)
+    mic_pct = round(mic_info["volume"] * 100)
 
     return [
         {
@@ -149,34 +315,21 @@ def emit(data: dict) -> None:
     print(json.dumps(data), flush=True)
 
 
-def emit_index() -> None:
+def emit_index(state: VolumeState) -> None:
     """Emit index with current volume state for search/history."""
-    emit({"type": "index", "mode": "full", "items": get_results()})
+    emit({"type": "index", "mode": "full", "items": get_results(state)})
 
 
-def handle_request(request: dict) -> None:
+def handle_request(request: dict, state: VolumeState) -> None:
     step = request.get("step", "initial")
     selected = request.get("selected", {})
     action = request.get("action", "")
 
-    vol_info = get_volume_info()
-    mic_info = get_mic_info()
-
-    if step == "initial":
-        emit(
-            {
-                "type": "results",
-                "results": get_results(),
-                "pluginActions": get_plugin_actions(),
-            }
-        )
-        return
-
-    if step == "search":
+    if step in ("initial", "search"):
         emit(
             {
                 "type": "results",
-                "results": get_results(),
+                "results": get_results(state),
                 "pluginActions": get_plugin_actions(),
             }
         )
@@ -186,113 +339,25 @@ def handle_request(request: dict) -> None:
         selected_id = selected.get("id", "")
 
         if action == "slider":
-            new_value = int(request.get("value", 0))
-
-            if selected_id == "volume":
-                set_volume(new_value)
-            elif selected_id == "mic":
-                set_mic_volume(new_value)
-
-            vol_info = get_volume_info()
-            mic_info = get_mic_info()
-
-            # Get updated values for the changed slider
-            if selected_id == "volume":
-                vol_pct = int(vol_info["volume"] * 100)
-                emit(
-                    {
-                        "type": "update",
-                        "items": [
-                            {
-                                "id": "volume",
-                                "value": vol_pct,
-                                "gauge": {
-                                    "value": vol_pct,
-                                    "max": 100,
-                                    "label": f"{vol_pct}%",
-                                },
-                                "icon": get_volume_icon(
-                                    vol_info["volume"], vol_info["muted"]
-                                ),
-                            }
-                        ],
-                    }
-                )
-            elif selected_id == "mic":
-                mic_pct = int(mic_info["volume"] * 100)
-                emit(
-                    {
-                        "type": "update",
-                        "items": [
-                            {
-                                "id": "mic",
-                                "value": mic_pct,
-                                "gauge": {
-                                    "value": mic_pct,
-                                    "max": 100,
-                                    "label": f"{mic_pct}%",
-                                },
-                            }
-                        ],
-                    }
-                )
+            if selected_id in NODES:
+                state.queue_volume(selected_id, int(request.get("value", 0)))
+                # Show the requested value; it may still be waiting to be applied
+                info = {
+                    **state.info[selected_id],
+                    "volume": state.pending.get(
+                        selected_id, round(state.info[selected_id]["volume"] * 100)
+                    )
+                    / 100.0,
+                }
+                emit({"type": "update", "items": [slider_update(selected_id, info)]})
             return
 
         if action == "switch":
-            new_value = request.get("value", False)
-
-            if selected_id == "volume-mute":
-                run_cmd(
-                    [
-                        "wpctl",
-                        "set-mute",
-                        "@DEFAULT_AUDIO_SINK@",
-                        "1" if new_value else "0",
-                    ]
-                )
-                emit(
-                    {
-                        "type": "update",
-                        "items": [
-                            {
-                                "id": "volume-mute",
-                                "value": new_value,
-                                "name": "Unmute Volume" if new_value else "Mute Volume",
-                                "description": "Volume is muted"
-                                if new_value
-                                else "Mute system audio output",
-                                "icon": "volume_off" if new_value else "volume_up",
-                            }
-                        ],
-                    }
-                )
-            elif selected_id == "mic-mute":
-                run_cmd(
-                    [
-                        "wpctl",
-                        "set-mute",
-                        "@DEFAULT_AUDIO_SOURCE@",
-                        "1" if new_value else "0",
-                    ]
-                )
-                emit(
-                    {
-                        "type": "update",
-                        "items": [
-                            {
-                                "id": "mic-mute",
-                                "value": new_value,
-                                "name": "Unmute Microphone"
-                                if new_value
-                                else "Mute Microphone",
-                                "description": "Microphone is muted"
-                                if new_value
-                                else "Mute microphone input",
-                                "icon": "mic_off" if new_value else "mic",
-                            }
-                        ],
-                    }
-                )
+            new_value = bool(request.get("value", False))
+            slider_id = {"volume-mute": "volume", "mic-mute": "mic"}.get(selected_id)
+            if slider_id:
+                state.set_mute(slider_id, new_value)
+                emit({"type": "update", "items": [mute_update(slider_id, new_value)]})
             return
 
         emit({"type": "noop"})
@@ -308,94 +373,72 @@ def main():
     signal.signal(signal.SIGTERM, shutdown_handler)
     signal.signal(signal.SIGINT, shutdown_handler)
 
-    emit_index()
+    state = VolumeState()
+    emit_index(state)
 
-    # Track last known values to detect external changes
-    last_vol = get_volume_info()
-    last_mic = get_mic_info()
+    monitor = PactlMonitor.start()
+    # Without pactl, poll; otherwise polling only covers a restarting server
+    can_subscribe = monitor is not None
+    pending_refresh: set[str] = set()
+    refresh_at = None
+    next_poll = time.monotonic() + POLL_INTERVAL_SECONDS
 
-    while True:
-        readable, _, _ = select.select([sys.stdin], [], [], 1.0)
-
-        if readable:
-            try:
+    try:
+        while True:
+            deadlines = [d for d in (refresh_at, state.next_set_at()) if d is not None]
+            if monitor is None:
+                deadlines.append(next_poll)
+            timeout = None
+            if deadlines:
+                timeout = max(0.0, min(deadlines) - time.monotonic())
+            watched = [sys.stdin] if monitor is None else [sys.stdin, monitor]
+            readable, _, _ = select.select(watched, [], [], timeout)
+
+            if monitor is not None and monitor in readable:
+                facilities = monitor.read()
+                if facilities is None:
+                    # pactl exited (audio server restarted?): poll, and
+                    # resubscribe on the next poll
+                    monitor = None
+                    next_poll = time.monotonic() + POLL_INTERVAL_SECONDS
+                    facilities = SINK_FACILITIES | SOURCE_FACILITIES
+                if facilities & SINK_FACILITIES:
+                    pending_refresh.add("volume")
+                if facilities & SOURCE_FACILITIES:
+                    pending_refresh.add("mic")
+                if pending_refresh and refresh_at is None:
+                    refresh_at = time.monotonic() + CHANGE_SETTLE_SECONDS
+
+            if sys.stdin in readable:
                 line = sys.stdin.readline()
                 if not line:
                     break
-                request = json.loads(line.strip())
-                handle_request(request)
-                # Update tracked values after handling request
-                last_vol = get_volume_info()
-                last_mic = get_mic_info()
-            except (json.JSONDecodeError, ValueError):
-                continue
-        else:
-            # Timeout - check for external volume changes
-            current_vol = get_volume_info()
-            current_mic = get_mic_info()
-
-            updates = []
-
-            if current_vol["volume"] != last_vol["volume"]:
-                vol_pct = int(current_vol["volume"] * 100)
-                updates.append(
-                    {
-                        "id": "volume",
-                        "value": vol_pct,
-                        "gauge": {"value": vol_pct, "max": 100, "label": f"{vol_pct}%"},
-                        "icon": get_volume_icon(
-                            current_vol["volume"], current_vol["muted"]
-                        ),
-                    }
-                )
-
-            if current_vol["muted"] != last_vol["muted"]:
-                muted = current_vol["muted"]
-                updates.append(
-                    {
-                        "id": "volume-mute",
-                        "value": muted,
-                        "name": "Unmute Volume" if muted else "Mute Volume",
-                        "description": "Volume is muted"
-                        if muted
-                        else "Mute system audio output",
-                        "icon": "volume_off" if muted else "volume_up",
-                    }
-                )
-
-            if current_vol != last_vol:
-                last_vol = current_vol
-
-            if current_mic["volume"] != last_mic["volume"]:
-                mic_pct = int(current_mic["volume"] * 100)
-                updates.append(
-                    {
-                        "id": "mic",
-                        "value": mic_pct,
-                        "gauge": {"value": mic_pct, "max": 100, "label": f"{mic_pct}%"},
-                        "icon": "mic_off" if current_mic["muted"] else "mic",
-                    }
-                )
-
-            if current_mic["muted"] != last_mic["muted"]:
-                muted = current_mic["muted"]
-                updates.append(
-                    {
-                        "id": "mic-mute",
-                        "value": muted,
-                        "name": "Unmute Microphone" if muted else "Mute Microphone",
-                        "description": "Microphone is muted"
-                        if muted
-                        else "Mute microphone input",
-                        "icon": "mic_off" if muted else "mic",
-                    }
-                )
-
-            if current_mic != last_mic:
-                last_mic = current_mic
-
-            if updates:
-                emit({"type": "update", "items": updates})
+                try:
+                    handle_request(json.loads(line.strip()), state)
+                except (json.JSONDecodeError, ValueError):
+                    pass
+
+            now = time.monotonic()
+            set_at = state.next_set_at()
+            if set_at is not None and now >= set_at:
+                state.apply_pending()
+
+            if monitor is None and now >= next_poll:
+                next_poll = now + POLL_INTERVAL_SECONDS
+                if can_subscribe:
+                    monitor = PactlMonitor.start()
+                pending_refresh |= NODES.keys()
+                refresh_at = now
+
+            if refresh_at is not None and now >= refresh_at:
+                refresh_at = None
+                updates = state.refresh(pending_refresh)
+                pending_refresh = set()
+                if updates:
+                    emit({"type": "update", "items": updates})
+    finally:
+        if monitor is not None:
+            monitor.stop()
 
 
 if __name__ == "__main__":
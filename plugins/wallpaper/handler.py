@@ -12,9 +12,19 @@ Supports multiple wallpaper backends with automatic detection:
 For theme integration (dark/light mode), place a custom script at:
   ~/.config/hamr/scripts/switchwall.sh
 
-The script will be called with: switchwall.sh --image <path> --mode <dark|light>
+The script will be called with:
+  switchwall.sh --image <path> --mode <dark|light> --palette <cache file>
+
+Wallpapers are served from a catalog (~/.cache/hamr/wallpaper-catalog.json)
+that is only rescanned when the wallpaper directory's mtime changes. Each
+image is keyed by a content hash; the matugen palette extracted for it is kept
+in ~/.cache/hamr/wallpaper-palettes/<hash>.json so switching back to a
+wallpaper reuses its colors instead of extracting them again. Palettes of
+images no longer in the catalog are pruned, keeping the most recently used
+few for wallpapers set from elsewhere.
 """
 
+import hashlib
 import json
 import os
 import random
@@ -22,16 +32,26 @@ import shutil
 import subprocess
 import sys
 from pathlib import Path
+from urllib.parse import quote
 
 # Config and default paths
 XDG_CONFIG = Path(os.environ.get("XDG_CONFIG_HOME", Path.home() / ".config"))
 XDG_CACHE = Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache"))
 HAMR_CONFIG_PATH = XDG_CONFIG / "hamr" / "config.json"
 WALLPAPER_HISTORY_FILE = XDG_CACHE / "hamr" / "wallpaper-history.json"
+WALLPAPER_CATALOG_FILE = XDG_CACHE / "hamr" / "wallpaper-catalog.json"
+PALETTE_CACHE_DIR = XDG_CACHE / "hamr" / "wallpaper-palettes"
+THUMBNAIL_CACHE_DIR = XDG_CACHE / "thumbnails"
 PICTURES_DIR = Path.home() / "Pictures"
 DEFAULT_WALLPAPERS_DIR = PICTURES_DIR / "Wallpapers"
 MAX_HISTORY_ITEMS = 10
+# Palettes kept for images outside the catalog (set from other folders)
+MAX_EXTRA_PALETTES = 20
 IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".gif", ".webp", ".bmp"}
+CATALOG_VERSION = 1
+# Thumbnail size precomputed for the image browser grid
+THUMBNAIL_SIZE = "large"
+HASH_CHUNK_SIZE = 1 << 20
 
 
 def load_wallpaper_history() -> list[str]:
@@ -58,26 +78,222 @@ def save_wallpaper_to_history(path: str) -> None:
         pass
 
 
-def get_random_wallpaper(directory: Path) -> str | None:
-    """Get a random wallpaper from the directory"""
-    if not directory.exists():
+def load_catalog() -> dict:
+    """Load the wallpaper catalog.
+
+    Format: {"version": 1, "config_mtime": ns, "dir": path, "dir_mtime": ns,
+             "files": {name: [inode, mtime_ns, size, content_hash]}}
+    content_hash is "" until the image is first set.
+    """
+    try:
+        catalog = json.loads(WALLPAPER_CATALOG_FILE.read_text())
+        if catalog.get("version") == CATALOG_VERSION:
+            return catalog
+    except (json.JSONDecodeError, OSError):
+        pass
+    return {"version": CATALOG_VERSION, "dir": "", "dir_mtime": 0, "files": {}}
+
+
+def save_catalog(catalog: dict) -> None:
+    """Write the catalog atomically"""
+    try:
+        WALLPAPER_CATALOG_FILE.parent.mkdir(parents=True, exist_ok=True)
+        tmp = WALLPAPER_CATALOG_FILE.with_suffix(".tmp")
+        tmp.write_text(json.dumps(catalog))
+        os.replace(tmp, WALLPAPER_CATALOG_FILE)
+    except OSError:
+        pass
+
+
+def hash_file(path: Path) -> str:
+    """Content hash for an image file"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def get_thumbnail(path: str) -> str:
+    """Freedesktop thumbnail for an image if it's up to date, else the image."""
+    uri = "file://" + quote(os.path.abspath(path), safe="/!$&'()*+,;=:@")
+    thumb = (
+        THUMBNAIL_CACHE_DIR
+        / THUMBNAIL_SIZE
+        / (hashlib.md5(uri.encode()).hexdigest() + ".png")
+    )
+    try:
+        if thumb.stat().st_mtime >= os.stat(path).st_mtime:
+            return str(thumb)
+    except OSError:
+        pass
+    return path
+
+
+def precompute_thumbnails(directory: Path) -> None:
+    """Generate missing thumbnails for the wallpaper directory in the background."""
+    script = HAMR_DIR / "scripts" / "thumbnails" / "thumbgen.sh"
+    if not script.exists():
+        return
+    try:
+        subprocess.Popen(
+            ["nice", "-n", "10", "bash", str(script)]
+            + ["-d", str(directory), "-s", THUMBNAIL_SIZE, "-i"],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+    except OSError:
+        pass
+
+
+def refresh_catalog(catalog: dict, directory: Path) -> bool:
+    """Rescan the wallpaper directory if it changed. Returns True if it did."""
+    try:
+        dir_mtime = directory.stat().st_mtime_ns
+    except OSError:
+        dir_mtime = 0
+    if catalog["dir"] == str(directory) and catalog["dir_mtime"] == dir_mtime:
+        return False
+
+    old = catalog["files"] if catalog["dir"] == str(directory) else {}
+    files = {}
+    added = False
+    try:
+        with os.scandir(directory) as it:
+            for entry in it:
+                if os.path.splitext(entry.name)[1].lower() not in IMAGE_EXTENSIONS:
+                    continue
+                try:
+                    if not entry.is_file():
+                        continue
+                    st = entry.stat()
+                except OSError:
+                    continue
+                key = [st.st_ino, st.st_mtime_ns, st.st_size]
+                prev = old.get(entry.name)
+                if prev and prev[:3] == key:
+                    files[entry.name] = prev
+                else:
+                    files[entry.name] = key + [""]
+                    added = True
+    except OSError:
+        pass
+
+    catalog["dir"] = str(directory)
+    catalog["dir_mtime"] = dir_mtime
+    catalog["files"] = files
+    if added:
+        precompute_thumbnails(directory)
+    return True
+
+
+def get_content_hash(catalog: dict, path: str) -> str:
+    """Content hash of an image, cached in the catalog for wallpaper dir files."""
+    file_path = Path(path)
+    entry = None
+    if str(file_path.parent) == catalog["dir"]:
+        entry = catalog["files"].get(file_path.name)
+    try:
+        st = file_path.stat()
+        if entry and entry[3] and entry[:3] == [st.st_ino, st.st_mtime_ns, st.st_size]:
+            return entry[3]
+        content_hash = hash_file(file_path)
+    except OSError:
+        return ""
+    if entry is not None:
+        catalog["files"][file_path.name] = [
+            st.st_ino,
+            st.st_mtime_ns,
+            st.st_size,
+            content_hash,
+        ]
+        save_catalog(catalog)
+    return content_hash
+
+
+def get_palette_path(catalog: dict, path: str) -> Path | None:
+    """Palette cache file for an image (may not exist yet)"""
+    content_hash = get_content_hash(catalog, path)
+    if not content_hash:
         return None
+    return PALETTE_CACHE_DIR / f"{content_hash}.json"
 
-    wallpapers = [
-        f
-        for f in directory.iterdir()
-        if f.is_file() and f.suffix.lower() in IMAGE_EXTENSIONS
-    ]
 
-    if not wallpapers:
+def prune_palettes(catalog: dict) -> None:
+    """Drop cached palettes for images no longer in the catalog.
+
+    The most recently used MAX_EXTRA_PALETTES outside the catalog are kept.
+    """
+    known = {entry[3] for entry in catalog["files"].values() if entry[3]}
+    extra = []
+    try:
+        with os.scandir(PALETTE_CACHE_DIR) as it:
+            for entry in it:
+                if not entry.name.endswith(".json"):
+                    continue
+                if entry.name[: -len(".json")] in known:
+                    continue
+                try:
+                    extra.append((entry.stat().st_mtime, entry.path))
+                except OSError:
+                    continue
+    except OSError:
+        return
+    extra.sort(reverse=True)
+    for _, path in extra[MAX_EXTRA_PALETTES:]:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+
+def get_catalog_wallpaper(catalog: dict, action: str) -> str | None:
+    """Pick a wallpaper from the catalog: "random", "next" or "previous"."""
+    names = sorted(catalog["files"])
+    if not names:
         return None
+    directory = Path(catalog["dir"])
 
-    return str(random.choice(wallpapers))
+    history = load_wallpaper_history()
+    current = Path(history[0]) if history else None
+    index = -1
+    if current and str(current.parent) == catalog["dir"]:
+        try:
+            index = names.index(current.name)
+        except ValueError:
+            pass
+
+    if action == "random":
+        choices = [n for i, n in enumerate(names) if i != index] or names
+        return str(directory / random.choice(choices))
+    if action == "previous":
+        return str(directory / names[index - 1 if index >= 0 else -1])
+    return str(directory / names[(index + 1) % len(names)])
 
 
-def get_wallpaper_dir() -> Path:
-    """Get wallpaper directory from config or use default."""
-    if HAMR_CONFIG_PATH.exists():
+def get_wallpaper_dir(catalog: dict | None = None) -> Path:
+    """Get wallpaper directory from config or use default.
+
+    With a catalog, config.json is only re-read when its mtime changed.
+    """
+    try:
+        config_mtime = HAMR_CONFIG_PATH.stat().st_mtime_ns
+    except OSError:
+        config_mtime = 0
+    if (
+        catalog
+        and catalog.get("config_mtime") == config_mtime
+        and catalog["dir"]
+        and os.path.isdir(catalog["dir"])
+    ):
+        return Path(catalog["dir"])
+
+    directory = PICTURES_DIR
+    if DEFAULT_WALLPAPERS_DIR.exists():
+        directory = DEFAULT_WALLPAPERS_DIR
+    if config_mtime:
         try:
             with open(HAMR_CONFIG_PATH) as f:
                 config = json.load(f)
@@ -85,13 +301,24 @@ def get_wallpaper_dir() -> Path:
                 if wallpaper_dir:
                     expanded = Path(wallpaper_dir).expanduser()
                     if expanded.exists() and expanded.is_dir():
-                        return expanded
+                        directory = expanded
         except (json.JSONDecodeError, OSError):
             pass
 
-    if DEFAULT_WALLPAPERS_DIR.exists():
-        return DEFAULT_WALLPAPERS_DIR
-    return PICTURES_DIR
+    if catalog is not None:
+        catalog["config_mtime"] = config_mtime
+    return directory
+
+
+def get_catalog() -> dict:
+    """Load the catalog, bringing it up to date with config and directory."""
+    catalog = load_catalog()
+    config_mtime = catalog.get("config_mtime")
+    directory = get_wallpaper_dir(catalog)
+    changed = refresh_catalog(catalog, directory)
+    if changed or catalog.get("config_mtime") != config_mtime:
+        save_catalog(catalog)
+    return catalog
 
 
 # Switchwall script paths (in order of preference)
@@ -154,12 +381,17 @@ def detect_wallpaper_backend() -> str | None:
     return None
 
 
-def build_wallpaper_command(image_path: str, mode: str) -> list[str]:
+def build_wallpaper_command(
+    image_path: str, mode: str, palette: Path | None = None
+) -> list[str]:
     """Build command to set wallpaper based on available backend."""
     # First check for switchwall script (user override or bundled)
     custom_script = find_switchwall_script()
     if custom_script:
-        return [str(custom_script), "--image", image_path, "--mode", mode]
+        command = [str(custom_script), "--image", image_path, "--mode", mode]
+        if palette:
+            command += ["--palette", str(palette)]
+        return command
 
     # Detect backend
     backend = detect_wallpaper_backend()
@@ -225,9 +457,39 @@ def get_plugin_actions() -> list[dict]:
             "icon": "history",
             "shortcut": "Ctrl+2",
         },
+        {
+            "id": "previous",
+            "name": "Previous",
+            "icon": "skip_previous",
+            "shortcut": "Ctrl+3",
+        },
+        {
+            "id": "next",
+            "name": "Next",
+            "icon": "skip_next",
+            "shortcut": "Ctrl+4",
+        },
     ]
 
 
+def set_wallpaper(catalog: dict, path: str, mode: str) -> None:
+    """Set a wallpaper, reusing its cached palette when the script supports it"""
+    palette = None
+    if find_switchwall_script():
+        palette = get_palette_path(catalog, path)
+        if palette:
+            PALETTE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            try:
+                # Mark as recently used so pruning keeps it
+                os.utime(palette)
+            except OSError:
+                pass
+            prune_palettes(catalog)
+    command = build_wallpaper_command(path, mode, palette)
+    save_wallpaper_to_history(path)
+    subprocess.Popen(command)
+
+
 def main():
     input_data = json.load(sys.stdin)
     step = input_data.get("step", "initial")
@@ -237,15 +499,11 @@ def main():
 
     # Handle plugin actions
     if step == "action" and selected.get("id") == "__plugin__":
-        wallpaper_dir = get_wallpaper_dir()
-
-        if action == "random":
-            random_path = get_random_wallpaper(wallpaper_dir)
-            if random_path:
-                mode = "dark"
-                command = build_wallpaper_command(random_path, mode)
-                save_wallpaper_to_history(random_path)
-                subprocess.Popen(command)
+        if action in ("random", "next", "previous"):
+            catalog = get_catalog()
+            wallpaper_path = get_catalog_wallpaper(catalog, action)
+            if wallpaper_path:
+                set_wallpaper(catalog, wallpaper_path, "dark")
                 print(
                     json.dumps(
                         {
@@ -290,7 +548,7 @@ def main():
                             "name": filename,
                             "description": path,
                             "icon": "image",
-                            "thumbnail": path,
+                            "thumbnail": get_thumbnail(path),
                             "verb": "Set",
                         }
                     )
@@ -324,10 +582,7 @@ def main():
             print(json.dumps({"type": "error", "message": "File no longer exists"}))
             return
 
-        mode = "dark"
-        command = build_wallpaper_command(file_path, mode)
-        save_wallpaper_to_history(file_path)
-        subprocess.Popen(command)
+        set_wallpaper(load_catalog(), file_path, "dark")
 
         print(
             json.dumps(
@@ -342,7 +597,7 @@ def main():
     # Initial or search: show the image browser
     if step in ("initial", "search"):
         # Determine initial directory
-        initial_dir = str(get_wallpaper_dir())
+        initial_dir = get_catalog()["dir"]
 
         has_custom_script = find_switchwall_script() is not None
 
@@ -387,12 +642,7 @@ def main():
         else:
             mode = "dark"  # default
 
-        # Build command to set wallpaper
-        command = build_wallpaper_command(file_path, mode)
-
-        # Save to history
-        save_wallpaper_to_history(file_path)
-        subprocess.Popen(command)
+        set_wallpaper(load_catalog(), file_path, mode)
 
         print(
             json.dumps(
@@ -1,26 +1,126 @@
 #!/usr/bin/env python3
 """
 Zoxide plugin handler - index frequently used directories from zoxide.
+
+The database (db.zo) is read directly and scored in-process with zoxide's
+frecency formula, falling back to `zoxide query` for unknown formats. Paths are
+not checked for existence up front; a directory that has gone away is dropped
+from the index when it is focused or opened.
+
+The index is refreshed when zoxide writes its database (inotify). Directory
+listings are only read when an item is focused (lazy preview) and are cached
+per directory mtime.
 """
 
+import ctypes
+import fnmatch
 import json
 import os
 import select
 import shutil
+import struct
 import subprocess
 import sys
+import time
 from pathlib import Path
 
+# Shared Hyprland socket client, bundled with hamr in scripts/hyprland
+HAMR_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(HAMR_DIR / "scripts" / "hyprland"))
+import hyprland_ipc  # noqa: E402
+
 IS_NIRI = bool(os.environ.get("NIRI_SOCKET"))
 
-MAX_ITEMS = 50
+MAX_ITEMS = 2000
 POLL_INTERVAL_SECONDS = 60
+PREVIEW_ITEMS = 20
+
+ZOXIDE_DATA_DIR = Path(
+    os.environ.get("_ZO_DATA_DIR")
+    or Path(os.environ.get("XDG_DATA_HOME", Path.home() / ".local/share")) / "zoxide"
+)
+ZOXIDE_DB = ZOXIDE_DATA_DIR / "db.zo"
+
+# db.zo is bincode: u32 version, then Vec<Dir> (u64 count; per dir a u64
+# length-prefixed UTF-8 path, f64 rank, u64 last accessed epoch seconds)
+ZOXIDE_DB_VERSION = 3
+DB_U32 = struct.Struct("<I")
+DB_U64 = struct.Struct("<Q")
+DB_RANK_ACCESSED = struct.Struct("<dQ")
+
+HOUR = 60 * 60
+DAY = 24 * HOUR
+WEEK = 7 * DAY
+
+# inotify constants
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+EVENT_HEADER = struct.Struct("iIII")
+# zoxide rewrites the db on every `cd`; wait for a burst to settle
+CHANGE_SETTLE_SECONDS = 0.2
+
+# path -> (mtime_ns, preview content)
+_preview_cache: dict[str, tuple[int, str]] = {}
+
+
+def frecency(rank: float, last_accessed: int, now: int) -> float:
+    """zoxide's score: rank weighted by time since last access."""
+    age = now - last_accessed
+    if age < HOUR:
+        return rank * 4.0
+    if age < DAY:
+        return rank * 2.0
+    if age < WEEK:
+        return rank * 0.5
+    return rank * 0.25
+
+
+def get_exclude_patterns() -> list[str]:
+    """Globs from _ZO_EXCLUDE_DIRS (zoxide's default excludes $HOME)"""
+    value = os.environ.get("_ZO_EXCLUDE_DIRS")
+    if value is None:
+        return [str(Path.home())]
+    return [p for p in value.split(os.pathsep) if p]
+
+
+def read_zoxide_db() -> list[dict] | None:
+    """Read and score db.zo directly. Returns None if it can't be parsed."""
+    try:
+        data = ZOXIDE_DB.read_bytes()
+    except FileNotFoundError:
+        return []
+    except OSError:
+        return None
 
-ZOXIDE_DB = Path.home() / ".local/share/zoxide/db.zo"
+    try:
+        if DB_U32.unpack_from(data, 0)[0] != ZOXIDE_DB_VERSION:
+            return None
+        (count,) = DB_U64.unpack_from(data, 4)
+        offset = 12
+        now = int(time.time())
+        excludes = get_exclude_patterns()
+        dirs = []
+        for _ in range(count):
+            (length,) = DB_U64.unpack_from(data, offset)
+            offset += 8
+            path = data[offset : offset + length].decode("utf-8")
+            offset += length
+            rank, last_accessed = DB_RANK_ACCESSED.unpack_from(data, offset)
+            offset += DB_RANK_ACCESSED.size
+            if any(fnmatch.fnmatchcase(path, pattern) for pattern in excludes):
+                continue
+            dirs.append({"path": path, "score": frecency(rank, last_accessed, now)})
+    except (struct.error, UnicodeDecodeError):
+        return None
+    if offset != len(data):
+        return None
 
+    dirs.sort(key=lambda x: -x["score"])
+    return dirs[:MAX_ITEMS]
 
-def get_zoxide_dirs() -> list[dict]:
-    """Get directories from zoxide database with scores."""
+
+def query_zoxide_dirs() -> list[dict]:
+    """Get directories with scores from `zoxide query` (unknown db formats)."""
     if not shutil.which("zoxide"):
         return []
 
@@ -48,9 +148,7 @@ def get_zoxide_dirs() -> list[dict]:
             except ValueError:
                 continue
 
-            path_obj = Path(path)
-            if path_obj.exists() and path_obj.is_dir():
-                dirs.append({"path": path, "score": score})
+            dirs.append({"path": path, "score": score})
 
         dirs.sort(key=lambda x: -x["score"])
         return dirs[:MAX_ITEMS]
@@ -59,8 +157,16 @@ def get_zoxide_dirs() -> list[dict]:
         return []
 
 
+def get_zoxide_dirs() -> list[dict]:
+    """Get directories from zoxide database with scores."""
+    dirs = read_zoxide_db()
+    if dirs is None:
+        dirs = query_zoxide_dirs()
+    return dirs
+
+
 def make_terminal_cmd(path: str) -> list[str]:
-    """Build command to open terminal at directory.
+    """Build terminal command line to open at directory.
 
     Uses terminal's native --working-directory flag.
     For ghostty with gtk-single-instance, we disable it for this invocation
@@ -88,47 +194,83 @@ def make_terminal_cmd(path: str) -> list[str]:
     else:
         cmd_parts = [terminal, f"--working-directory={path}"]
 
+    return cmd_parts
+
+
+def open_terminal(path: str) -> None:
+    """Open terminal at directory through the compositor.
+
+    On Hyprland the exec dispatch goes straight to its socket (no hyprctl).
+    """
+    cmd_parts = make_terminal_cmd(path)
     if IS_NIRI:
-        return ["niri", "msg", "action", "spawn", "--"] + cmd_parts
-    return ["hyprctl", "dispatch", "exec", "--", *cmd_parts]
+        subprocess.Popen(["niri", "msg", "action", "spawn", "--"] + cmd_parts)
+    else:
+        hyprland_ipc.exec_command(cmd_parts)
 
 
 def get_directory_preview(path: str) -> str:
-    """Get a preview of directory contents (first 20 items)."""
+    """Get a preview of directory contents (first 20 items), cached by mtime."""
     try:
-        path_obj = Path(path)
-        if not path_obj.exists() or not path_obj.is_dir():
-            return ""
+        mtime = os.stat(path).st_mtime_ns
+        cached = _preview_cache.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
 
+        with os.scandir(path) as it:
+            entries = sorted(it, key=lambda e: e.name)
         items = []
-        for item in sorted(path_obj.iterdir())[:20]:
-            suffix = "/" if item.is_dir() else ""
-            items.append(f"{item.name}{suffix}")
+        for entry in entries[:PREVIEW_ITEMS]:
+            try:
+                suffix = "/" if entry.is_dir() else ""
+            except OSError:
+                suffix = ""
+            items.append(f"{entry.name}{suffix}")
 
-        if len(list(path_obj.iterdir())) > 20:
+        if len(entries) > PREVIEW_ITEMS:
             items.append("...")
 
-        return "\n".join(items) if items else "(empty directory)"
+        content = "\n".join(items) if items else "(empty directory)"
+        _preview_cache[path] = (mtime, content)
+        return content
+    except FileNotFoundError:
+        return ""
     except (PermissionError, OSError):
         return "(permission denied)"
 
 
+def get_display_path(path: str) -> str:
+    home = str(Path.home())
+    if path.startswith(home):
+        return "~" + path[len(home) :]
+    return path
+
+
+def get_preview(path: str, lazy: bool = False) -> dict:
+    """Directory preview; lazy ones are filled in by the preview step on focus."""
+    name = Path(path).name or path
+    preview = {
+        "type": "text",
+        "content": "" if lazy else get_directory_preview(path),
+        "title": name,
+        "metadata": [
+            {"label": "Path", "value": get_display_path(path)},
+        ],
+    }
+    if lazy:
+        preview["lazy"] = True
+    return preview
+
+
 def dir_to_index_item(dir_info: dict) -> dict:
     """Convert directory info to indexable item format."""
     path = dir_info["path"]
     path_obj = Path(path)
     name = path_obj.name or path
 
-    home = str(Path.home())
-    if path.startswith(home):
-        display_path = "~" + path[len(home) :]
-    else:
-        display_path = path
-
+    display_path = get_display_path(path)
     path_parts = [p for p in path.lower().split("/") if p]
 
-    preview_content = get_directory_preview(path)
-
     item_id = f"zoxide:{path}"
     return {
         "id": item_id,
@@ -141,14 +283,7 @@ def dir_to_index_item(dir_info: dict) -> dict:
             "step": "action",
             "selected": {"id": item_id},
         },
-        "preview": {
-            "type": "text",
-            "content": preview_content,
-            "title": name,
-            "metadata": [
-                {"label": "Path", "value": display_path},
-            ],
-        },
+        "preview": get_preview(path, lazy=True),
         "actions": [
             {
                 "id": "files",
@@ -164,6 +299,15 @@ def dir_to_index_item(dir_info: dict) -> dict:
     }
 
 
+def emit_removed(item_id: str) -> None:
+    """Drop a directory that no longer exists from the index."""
+    print(
+        json.dumps(
+            {"type": "index", "mode": "incremental", "items": [], "remove": [item_id]}
+        )
+    )
+
+
 def handle_request(input_data: dict) -> None:
     """Handle a single request."""
     step = input_data.get("step", "initial")
@@ -198,6 +342,22 @@ def handle_request(input_data: dict) -> None:
             print(json.dumps({"type": "index", "items": items}))
         return
 
+    if step == "preview":
+        item_id = input_data.get("selected", {}).get("id", "")
+        if item_id.startswith("zoxide:"):
+            if not os.path.isdir(item_id[7:]):
+                emit_removed(item_id)
+                return
+            print(
+                json.dumps(
+                    {
+                        "type": "update",
+                        "items": [{"id": item_id, "preview": get_preview(item_id[7:])}],
+                    }
+                )
+            )
+        return
+
     if step == "action":
         action_id = input_data.get("action")
         selected = input_data.get("selected", {})
@@ -212,6 +372,13 @@ def handle_request(input_data: dict) -> None:
             print(json.dumps({"type": "error", "message": "Missing path"}))
             return
 
+        if not os.path.isdir(path):
+            emit_removed(item_id)
+            print(
+                json.dumps({"type": "error", "message": "Directory no longer exists"})
+            )
+            return
+
         if action_id == "files":
             try:
                 subprocess.Popen(["xdg-open", path])
@@ -233,8 +400,7 @@ def handle_request(input_data: dict) -> None:
             return
 
         try:
-            cmd = make_terminal_cmd(path)
-            subprocess.Popen(cmd)
+            open_terminal(path)
             print(json.dumps({"type": "execute", "close": True}))
         except Exception as e:
             print(json.dumps({"type": "error", "message": str(e)}))
@@ -243,15 +409,58 @@ def handle_request(input_data: dict) -> None:
     print(json.dumps({"type": "error", "message": "Invalid request"}))
 
 
-def emit_full_index() -> None:
-    """Emit full index of zoxide directories."""
+def emit_full_index(last_paths: list[str] | None = None) -> list[str]:
+    """Emit full index of zoxide directories, unless the set is unchanged.
+
+    Returns the indexed paths.
+    """
     dirs = get_zoxide_dirs()
+    paths = [d["path"] for d in dirs]
+    if last_paths is not None and set(paths) == set(last_paths):
+        return paths
 
     items = [dir_to_index_item(d) for d in dirs]
     print(
         json.dumps({"type": "index", "mode": "full", "items": items}),
         flush=True,
     )
+    return paths
+
+
+def create_inotify_fd() -> int | None:
+    """Watch the zoxide data dir for database writes. Returns fd or None."""
+    try:
+        libc = ctypes.CDLL("libc.so.6", use_errno=True)
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            return None
+        wd = libc.inotify_add_watch(
+            fd, str(ZOXIDE_DB.parent).encode(), IN_CLOSE_WRITE | IN_MOVED_TO
+        )
+        if wd < 0:
+            os.close(fd)
+            return None
+        return fd
+    except (OSError, AttributeError):
+        return None
+
+
+def read_db_changed(fd: int) -> bool:
+    """Consume a burst of inotify events; True if the database was written."""
+    changed = False
+    while True:
+        try:
+            buf = os.read(fd, 4096)
+        except OSError:
+            buf = b""
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(buf):
+            _wd, _mask, _cookie, length = EVENT_HEADER.unpack_from(buf, offset)
+            name = buf[offset + EVENT_HEADER.size : offset + EVENT_HEADER.size + length]
+            offset += EVENT_HEADER.size + length
+            changed |= name.rstrip(b"\0") == ZOXIDE_DB.name.encode()
+        if not select.select([fd], [], [], CHANGE_SETTLE_SECONDS)[0]:
+            return changed
 
 
 def main():
@@ -260,14 +469,22 @@ def main():
     signal.signal(signal.SIGTERM, lambda s, f: sys.exit(0))
     signal.signal(signal.SIGINT, lambda s, f: sys.exit(0))
 
-    emit_full_index()
+    # Watch before the first query so no write is missed; without the data
+    # dir (or inotify) fall back to polling the db mtime
+    watch_fd = create_inotify_fd()
+    paths = emit_full_index()
 
     last_mtime = ZOXIDE_DB.stat().st_mtime if ZOXIDE_DB.exists() else 0
+    last_poll = time.time()
 
     while True:
-        readable, _, _ = select.select([sys.stdin], [], [], POLL_INTERVAL_SECONDS)
+        watched = [sys.stdin] if watch_fd is None else [sys.stdin, watch_fd]
+        timeout = None
+        if watch_fd is None:
+            timeout = max(0.0, last_poll + POLL_INTERVAL_SECONDS - time.time())
+        readable, _, _ = select.select(watched, [], [], timeout)
 
-        if readable:
+        if sys.stdin in readable:
             try:
                 line = sys.stdin.readline()
                 if not line:
@@ -278,11 +495,16 @@ def main():
             except json.JSONDecodeError:
                 continue
 
-        if ZOXIDE_DB.exists():
-            current = ZOXIDE_DB.stat().st_mtime
-            if current != last_mtime:
-                last_mtime = current
-                emit_full_index()
+        if watch_fd is not None:
+            if watch_fd in readable and read_db_changed(watch_fd):
+                paths = emit_full_index(paths)
+        elif time.time() - last_poll >= POLL_INTERVAL_SECONDS:
+            last_poll = time.time()
+            if ZOXIDE_DB.exists():
+                current = ZOXIDE_DB.stat().st_mtime
+                if current != last_mtime:
+                    last_mtime = current
+                    paths = emit_full_index(paths)
 
 
 if __name__ == "__main__":
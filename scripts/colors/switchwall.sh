@@ -2,7 +2,7 @@
 # switchwall.sh - Wallpaper and theme switcher for Hamr
 #
 # Usage:
-#   switchwall.sh --image /path/to/image.jpg [--mode dark|light]
+#   switchwall.sh --image /path/to/image.jpg [--mode dark|light] [--palette cache.json]
 #   switchwall.sh --mode dark|light --noswitch
 #   switchwall.sh --color <hex_color>
 #
@@ -16,12 +16,21 @@
 # Theme generation:
 #   Uses matugen to generate Material You colors.
 #   Outputs to DMS colors file for DankMaterialShell integration.
+#   With --palette, matugen's output for the image is cached in that file;
+#   if it already exists, the image isn't read again: the DMS colors file is
+#   written from the cache and user templates are rendered from the cached
+#   source color. The scheme is derived from that color, so template colors
+#   are the same. Only {{image}} needs the image itself, so if the matugen
+#   config or a template uses it, templates are rendered from the image.
+#   matugen's own wallpaper setting isn't applied on that path either; the
+#   wallpaper is already set by this script.
 
 set -euo pipefail
 
 DMS_COLORS_FILE="${XDG_CACHE_HOME:-$HOME/.cache}/DankMaterialShell/dms-colors.json"
 NIRI_HAMR_DIR="${XDG_CONFIG_HOME:-$HOME/.config}/niri/hamr"
 NIRI_CONFIG="${XDG_CONFIG_HOME:-$HOME/.config}/niri/config.kdl"
+MATUGEN_CONFIG="${XDG_CONFIG_HOME:-$HOME/.config}/matugen/config.toml"
 
 # Setup niri hamr integration (creates dir and adds include if needed)
 setup_niri() {
@@ -101,11 +110,27 @@ set_wallpaper() {
     esac
 }
 
+# Check whether the matugen config or any of its templates use {{image}}
+templates_use_image() {
+    [[ -f "$MATUGEN_CONFIG" ]] || return 1
+    local pattern='\{\{ *image *\}\}'
+    grep -Eq "$pattern" "$MATUGEN_CONFIG" && return 0
+    local input_path
+    while IFS= read -r input_path; do
+        input_path="${input_path/#\~/$HOME}"
+        if [[ -f "$input_path" ]] && grep -Eq "$pattern" "$input_path"; then
+            return 0
+        fi
+    done < <(sed -nE "s/^[[:space:]]*input_path[[:space:]]*=[[:space:]]*['\"]([^'\"]*)['\"].*/\1/p" "$MATUGEN_CONFIG")
+    return 1
+}
+
 # Generate colors with matugen and output DMS-compatible format
 # matugen outputs all variants (dark, default, light) in one run
 generate_colors() {
     local source_type="$1"  # "image" or "color"
     local source_value="$2" # path or hex color
+    local palette="${3:-}"  # optional palette cache file (image only)
     
     if ! command -v matugen &>/dev/null; then
         return 1
@@ -115,8 +140,15 @@ generate_colors() {
     trap "rm -f '$tmp_json'" EXIT
     
     # Generate colors (matugen outputs dark/default/light variants for each color)
-    if [[ "$source_type" == "image" ]]; then
+    local cached=""
+    if [[ -n "$palette" && -s "$palette" ]]; then
+        cp "$palette" "$tmp_json"
+        cached="1"
+    elif [[ "$source_type" == "image" ]]; then
         matugen image "$source_value" --mode dark --type scheme-tonal-spot --dry-run -j hex > "$tmp_json" 2>/dev/null
+        if [[ -n "$palette" && -s "$tmp_json" ]]; then
+            cp "$tmp_json" "$palette.tmp" && mv -f "$palette.tmp" "$palette"
+        fi
     else
         matugen color hex "$source_value" --mode dark --type scheme-tonal-spot --dry-run -j hex > "$tmp_json" 2>/dev/null
     fi
@@ -124,6 +156,7 @@ generate_colors() {
     # Convert to DMS format using jq
     # matugen format: { colors: { primary: { dark: "#xxx", light: "#xxx" }, ... } }
     # DMS format: { colors: { dark: { primary: "#xxx", ... }, light: { primary: "#xxx", ... } } }
+    local seed=""
     if command -v jq &>/dev/null && [[ -s "$tmp_json" ]]; then
         mkdir -p "$(dirname "$DMS_COLORS_FILE")"
         jq '{
@@ -132,10 +165,15 @@ generate_colors() {
                 light: (.colors | with_entries(.value = .value.light))
             }
         }' "$tmp_json" > "$DMS_COLORS_FILE"
+        if [[ -n "$cached" ]] && ! templates_use_image; then
+            seed=$(jq -r '.colors.source_color.dark // empty' "$tmp_json")
+        fi
     fi
     
     # Also run matugen normally for user templates (hamr, gtk, niri, etc.)
-    if [[ "$source_type" == "image" ]]; then
+    if [[ -n "$seed" ]]; then
+        matugen color hex "$seed" --mode dark --type scheme-tonal-spot
+    elif [[ "$source_type" == "image" ]]; then
         matugen image "$source_value" --mode dark --type scheme-tonal-spot
     else
         matugen color hex "$source_value" --mode dark --type scheme-tonal-spot
@@ -169,6 +207,7 @@ main() {
     local mode="dark"
     local noswitch=""
     local color=""
+    local palette=""
     
     while [[ $# -gt 0 ]]; do
         case "$1" in
@@ -180,6 +219,10 @@ main() {
                 mode="$2"
                 shift 2
                 ;;
+            --palette)
+                palette="$2"
+                shift 2
+                ;;
             --noswitch)
                 noswitch="1"
                 shift
@@ -216,7 +259,7 @@ main() {
     if [[ -z "$noswitch" && -n "$image" ]]; then
         if [[ -f "$image" ]]; then
             set_wallpaper "$image"
-            generate_colors "image" "$image" || true
+            generate_colors "image" "$image" "$palette" || true
         else
             notify-send "Wallpaper" "File not found: $image"
             exit 1
@@ -224,7 +267,7 @@ main() {
     elif [[ -n "$image" ]]; then
         # --noswitch with image: just generate colors, don't change wallpaper
         if [[ -f "$image" ]]; then
-            generate_colors "image" "$image" || true
+            generate_colors "image" "$image" "$palette" || true
         fi
     fi
 }
@@ -0,0 +1,108 @@
+"""
+Hyprland request socket client for hamr.
+
+Talks to Hyprland's request socket (.socket.sock) directly instead of running
+hyprctl, so queries and dispatches don't fork a process each. Hyprland answers
+one request per connection, so several queries are sent together with
+[[BATCH]] to get all replies in a single round trip.
+
+Socket: $XDG_RUNTIME_DIR/hypr/$HYPRLAND_INSTANCE_SIGNATURE/.socket.sock
+(/tmp/hypr/... on older Hyprland versions)
+
+Used by:
+  - plugins/hyprland/handler.py, clients/workspaces/globalshortcuts and dispatchers
+  - plugins/zoxide/handler.py and plugins/shell/handler.py, dispatch exec
+"""
+
+import json
+import os
+import shlex
+import socket
+from pathlib import Path
+
+REQUEST_SOCKET = ".socket.sock"
+EVENT_SOCKET = ".socket2.sock"
+
+# Separator Hyprland puts between the replies of a [[BATCH]] request
+BATCH_SEPARATOR = "\n\n\n"
+
+REQUEST_TIMEOUT_SECONDS = 2.0
+RECV_SIZE = 65536
+
+
+class HyprlandError(Exception):
+    """Hyprland is unreachable or rejected a request."""
+
+
+def get_socket_path(name: str = REQUEST_SOCKET) -> Path | None:
+    """Get path to one of Hyprland's sockets, or None outside Hyprland."""
+    instance_sig = os.environ.get("HYPRLAND_INSTANCE_SIGNATURE")
+    if not instance_sig:
+        return None
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    candidates = [Path("/tmp/hypr") / instance_sig / name]
+    if runtime_dir:
+        candidates.insert(0, Path(runtime_dir) / "hypr" / instance_sig / name)
+    return next((p for p in candidates if p.exists()), None)
+
+
+def request(command: str) -> str:
+    """Send one raw request (e.g. "j/clients") and return Hyprland's reply."""
+    socket_path = get_socket_path()
+    if not socket_path:
+        raise HyprlandError("Hyprland socket not found")
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(REQUEST_TIMEOUT_SECONDS)
+            sock.connect(str(socket_path))
+            sock.sendall(command.encode())
+            chunks = []
+            while chunk := sock.recv(RECV_SIZE):
+                chunks.append(chunk)
+    except OSError as e:
+        raise HyprlandError(f"Hyprland request failed: {e}") from e
+    return b"".join(chunks).decode(errors="replace")
+
+
+def batch(commands: list[str]) -> list[str]:
+    """Send several requests in one round trip. Returns one reply per command."""
+    if len(commands) == 1:
+        return [request(commands[0])]
+    replies = request("[[BATCH]]" + ";".join(commands)).split(BATCH_SEPARATOR)
+    if len(replies) != len(commands):
+        raise HyprlandError("Unexpected reply to batch request")
+    return replies
+
+
+def query_json(*commands: str) -> list:
+    """Fetch JSON queries (e.g. "clients", "workspaces") in one round trip."""
+    try:
+        return [json.loads(reply) for reply in batch([f"j/{c}" for c in commands])]
+    except json.JSONDecodeError as e:
+        raise HyprlandError(f"Invalid reply from Hyprland: {e}") from e
+
+
+def parse_global_shortcuts(reply: str) -> list[dict]:
+    """Parse `globalshortcuts` output ("app:id -> description" per line)."""
+    shortcuts = []
+    for line in reply.strip().split("\n"):
+        if " -> " in line:
+            shortcut_id, description = line.split(" -> ", 1)
+            shortcuts.append(
+                {"id": shortcut_id.strip(), "description": description.strip()}
+            )
+    return shortcuts
+
+
+def dispatch(dispatcher: str, arg: str = "") -> None:
+    """Run a dispatcher. Raises HyprlandError if Hyprland doesn't reply "ok"."""
+    reply = request(f"/dispatch {dispatcher} {arg}".rstrip()).strip()
+    if reply != "ok":
+        raise HyprlandError(reply or f"{dispatcher} failed")
+
+
+def exec_command(args: list[str], rules: str = "") -> None:
+    """Launch a command through Hyprland (dispatch exec), optionally with
+    window rules such as "float"."""
+    command = shlex.join(args)
+    dispatch("exec", f"[{rules}] {command}" if rules else command)
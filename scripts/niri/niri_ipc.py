@@ -0,0 +1,139 @@
+"""
+niri IPC socket client for hamr.
+
+Talks to niri's socket ($NIRI_SOCKET) directly instead of running `niri msg`,
+so queries and actions don't fork a process each. Requests and replies are
+single JSON lines; replies are {"Ok": ...} or {"Err": "message"}.
+
+The event stream (EventStream request) starts with the full window and
+workspace state and then sends changes, so a client can keep a live model
+without querying again.
+
+Used by:
+  - plugins/niri/handler.py, window/workspace state and actions
+"""
+
+import json
+import os
+import socket
+
+REQUEST_TIMEOUT_SECONDS = 2.0
+RECV_SIZE = 65536
+
+
+class NiriError(Exception):
+    """niri is unreachable or rejected a request."""
+
+
+def connect() -> socket.socket:
+    """Open a connection to niri's socket."""
+    socket_path = os.environ.get("NIRI_SOCKET")
+    if not socket_path:
+        raise NiriError("NIRI_SOCKET is not set")
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(REQUEST_TIMEOUT_SECONDS)
+        sock.connect(socket_path)
+    except OSError as e:
+        sock.close()
+        raise NiriError(f"niri request failed: {e}") from e
+    return sock
+
+
+def parse_reply(line: bytes):
+    """Unwrap a reply line, raising NiriError for {"Err": ...}."""
+    try:
+        reply = json.loads(line)
+    except json.JSONDecodeError as e:
+        raise NiriError(f"Invalid reply from niri: {e}") from e
+    if not isinstance(reply, dict) or "Ok" not in reply:
+        raise NiriError(str(reply.get("Err") if isinstance(reply, dict) else reply))
+    return reply["Ok"]
+
+
+def request(req):
+    """Send one request (e.g. "Windows") and return the Ok payload."""
+    with connect() as sock:
+        try:
+            sock.sendall(json.dumps(req).encode() + b"\n")
+            data = b""
+            while b"\n" not in data:
+                chunk = sock.recv(RECV_SIZE)
+                if not chunk:
+                    break
+                data += chunk
+        except OSError as e:
+            raise NiriError(f"niri request failed: {e}") from e
+    return parse_reply(data.partition(b"\n")[0])
+
+
+def query(name: str) -> list | dict:
+    """Run a query such as "Windows" or "Workspaces" and return its data."""
+    reply = request(name)
+    if not isinstance(reply, dict) or name not in reply:
+        raise NiriError(f"Unexpected reply to {name}")
+    return reply[name]
+
+
+def action_variant(name: str) -> str:
+    """Convert a CLI action name (focus-window) to its IPC name (FocusWindow)."""
+    return "".join(part.capitalize() for part in name.split("-"))
+
+
+def action(name: str, **fields) -> None:
+    """Run an action by CLI name, e.g. action("focus-window", id=3)."""
+    request({"Action": {action_variant(name): fields}})
+
+
+class EventStream:
+    """Line-buffered reader for niri's event stream."""
+
+    def __init__(self):
+        self.sock = connect()
+        self.buffer = b""
+        try:
+            self.sock.sendall(json.dumps("EventStream").encode() + b"\n")
+            # Read the reply a byte at a time so no event is read ahead of
+            # select() on the socket
+            reply = b""
+            while not reply.endswith(b"\n"):
+                chunk = self.sock.recv(1)
+                if not chunk:
+                    break
+                reply += chunk
+            parse_reply(reply)
+        except (OSError, NiriError) as e:
+            self.sock.close()
+            raise NiriError(f"niri event stream failed: {e}") from e
+        self.sock.setblocking(False)
+
+    def fileno(self) -> int:
+        return self.sock.fileno()
+
+    def close(self) -> None:
+        self.sock.close()
+
+    def read(self) -> list[dict] | None:
+        """Read pending events. Returns None once the stream has closed.
+
+        A line split across reads is kept until the rest of it arrives.
+        """
+        try:
+            data = self.sock.recv(RECV_SIZE)
+        except BlockingIOError:
+            return []
+        except OSError:
+            data = b""
+        if not data:
+            self.close()
+            return None
+        *lines, self.buffer = (self.buffer + data).split(b"\n")
+        events = []
+        for line in lines:
+            try:
+                event = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(event, dict):
+                events.append(event)
+        return events
@@ -10,199 +10,173 @@ Output format (machine_progress mode):
   FILE /path/to/file.png
   OCR /path/to/file.png|extracted text here (newlines replaced with \\n)
 
-Cache stored in ~/.cache/hamr/ocr-index/<directory-hash>.json
+Results are kept in the shared OCR store (see ocr_store.py), keyed by image
+content, so images already OCR'd by the clipboard or screenshot plugins are
+not processed again. Each result is committed as it arrives, so an interrupted
+run keeps everything indexed so far.
+
+With --since, only files added or changed after that time are reported, so a
+caller that kept the previous run's results gets just the difference.
 """
 
-import hashlib
-import json
-import subprocess
+import os
 import sys
 from multiprocessing import Pool
 from pathlib import Path
 
 import click
 
-# Cache directory
-CACHE_DIR = Path.home() / ".cache" / "hamr" / "ocr-index"
+import ocr_store
 
 # Image extensions to process
 IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".webp"}
 
 # Global state for multiprocessing
 _lang_str = "eng"
-_cache = {}
 
 
-def get_directory_hash(directory: str) -> str:
-    """Get a hash for the directory path to use as cache filename."""
-    return hashlib.md5(directory.encode()).hexdigest()
+def init_worker(lang_str: str) -> None:
+    """Share the tesseract language string with pool workers."""
+    global _lang_str
+    _lang_str = lang_str
 
 
-def get_file_hash(filepath: Path) -> str:
-    """Get a hash based on file path and mtime for cache invalidation."""
-    stat = filepath.stat()
-    key = f"{filepath}:{stat.st_mtime}:{stat.st_size}"
-    return hashlib.md5(key.encode()).hexdigest()
+def run_ocr(job: tuple[str, str]) -> tuple[str, str | None]:
+    """Run tesseract OCR on an image file. Returns (content_hash, text).
 
+    text is None if tesseract failed.
+    """
+    content_hash, filepath = job
+    return (content_hash, ocr_store.run_tesseract(filepath, lang_str=_lang_str))
 
-def load_cache(directory: str) -> dict:
-    """Load OCR cache for a directory."""
-    cache_file = CACHE_DIR / f"{get_directory_hash(directory)}.json"
-    if cache_file.exists():
-        try:
-            return json.loads(cache_file.read_text())
-        except (json.JSONDecodeError, IOError):
-            pass
-    return {"directory": directory, "files": {}}
-
-
-def save_cache(directory: str, cache: dict) -> None:
-    """Save OCR cache for a directory."""
-    CACHE_DIR.mkdir(parents=True, exist_ok=True)
-    cache_file = CACHE_DIR / f"{get_directory_hash(directory)}.json"
-    cache_file.write_text(json.dumps(cache, indent=2))
-
-
-def get_tesseract_languages() -> str:
-    """Get available tesseract languages as a + separated string."""
-    try:
-        result = subprocess.run(
-            ["tesseract", "--list-langs"],
-            capture_output=True,
-            text=True,
-            timeout=5,
-        )
-        langs = [
-            lang.strip()
-            for lang in result.stdout.strip().split("\n")[1:]
-            if lang.strip()
-        ]
-        return "+".join(langs) if langs else "eng"
-    except (subprocess.TimeoutExpired, FileNotFoundError, subprocess.SubprocessError):
-        return "eng"
-
-
-def run_ocr(filepath: str) -> tuple[str, str]:
-    """Run tesseract OCR on an image file. Returns (filepath, text)."""
-    global _lang_str, _cache
-
-    path = Path(filepath)
-    file_hash = get_file_hash(path)
-
-    # Check cache
-    if filepath in _cache.get("files", {}):
-        cached = _cache["files"][filepath]
-        if cached.get("hash") == file_hash:
-            return (filepath, cached.get("text", ""))
-
-    # Run OCR
-    try:
-        result = subprocess.run(
-            ["tesseract", filepath, "stdout", "-l", _lang_str],
-            capture_output=True,
-            text=True,
-            timeout=30,
-        )
-        text = result.stdout.strip()
-    except (subprocess.TimeoutExpired, FileNotFoundError, subprocess.SubprocessError):
-        text = ""
-
-    return (filepath, text)
-
-
-def process_file(filepath: str) -> tuple[str, str, str]:
-    """Process a single file. Returns (filepath, text, hash)."""
-    filepath_obj = Path(filepath)
-    file_hash = get_file_hash(filepath_obj)
-    _, text = run_ocr(filepath)
-    return (filepath, text, file_hash)
+
+def find_images(dir_path: Path, recursive: bool, since: float) -> list[str]:
+    """List image files, skipping hidden folders and files unchanged since `since`."""
+    found = []
+    for root, dirs, files in os.walk(dir_path):
+        if recursive:
+            dirs[:] = [d for d in dirs if not d.startswith(".")]
+        else:
+            dirs.clear()
+        for name in files:
+            if os.path.splitext(name)[1].lower() not in IMAGE_EXTENSIONS:
+                continue
+            path = os.path.join(root, name)
+            if since:
+                # ctime catches files moved or copied in with an old mtime
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                if max(st.st_mtime, st.st_ctime) <= since:
+                    continue
+            found.append(path)
+    return found
+
+
+def emit_ocr(filepath: str, text: str, completed: int, total: int) -> None:
+    """Print machine-readable progress and OCR text for one file."""
+    # Escape newlines in OCR text for single-line output
+    escaped_text = text.replace("\\", "\\\\").replace("\n", "\\n")
+    print(f"PROGRESS {completed}/{total}")
+    print(f"FILE {filepath}")
+    print(f"OCR {filepath}|{escaped_text}")
+    sys.stdout.flush()
 
 
 @click.command()
 @click.option("-d", "--directory", required=True, help="Directory to index")
 @click.option("-w", "--workers", default=2, help="Number of parallel workers")
+@click.option(
+    "-r",
+    "--recursive",
+    is_flag=True,
+    default=False,
+    help="Also index images in subfolders",
+)
+@click.option(
+    "--since",
+    default=0.0,
+    help="Only report files added or changed after this Unix time",
+)
 @click.option(
     "--machine_progress",
     is_flag=True,
     default=False,
     help="Print machine-readable progress",
 )
-def main(directory: str, workers: int, machine_progress: bool) -> None:
-    global _lang_str, _cache
-
+def main(
+    directory: str, workers: int, recursive: bool, since: float, machine_progress: bool
+) -> None:
     dir_path = Path(directory).expanduser().resolve()
     if not dir_path.exists() or not dir_path.is_dir():
         print(f"Error: {directory} is not a valid directory", file=sys.stderr)
         sys.exit(1)
 
-    # Get tesseract languages
-    _lang_str = get_tesseract_languages()
-
-    # Load existing cache
-    _cache = load_cache(str(dir_path))
-
-    # Find all image files
-    all_files = []
-    for f in dir_path.iterdir():
-        if f.is_file() and f.suffix.lower() in IMAGE_EXTENSIONS:
-            all_files.append(str(f))
+    all_files = find_images(dir_path, recursive, since)
 
     if not all_files:
         if machine_progress:
             print("PROGRESS 0/0")
         else:
-            print(f"No images found in {dir_path}")
+            changed = "new or changed " if since else ""
+            print(f"No {changed}images found in {dir_path}")
         return
 
-    # Filter to files that need processing (not in cache or changed)
-    files_to_process = []
-    for filepath in all_files:
-        path = Path(filepath)
-        file_hash = get_file_hash(path)
-        cached = _cache.get("files", {}).get(filepath, {})
-        if cached.get("hash") != file_hash:
-            files_to_process.append(filepath)
-
     if machine_progress:
         print(f"PROGRESS 0/{len(all_files)}")
         sys.stdout.flush()
 
-    # Process files that need OCR
-    if files_to_process:
-        completed = len(all_files) - len(files_to_process)
-
-        with Pool(processes=workers) as p:
-            for filepath, text, file_hash in p.imap(process_file, files_to_process):
-                # Update cache
-                if "files" not in _cache:
-                    _cache["files"] = {}
-                _cache["files"][filepath] = {"hash": file_hash, "text": text}
-
-                completed += 1
-                if machine_progress:
-                    # Escape newlines in OCR text for single-line output
-                    escaped_text = text.replace("\\", "\\\\").replace("\n", "\\n")
-                    print(f"PROGRESS {completed}/{len(all_files)}")
-                    print(f"FILE {filepath}")
-                    print(f"OCR {filepath}|{escaped_text}")
-                    sys.stdout.flush()
-
-        # Save updated cache
-        save_cache(str(dir_path), _cache)
-    else:
-        # All files already cached, output them
+    conn = ocr_store.open_store()
+
+    # Report files whose content is already in the store; group the rest by
+    # content hash so duplicate images are OCR'd once
+    completed = 0
+    pending: dict[str, list[str]] = {}
+    for filepath in all_files:
+        try:
+            content_hash = ocr_store.resolve_path(conn, Path(filepath))
+        except OSError:
+            completed += 1
+            continue
+        text = ocr_store.get_text(conn, content_hash)
+        if text is None:
+            pending.setdefault(content_hash, []).append(filepath)
+            continue
+        completed += 1
         if machine_progress:
-            for i, filepath in enumerate(all_files):
-                cached = _cache.get("files", {}).get(filepath, {})
-                text = cached.get("text", "")
-                escaped_text = text.replace("\\", "\\\\").replace("\n", "\\n")
-                print(f"PROGRESS {i + 1}/{len(all_files)}")
-                print(f"FILE {filepath}")
-                print(f"OCR {filepath}|{escaped_text}")
-                sys.stdout.flush()
+            emit_ocr(filepath, text, completed, len(all_files))
+
+    # Process files that need OCR. Failures aren't stored, and a non-zero exit
+    # keeps the caller from treating the directory as indexed, so they're
+    # retried on the next run
+    failed = 0
+    if pending:
+        lang_str = ocr_store.get_tesseract_languages()
+        jobs = [(content_hash, paths[0]) for content_hash, paths in pending.items()]
+
+        with Pool(
+            processes=workers, initializer=init_worker, initargs=(lang_str,)
+        ) as p:
+            for content_hash, text in p.imap(run_ocr, jobs):
+                if text is not None:
+                    ocr_store.put_text(conn, content_hash, text)
+                for filepath in pending[content_hash]:
+                    completed += 1
+                    if text is None:
+                        failed += 1
+                        if machine_progress:
+                            print(f"PROGRESS {completed}/{len(all_files)}")
+                            sys.stdout.flush()
+                    elif machine_progress:
+                        emit_ocr(filepath, text, completed, len(all_files))
 
     if not machine_progress:
         print(f"OCR indexing completed for {len(all_files)} files")
+        if failed:
+            print(f"OCR failed for {failed} files", file=sys.stderr)
+    if failed:
+        sys.exit(1)
 
 
 if __name__ == "__main__":
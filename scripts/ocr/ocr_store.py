@@ -0,0 +1,253 @@
+"""
+Shared OCR store for hamr.
+
+OCR text is stored once per image, keyed by a hash of the image content.
+Aliases map a file path (with its mtime and size) or a clipboard entry to that
+hash, so the same image is only OCR'd once whether it was seen by the
+clipboard indexer, the folder browser or the screenshot plugin.
+
+Store location: ~/.cache/hamr/ocr-store.db (SQLite, safe for concurrent use)
+
+Used by:
+  - plugins/clipboard (ocr-indexer.py and handler.py), aliases "cliphist:<id>"
+  - plugins/screenshot/handler.py, path aliases (OCR'd on ingest)
+  - scripts/ocr/ocr-index.py, path aliases
+"""
+
+import hashlib
+import os
+import sqlite3
+import subprocess
+from pathlib import Path
+
+STORE_DB = (
+    Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache"))
+    / "hamr"
+    / "ocr-store.db"
+)
+
+# Alias prefix for clipboard entries (suffix is the cliphist entry id)
+CLIPHIST_ALIAS = "cliphist:"
+
+# Read size when hashing image files
+HASH_CHUNK_SIZE = 1 << 20
+
+_lang_str: str | None = None
+
+
+def open_store() -> sqlite3.Connection:
+    """Open (or create) the OCR store."""
+    STORE_DB.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(STORE_DB, timeout=10)
+    conn.executescript(
+        """
+        PRAGMA journal_mode=WAL;
+        PRAGMA synchronous=NORMAL;
+        CREATE TABLE IF NOT EXISTS ocr (
+            content_hash TEXT PRIMARY KEY,
+            text TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS aliases (
+            alias TEXT PRIMARY KEY,
+            content_hash TEXT NOT NULL,
+            mtime_ns INTEGER NOT NULL DEFAULT 0,
+            size INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE INDEX IF NOT EXISTS aliases_content ON aliases(content_hash);
+        """
+    )
+    return conn
+
+
+def hash_bytes(data: bytes) -> str:
+    """Content hash for in-memory image data."""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def hash_file(path: Path) -> str:
+    """Content hash for an image file (same digest as hash_bytes)."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def get_text(conn: sqlite3.Connection, content_hash: str) -> str | None:
+    """Get stored OCR text for a content hash, or None if not OCR'd yet."""
+    row = conn.execute(
+        "SELECT text FROM ocr WHERE content_hash = ?", (content_hash,)
+    ).fetchone()
+    return row[0] if row else None
+
+
+def put_text(conn: sqlite3.Connection, content_hash: str, text: str) -> None:
+    """Store OCR text for a content hash."""
+    conn.execute(
+        "INSERT OR REPLACE INTO ocr (content_hash, text) VALUES (?, ?)",
+        (content_hash, text),
+    )
+    conn.commit()
+
+
+def set_alias(
+    conn: sqlite3.Connection,
+    alias: str,
+    content_hash: str,
+    mtime_ns: int = 0,
+    size: int = 0,
+) -> None:
+    """Point an alias (path or clipboard entry) at a content hash."""
+    conn.execute(
+        "INSERT OR REPLACE INTO aliases (alias, content_hash, mtime_ns, size)"
+        " VALUES (?, ?, ?, ?)",
+        (alias, content_hash, mtime_ns, size),
+    )
+    conn.commit()
+
+
+def get_alias_hash(conn: sqlite3.Connection, alias: str) -> str | None:
+    """Get the content hash an alias points at."""
+    row = conn.execute(
+        "SELECT content_hash FROM aliases WHERE alias = ?", (alias,)
+    ).fetchone()
+    return row[0] if row else None
+
+
+def remove_aliases(conn: sqlite3.Connection, aliases: list[str]) -> None:
+    """Drop aliases, and any OCR text no longer referenced by an alias."""
+    conn.executemany("DELETE FROM aliases WHERE alias = ?", [(a,) for a in aliases])
+    conn.execute(
+        "DELETE FROM ocr WHERE content_hash NOT IN (SELECT content_hash FROM aliases)"
+    )
+    conn.commit()
+
+
+def remove_alias_prefix(conn: sqlite3.Connection, prefix: str) -> None:
+    """Drop all aliases starting with prefix (e.g. every clipboard entry)."""
+    aliases = [
+        row[0]
+        for row in conn.execute(
+            "SELECT alias FROM aliases WHERE substr(alias, 1, ?) = ?",
+            (len(prefix), prefix),
+        )
+    ]
+    remove_aliases(conn, aliases)
+
+
+def get_texts_by_prefix(conn: sqlite3.Connection, prefix: str) -> dict[str, str]:
+    """Get {alias suffix: OCR text} for every OCR'd alias starting with prefix."""
+    rows = conn.execute(
+        "SELECT aliases.alias, ocr.text FROM aliases"
+        " JOIN ocr ON ocr.content_hash = aliases.content_hash"
+        " WHERE substr(aliases.alias, 1, ?) = ?",
+        (len(prefix), prefix),
+    )
+    return {alias[len(prefix) :]: text for alias, text in rows}
+
+
+def resolve_path(conn: sqlite3.Connection, path: Path) -> str:
+    """Get the content hash for a file, rehashing only if it changed on disk."""
+    alias = str(path)
+    st = path.stat()
+    row = conn.execute(
+        "SELECT content_hash, mtime_ns, size FROM aliases WHERE alias = ?", (alias,)
+    ).fetchone()
+    if row and row[1] == st.st_mtime_ns and row[2] == st.st_size:
+        return row[0]
+
+    content_hash = hash_file(path)
+    set_alias(conn, alias, content_hash, st.st_mtime_ns, st.st_size)
+    return content_hash
+
+
+def get_tesseract_languages() -> str:
+    """Get available tesseract languages as a + separated string (once per process)."""
+    global _lang_str
+    if _lang_str is not None:
+        return _lang_str
+    try:
+        result = subprocess.run(
+            ["tesseract", "--list-langs"],
+            capture_output=True,
+            text=True,
+            timeout=5,
+        )
+        langs = [
+            lang.strip()
+            for lang in result.stdout.strip().split("\n")[1:]
+            if lang.strip()
+        ]
+        _lang_str = "+".join(langs) if langs else "eng"
+    except (subprocess.TimeoutExpired, FileNotFoundError, subprocess.SubprocessError):
+        _lang_str = "eng"
+    return _lang_str
+
+
+def run_tesseract(
+    source: str = "stdin",
+    image_data: bytes | None = None,
+    lang_str: str = "",
+    niceness: int = 0,
+) -> str | None:
+    """Run tesseract on a file path, or on image_data when source is "stdin".
+
+    A non-zero niceness runs it at lower CPU priority (background indexing).
+    Returns None if tesseract is missing or failed, so the failure isn't
+    stored as an image without text.
+    """
+    try:
+        result = subprocess.run(
+            (["nice", "-n", str(niceness)] if niceness else [])
+            + [
+                "tesseract",
+                source,
+                "stdout",
+                "-l",
+                lang_str or get_tesseract_languages(),
+                "--psm",
+                "3",
+            ],
+            input=image_data,
+            capture_output=True,
+            timeout=30,
+        )
+    except (subprocess.TimeoutExpired, FileNotFoundError, subprocess.SubprocessError):
+        return None
+    if result.returncode != 0:
+        return None
+    return result.stdout.decode("utf-8", errors="replace").strip()
+
+
+def ocr_file(
+    conn: sqlite3.Connection, path: Path, lang_str: str = "", niceness: int = 0
+) -> str | None:
+    """Get OCR text for an image file, running tesseract only for unseen content.
+
+    Returns None if tesseract failed; nothing is stored, so it's retried later.
+    """
+    content_hash = resolve_path(conn, path)
+    text = get_text(conn, content_hash)
+    if text is None:
+        text = run_tesseract(str(path), lang_str=lang_str, niceness=niceness)
+        if text is not None:
+            put_text(conn, content_hash, text)
+    return text
+
+
+def ocr_bytes(
+    conn: sqlite3.Connection, image_data: bytes, alias: str = "", lang_str: str = ""
+) -> str | None:
+    """Get OCR text for image data, running tesseract only for unseen content.
+
+    Returns None if tesseract failed; nothing is stored, so it's retried later.
+    """
+    content_hash = hash_bytes(image_data)
+    if alias:
+        set_alias(conn, alias, content_hash)
+    text = get_text(conn, content_hash)
+    if text is None:
+        text = run_tesseract("stdin", image_data, lang_str)
+        if text is not None:
+            put_text(conn, content_hash, text)
+    return text
@@ -5,11 +5,13 @@
 # Since the script is small and the maintainers seem inactive to accept my PR (#11) I decided to just copy it over.
 # When it gets merged and the python package gets updated we can just use it
 
+import hashlib
 import os
 import sys
 from multiprocessing import Pool
 from pathlib import Path
 from typing import List, Union
+from urllib.parse import quote
 
 import click
 import gi
@@ -26,24 +28,55 @@ thumbnail_size_map = {
     "xx-large": GnomeDesktop.DesktopThumbnailSize.XXLARGE,
 }
 
+THUMBNAIL_CACHE_DIR = (
+    Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "thumbnails"
+)
+# Characters g_filename_to_uri() leaves unescaped in a path
+URI_SAFE_CHARS = "/!$&'()*+,;=:@"
+
 factory = None
+thumbnail_size = "normal"
 logger.remove()
 logger.add(sys.stdout, level="INFO")
 logger.add("/tmp/thumbgen.log", level="DEBUG", rotation="100 MB")
 
 
+def get_uri(fpath: str) -> str:
+    """file:// URI for a path, escaped the same way Gio does."""
+    return "file://" + quote(os.path.abspath(fpath), safe=URI_SAFE_CHARS)
+
+
+def get_thumbnail_path(uri: str, size: str) -> Path:
+    """Freedesktop thumbnail location: <cache>/thumbnails/<size>/<md5(uri)>.png"""
+    return THUMBNAIL_CACHE_DIR / size / (hashlib.md5(uri.encode()).hexdigest() + ".png")
+
+
+def is_fresh(uri: str, size: str, mtime: float) -> bool:
+    """Whether a thumbnail exists and is newer than its source (no Gio calls)."""
+    try:
+        return get_thumbnail_path(uri, size).stat().st_mtime >= mtime
+    except OSError:
+        return False
+
+
+def init_factory(size: str) -> None:
+    global factory, thumbnail_size
+    factory = GnomeDesktop.DesktopThumbnailFactory.new(thumbnail_size_map[size])
+    thumbnail_size = size
+
+
 def make_thumbnail(fpath: str) -> bool:
     mtime = os.path.getmtime(fpath)
-    # Use Gio to determine the URI and mime type
+    uri = get_uri(fpath)
+    if is_fresh(uri, thumbnail_size, mtime):
+        logger.debug("FRESH       {}".format(uri))
+        return False
+
+    # Only stale files pay for a Gio content type lookup
     f = Gio.file_new_for_path(str(fpath))
-    uri = f.get_uri()
     info = f.query_info("standard::content-type", Gio.FileQueryInfoFlags.NONE, None)
     mime_type = info.get_content_type()
 
-    if factory.lookup(uri, mtime) is not None:
-        logger.debug("FRESH       {}".format(uri))
-        return False
-
     if not factory.can_thumbnail(uri, mime_type, mtime):
         logger.debug("UNSUPPORTED {}".format(uri))
         return False
@@ -121,7 +154,12 @@ def get_all_files(*, dir_path: Path, recursive: bool) -> List[Path]:
     type=click.Choice(["normal", "large", "x-large", "xx-large"]),
     help="Thumbnail size: normal, large, x-large, xx-large",
 )
-@click.option("-w", "--workers", default=1, help="no of cpus to use for processing")
+@click.option(
+    "-w",
+    "--workers",
+    default=len(os.sched_getaffinity(0)),
+    help="no of cpus to use for processing (default: all available)",
+)
 @click.option(
     "-i",
     "--only_images",
@@ -151,8 +189,7 @@ def main(
     machine_progress: bool,
 ) -> None:
     img_dirs = [Path(img_dir) for img_dir in img_dirs.split()]
-    global factory
-    factory = GnomeDesktop.DesktopThumbnailFactory.new(thumbnail_size_map[size])
+    init_factory(size)
     for img_dir in img_dirs:
         thumbnail_folder(
             dir_path=img_dir,
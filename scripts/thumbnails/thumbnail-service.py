@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""
+Long-running thumbnail service for FolderBrowser.
+
+Keeps freedesktop thumbnails current for every directory the image browser
+has visited, instead of re-checking a whole folder on each visit:
+  - freshness is a stat of the thumbnail path (md5 of the file URI) against
+    the source mtime, so up-to-date files never reach Gio or a worker
+  - visited directories are watched with inotify; new or rewritten images
+    are thumbnailed as they appear and revisits cost nothing
+  - generation runs in a process pool sized to the available cores, with
+    the files currently visible in the grid queued first
+  - if a worker crashes (e.g. GnomeDesktop on a bad image) the pool is
+    recreated and the jobs that were in flight are retried one at a time;
+    the one that crashes on its own is counted as failed
+
+Thumbnails are generated with thumbgen.py (GnomeDesktop), or ImageMagick when
+GnomeDesktop isn't available.
+
+Input (JSON lines on stdin):
+  {"watch": "/dir", "size": "large", "visible": ["/dir/a.png", ...]}
+  {"size": "large", "visible": [...]}   reprioritize without changing dirs
+
+Output (lines on stdout, same format as thumbgen.py --machine_progress):
+  PROGRESS <completed>/<total> FILE <path>
+  DONE <dir>
+"""
+
+import ctypes
+import hashlib
+import json
+import mimetypes
+import os
+import select
+import signal
+import struct
+import subprocess
+import sys
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from urllib.parse import quote
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+try:
+    import thumbgen  # noqa: E402
+
+    thumbgen.logger.remove()
+except (ImportError, ValueError):
+    thumbgen = None
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp", ".avif", ".bmp", ".svg", ".gif"}
+THUMBNAIL_SIZES = {"normal": 128, "large": 256, "x-large": 512, "xx-large": 1024}
+
+# Jobs handed to the pool at once; the rest stay queued so visible files
+# requested later can still jump ahead
+IN_FLIGHT_PER_WORKER = 2
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+EVENT_HEADER = struct.Struct("iIII")
+
+_factories: dict = {}
+
+
+def uri_for(path: str) -> str:
+    if thumbgen:
+        return thumbgen.get_uri(path)
+    # Same escaping as thumbgen.get_uri, for the ImageMagick fallback
+    return "file://" + quote(os.path.abspath(path), safe="/!$&'()*+,;=:@")
+
+
+def thumbnail_path(path: str, size: str) -> Path:
+    if thumbgen:
+        return thumbgen.get_thumbnail_path(uri_for(path), size)
+    cache = Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache"))
+    digest = hashlib.md5(uri_for(path).encode()).hexdigest()
+    return cache / "thumbnails" / size / f"{digest}.png"
+
+
+def is_fresh(path: str, size: str) -> bool:
+    """Whether the thumbnail exists and is newer than the source file."""
+    try:
+        mtime = os.stat(path).st_mtime
+        return thumbnail_path(path, size).stat().st_mtime >= mtime
+    except OSError:
+        return False
+
+
+def generate(path: str, size: str) -> bool:
+    """Worker: write the thumbnail for one file. Returns True on success."""
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return False
+    uri = uri_for(path)
+
+    if thumbgen:
+        factory = _factories.get(size)
+        if factory is None:
+            factory = thumbgen.GnomeDesktop.DesktopThumbnailFactory.new(
+                thumbgen.thumbnail_size_map[size]
+            )
+            _factories[size] = factory
+        mime_type = mimetypes.guess_type(path)[0] or ""
+        if not factory.can_thumbnail(uri, mime_type, mtime):
+            return False
+        thumbnail = factory.generate_thumbnail(uri, mime_type)
+        if thumbnail is None:
+            return False
+        factory.save_thumbnail(thumbnail, uri, mtime)
+        return True
+
+    if path.lower().endswith(".gif"):
+        return False
+    out = thumbnail_path(path, size)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    px = THUMBNAIL_SIZES[size]
+    try:
+        result = subprocess.run(
+            ["magick", path, "-resize", f"{px}x{px}", str(out)],
+            capture_output=True,
+            timeout=60,
+        )
+        return result.returncode == 0
+    except (subprocess.TimeoutExpired, FileNotFoundError):
+        return False
+
+
+class ThumbnailService:
+    def __init__(self, workers: int):
+        self.workers = workers
+        self.executor = ProcessPoolExecutor(max_workers=workers)
+        self.urgent: deque[tuple[str, str]] = deque()
+        self.queue: deque[tuple[str, str]] = deque()
+        self.queued: set[tuple[str, str]] = set()
+        self.in_flight: dict[Future, tuple[str, str]] = {}
+        # Jobs in flight when a worker crashed, retried one at a time
+        self.suspects: deque[tuple[str, str]] = deque()
+        self.isolated: tuple[str, str] | None = None
+        # (dir, size) -> [completed, total] for the current batch
+        self.progress: dict[tuple[str, str], list[int]] = {}
+        self.watched: dict[str, set[str]] = {}  # dir -> sizes kept fresh
+        self.wd_dirs: dict[int, str] = {}
+
+        self.wake_r, self.wake_w = os.pipe()
+        os.set_blocking(self.wake_r, False)
+        self.libc = ctypes.CDLL("libc.so.6", use_errno=True)
+        self.inotify_fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+
+    def enqueue(self, path: str, size: str, urgent: bool = False) -> bool:
+        """Queue a stale file. Returns False if it's fresh or already queued."""
+        job = (path, size)
+        if job in self.queued:
+            if urgent:
+                self.urgent.appendleft(job)
+            return False
+        if os.path.splitext(path)[1].lower() not in IMAGE_EXTENSIONS:
+            return False
+        if is_fresh(path, size):
+            return False
+        self.queued.add(job)
+        if urgent:
+            self.urgent.appendleft(job)
+        else:
+            self.queue.append(job)
+        counts = self.progress.setdefault((os.path.dirname(path), size), [0, 0])
+        counts[1] += 1
+        return True
+
+    def watch(self, directory: str, size: str, visible: list[str]) -> None:
+        """Start keeping a directory fresh at a size. Revisits are free."""
+        directory = directory.rstrip("/") or "/"
+        self.prioritize(size, visible)
+
+        sizes = self.watched.setdefault(directory, set())
+        if size not in sizes:
+            sizes.add(size)
+            if self.inotify_fd >= 0 and len(sizes) == 1:
+                wd = self.libc.inotify_add_watch(
+                    self.inotify_fd, directory.encode(), IN_CLOSE_WRITE | IN_MOVED_TO
+                )
+                if wd >= 0:
+                    self.wd_dirs[wd] = directory
+            try:
+                with os.scandir(directory) as it:
+                    for entry in it:
+                        if entry.is_file():
+                            self.enqueue(entry.path, size)
+            except OSError:
+                pass
+
+        if (directory, size) not in self.progress:
+            emit(f"DONE {directory}")
+
+    def prioritize(self, size: str, visible: list[str]) -> None:
+        """Move visible files to the front of the queue, in display order."""
+        for path in reversed(visible):
+            self.enqueue(path, size, urgent=True)
+
+    def read_events(self) -> None:
+        try:
+            buf = os.read(self.inotify_fd, 65536)
+        except OSError:
+            return
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(buf):
+            wd, _mask, _cookie, length = EVENT_HEADER.unpack_from(buf, offset)
+            name = buf[offset + EVENT_HEADER.size : offset + EVENT_HEADER.size + length]
+            offset += EVENT_HEADER.size + length
+            directory = self.wd_dirs.get(wd)
+            if directory is None:
+                continue
+            path = os.path.join(directory, os.fsdecode(name.rstrip(b"\0")))
+            for size in self.watched.get(directory, ()):
+                self.enqueue(path, size)
+
+    def dispatch(self) -> None:
+        while len(self.in_flight) < self.workers * IN_FLIGHT_PER_WORKER:
+            isolated = False
+            if self.suspects:
+                if self.in_flight:
+                    return
+                job = self.suspects.popleft()
+                isolated = True
+            elif self.urgent:
+                job = self.urgent.popleft()
+            elif self.queue:
+                job = self.queue.popleft()
+            else:
+                return
+            if job not in self.queued or job in self.in_flight.values():
+                continue  # Duplicate of a job already handed out
+            try:
+                future = self.executor.submit(generate, *job)
+            except BrokenProcessPool:
+                (self.suspects if isolated else self.urgent).appendleft(job)
+                self.reset_pool()
+                continue
+            future.add_done_callback(lambda _f: os.write(self.wake_w, b"."))
+            self.in_flight[future] = job
+            if isolated:
+                self.isolated = job
+                return
+
+    def reset_pool(self) -> None:
+        """Replace a pool whose worker died and requeue the jobs it lost."""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        crashed = list(self.in_flight.values())
+        self.in_flight.clear()
+        if self.isolated is not None and crashed == [self.isolated]:
+            self.finish(self.isolated)  # Crashed on its own: give up on it
+        else:
+            self.suspects.extend(crashed)
+        self.isolated = None
+
+    def finish(self, job: tuple[str, str]) -> None:
+        """Count a job as done (successfully or not) and report progress."""
+        path, size = job
+        self.queued.discard(job)
+        if job == self.isolated:
+            self.isolated = None
+        key = (os.path.dirname(path), size)
+        counts = self.progress.get(key)
+        if counts is None:
+            return
+        counts[0] += 1
+        emit(f"PROGRESS {counts[0]}/{counts[1]} FILE {path}")
+        if counts[0] >= counts[1]:
+            del self.progress[key]
+            emit(f"DONE {key[0]}")
+
+    def collect(self) -> None:
+        try:
+            os.read(self.wake_r, 4096)
+        except BlockingIOError:
+            pass
+        broken = False
+        for future in [f for f in self.in_flight if f.done()]:
+            if isinstance(future.exception(), BrokenProcessPool):
+                broken = True
+                continue
+            self.finish(self.in_flight.pop(future))
+        if broken:
+            self.reset_pool()
+
+    def handle_command(self, line: str) -> None:
+        try:
+            command = json.loads(line)
+        except json.JSONDecodeError:
+            return
+        size = command.get("size", "normal")
+        if size not in THUMBNAIL_SIZES:
+            return
+        visible = [p for p in command.get("visible", []) if isinstance(p, str)]
+        if command.get("watch"):
+            self.watch(command["watch"], size, visible)
+        else:
+            self.prioritize(size, visible)
+
+    def run(self) -> None:
+        watched = [sys.stdin, self.wake_r]
+        if self.inotify_fd >= 0:
+            watched.append(self.inotify_fd)
+        while True:
+            self.dispatch()
+            readable, _, _ = select.select(watched, [], [])
+            if self.wake_r in readable:
+                self.collect()
+            if self.inotify_fd in readable:
+                self.read_events()
+            if sys.stdin in readable:
+                line = sys.stdin.readline()
+                if not line:
+                    break
+                self.handle_command(line)
+
+
+def emit(line: str) -> None:
+    print(line, flush=True)
+
+
+def main() -> None:
+    signal.signal(signal.SIGTERM, lambda s, f: sys.exit(0))
+    service = ThumbnailService(workers=len(os.sched_getaffinity(0)))
+    try:
+        service.run()
+    finally:
+        service.executor.shutdown(wait=False, cancel_futures=True)
+
+
+if __name__ == "__main__":
+    main()
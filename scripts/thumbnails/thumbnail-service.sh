@@ -0,0 +1,7 @@
+#!/usr/bin/env bash
+# Long-running thumbnail service wrapper (see thumbnail-service.py)
+# Dependencies: python-click python-loguru python-tqdm python-gobject gnome-desktop-4
+# (falls back to ImageMagick without them)
+
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+GIO_USE_VFS=local exec python3 "$SCRIPT_DIR/thumbnail-service.py" "$@"
@@ -16,8 +16,7 @@ import Quickshell.Io
 Singleton {
     id: root
 
-    property string thumbgenScriptPath: `${FileUtils.trimFileProtocol(Directories.scriptPath)}/thumbnails/thumbgen.sh`
-    property string generateThumbnailsMagickScriptPath: `${FileUtils.trimFileProtocol(Directories.scriptPath)}/thumbnails/generate-thumbnails-magick.sh`
+    property string thumbnailServiceScriptPath: `${FileUtils.trimFileProtocol(Directories.scriptPath)}/thumbnails/thumbnail-service.sh`
     property string ocrIndexScriptPath: `${FileUtils.trimFileProtocol(Directories.scriptPath)}/ocr/ocr-index.sh`
     property alias directory: folderModel.folder
     readonly property string effectiveDirectory: FileUtils.trimFileProtocol(folderModel.folder.toString())
@@ -28,13 +27,18 @@ Singleton {
         "jpg", "jpeg", "png", "webp", "avif", "bmp", "svg"
     ]
     property list<string> files: [] // List of absolute file paths (without file://)
-    readonly property bool thumbnailGenerationRunning: thumbgenProc.running
+    readonly property bool thumbnailGenerationRunning: thumbnailPendingDirectory !== ""
     property real thumbnailGenerationProgress: 0
+    property string thumbnailPendingDirectory: ""  // Directory the service is still working on
+    property string thumbnailSize: "normal"
     
     // OCR indexing
     readonly property bool ocrIndexingRunning: ocrProc.running
     property real ocrIndexingProgress: 0
-    property var ocrIndex: ({})  // Map of filePath -> OCR text
+    property var ocrIndex: ({})  // Map of filePath -> OCR text (mutated in place, see ocrIndexVersion)
+    property int ocrIndexVersion: 0  // Bumped after each applied batch of OCR results
+    property string ocrIndexDirectory: ""  // Directory ocrIndex belongs to
+    property real ocrIndexedAt: 0  // Unix time of the last completed run for ocrIndexDirectory
     property bool ocrEnabled: false  // Set to true to enable OCR indexing for current directory
 
     signal changed()
@@ -99,14 +103,10 @@ Singleton {
         showOnlyReadable: true
         sortField: FolderListModel.Time
         sortReversed: false
+        // Count changes once per loaded chunk; rebuild at most once per frame
         onCountChanged: {
-            root.files = []
-            for (let i = 0; i < folderModel.count; i++) {
-                const path = folderModel.get(i, "filePath") || FileUtils.trimFileProtocol(folderModel.get(i, "fileURL"))
-                if (path && path.length) root.files.push(path)
-            }
-            // Rebuild filtered model when source changes
-            root.rebuildFilteredModel()
+            root._sourceDirty = true
+            if (!frameTimer.running) frameTimer.start()
         }
     }
     
@@ -116,100 +116,194 @@ Singleton {
     }
     property alias filteredModel: filteredFolderModel
     
+    // Per source row (folderModel order): lowercased name and whether it is a dir
+    property var _sourcePaths: []
+    property var _sourceNamesLower: []
+    property var _sourceIsDir: []
+    property var _sourceIndexByPath: ({})
+    // folderModel index of each filteredFolderModel row (ascending)
+    property var _filteredSourceIndex: []
+    // Lowercased OCR text per file, computed once when the result arrives
+    property var _ocrLower: ({})
+    property var _queryParts: []
+    property bool _sourceDirty: false
+    property var _pendingOcr: []  // [filePath, text] pairs waiting for the next frame
+    
+    // Applies source changes and OCR results in batches, once per frame
+    Timer {
+        id: frameTimer
+        interval: 16
+        onTriggered: {
+            if (root._sourceDirty) {
+                root._sourceDirty = false
+                root.reloadSource()
+            }
+            if (root._pendingOcr.length > 0) {
+                root.applyOcrBatch()
+            }
+        }
+    }
+    
+    function reloadSource() {
+        const paths = [], names = [], dirs = [], byPath = {}
+        for (let i = 0; i < folderModel.count; i++) {
+            const path = folderModel.get(i, "filePath") || FileUtils.trimFileProtocol(folderModel.get(i, "fileURL"))
+            paths.push(path)
+            names.push((folderModel.get(i, "fileName") ?? "").toLowerCase())
+            dirs.push(folderModel.get(i, "fileIsDir"))
+            byPath[path] = i
+        }
+        root._sourcePaths = paths
+        root._sourceNamesLower = names
+        root._sourceIsDir = dirs
+        root._sourceIndexByPath = byPath
+        root.files = paths.filter(path => path && path.length)
+        // Rebuild filtered model when source changes
+        root.rebuildFilteredModel()
+    }
+    
+    function sourceRowMatches(i) {
+        // Directories always pass (user can navigate); no query = show all files
+        if (root._sourceIsDir[i] || root._queryParts.length === 0) return true
+        const parts = root._queryParts
+        const name = root._sourceNamesLower[i]
+        if (parts.every(part => name.includes(part))) return true
+        const ocrText = root._ocrLower[root._sourcePaths[i]]
+        return !!ocrText && parts.every(part => ocrText.includes(part))
+    }
+    
+    function filteredRow(i) {
+        return {
+            filePath: root._sourcePaths[i],
+            fileName: folderModel.get(i, "fileName"),
+            fileIsDir: root._sourceIsDir[i]
+        }
+    }
+    
     // Rebuild filtered model based on searchQuery and OCR index
     function rebuildFilteredModel() {
-        filteredFolderModel.clear();
-        
         const query = root.searchQuery.trim().toLowerCase();
-        const queryParts = query ? query.split(/\s+/).filter(s => s.length > 0) : [];
+        root._queryParts = query ? query.split(/\s+/).filter(s => s.length > 0) : [];
         
-        for (let i = 0; i < folderModel.count; i++) {
-            const filePath = folderModel.get(i, "filePath") || FileUtils.trimFileProtocol(folderModel.get(i, "fileURL"));
-            const fileName = folderModel.get(i, "fileName");
-            const fileIsDir = folderModel.get(i, "fileIsDir");
-            
-            // Directories always pass (user can navigate)
-            if (fileIsDir) {
-                filteredFolderModel.append({
-                    filePath: filePath,
-                    fileName: fileName,
-                    fileIsDir: fileIsDir
-                });
-                continue;
-            }
-            
-            // No query = show all files
-            if (queryParts.length === 0) {
-                filteredFolderModel.append({
-                    filePath: filePath,
-                    fileName: fileName,
-                    fileIsDir: fileIsDir
-                });
-                continue;
-            }
-            
-            // Check filename match
-            const fileNameLower = fileName.toLowerCase();
-            const fileNameMatches = queryParts.every(part => fileNameLower.includes(part));
-            
-            // Check OCR text match (if OCR is enabled and indexed)
-            const ocrText = root.ocrIndex[filePath] ?? "";
-            const ocrTextLower = ocrText.toLowerCase();
-            const ocrMatches = ocrText && queryParts.every(part => ocrTextLower.includes(part));
-            
-            if (fileNameMatches || ocrMatches) {
-                filteredFolderModel.append({
-                    filePath: filePath,
-                    fileName: fileName,
-                    fileIsDir: fileIsDir
-                });
+        filteredFolderModel.clear();
+        const rows = [];
+        const sourceIndex = [];
+        for (let i = 0; i < root._sourcePaths.length; i++) {
+            if (root.sourceRowMatches(i)) {
+                rows.push(root.filteredRow(i));
+                sourceIndex.push(i);
             }
         }
+        filteredFolderModel.append(rows);
+        root._filteredSourceIndex = sourceIndex;
     }
     
-    // Rebuild filter when search query changes
-    onSearchQueryChanged: rebuildFilteredModel()
+    // Insert or remove the filtered row for one source row if its match changed
+    function refilterSourceRow(i) {
+        const sourceIndex = root._filteredSourceIndex
+        let lo = 0, hi = sourceIndex.length
+        while (lo < hi) {
+            const mid = (lo + hi) >> 1
+            if (sourceIndex[mid] < i) lo = mid + 1; else hi = mid
+        }
+        const present = lo < sourceIndex.length && sourceIndex[lo] === i
+        const matches = root.sourceRowMatches(i)
+        if (matches && !present) {
+            filteredFolderModel.insert(lo, root.filteredRow(i))
+            sourceIndex.splice(lo, 0, i)
+        } else if (!matches && present) {
+            filteredFolderModel.remove(lo)
+            sourceIndex.splice(lo, 1)
+        }
+    }
     
-    // Rebuild filter when OCR index updates
-    onOcrIndexChanged: {
-        if (searchQuery.trim().length > 0) {
-            rebuildFilteredModel()
+    function applyOcrBatch() {
+        const batch = root._pendingOcr
+        root._pendingOcr = []
+        for (const [filePath, text] of batch) {
+            root.ocrIndex[filePath] = text
+            root._ocrLower[filePath] = text.toLowerCase()
+        }
+        // Only files whose text changed can change the filter
+        if (root._queryParts.length > 0) {
+            for (const [filePath] of batch) {
+                const i = root._sourceIndexByPath[filePath]
+                if (i !== undefined) root.refilterSourceRow(i)
+            }
+        }
+        root.ocrIndexVersion++
+        for (const [filePath, text] of batch) {
+            root.ocrIndexedFile(filePath, text)
         }
     }
+    
+    // Rebuild filter when search query changes
+    onSearchQueryChanged: rebuildFilteredModel()
 
     // Thumbnail generation
-    function generateThumbnail(size: string) {
+    // A long-running service keeps visited directories fresh (watching them for
+    // new images), so revisiting a folder doesn't re-check every file.
+    function generateThumbnail(size: string, visiblePaths) {
         if (!["normal", "large", "x-large", "xx-large"].includes(size)) throw new Error("Invalid thumbnail size");
-        thumbgenProc.directory = root.directory
-        thumbgenProc.running = false
-        thumbgenProc.command = [
-            "bash", "-c",
-            `${thumbgenScriptPath} --size ${size} --machine_progress -d ${FileUtils.trimFileProtocol(root.directory)} || ${generateThumbnailsMagickScriptPath} --size ${size} -d ${FileUtils.trimFileProtocol(root.directory)}`,
-        ]
+        root.thumbnailSize = size
+        root.thumbnailPendingDirectory = root.effectiveDirectory.replace(/\/+$/, "") || "/"
         root.thumbnailGenerationProgress = 0
-        thumbgenProc.running = true
+        thumbnailService.send({
+            watch: root.thumbnailPendingDirectory,
+            size: size,
+            visible: visiblePaths ?? []
+        })
+    }
+
+    // Move files currently on screen to the front of the thumbnail queue
+    function prioritizeThumbnails(visiblePaths) {
+        if (!thumbnailService.running || visiblePaths.length === 0) return
+        thumbnailService.send({ size: root.thumbnailSize, visible: visiblePaths })
     }
 
     Process {
-        id: thumbgenProc
-        property string directory
+        id: thumbnailService
+        property var pendingCommands: []
+        command: [root.thumbnailServiceScriptPath]
+        stdinEnabled: true
+
+        function send(commandData) {
+            const line = JSON.stringify(commandData) + "\n"
+            if (running) {
+                write(line)
+            } else {
+                pendingCommands.push(line)
+                running = true
+            }
+        }
+
+        onStarted: {
+            for (const line of pendingCommands) write(line)
+            pendingCommands = []
+        }
+
         stdout: SplitParser {
             onRead: data => {
-                let match = data.match(/PROGRESS (\d+)\/(\d+)/)
+                let match = data.match(/^DONE (.+)/)
                 if (match) {
-                    const completed = parseInt(match[1])
-                    const total = parseInt(match[2])
-                    root.thumbnailGenerationProgress = completed / total
+                    if (match[1] === root.thumbnailPendingDirectory) {
+                        root.thumbnailPendingDirectory = ""
+                    }
+                    root.thumbnailGenerated(match[1])
+                    return
                 }
-                match = data.match(/FILE (.+)/)
+                match = data.match(/PROGRESS (\d+)\/(\d+) FILE (.+)/)
                 if (match) {
-                    const filePath = match[1]
+                    const filePath = match[3]
+                    if (FileUtils.parentDirectory(filePath) === root.thumbnailPendingDirectory) {
+                        root.thumbnailGenerationProgress = parseInt(match[1]) / parseInt(match[2])
+                    }
                     root.thumbnailGeneratedFile(filePath)
                 }
             }
         }
         onExited: (exitCode, exitStatus) => {
-            root.thumbnailGenerated(thumbgenProc.directory)
+            root.thumbnailPendingDirectory = ""
         }
     }
     
@@ -219,12 +313,26 @@ Singleton {
     function generateOcrIndex() {
         if (ocrProc.running) return;
         
+        // Revisiting the indexed directory only fetches files changed since
+        // the last completed run; anything else starts from scratch
+        let sinceArg = "";
+        if (root.ocrIndexDirectory === root.effectiveDirectory && root.ocrIndexedAt > 0) {
+            sinceArg = ` --since ${root.ocrIndexedAt}`;
+        } else {
+            root.ocrIndex = {};
+            root._ocrLower = {};
+            root._pendingOcr = [];
+            root.ocrIndexedAt = 0;
+            root.ocrIndexDirectory = root.effectiveDirectory;
+        }
+        
         ocrProc.directory = root.effectiveDirectory;
-        root.ocrIndex = {};
+        // Allow for coarse filesystem timestamps
+        ocrProc.startedAt = Date.now() / 1000 - 2;
         root.ocrIndexingProgress = 0;
         ocrProc.command = [
             "bash", "-c",
-            `${ocrIndexScriptPath} -d "${root.effectiveDirectory}" --machine_progress`
+            `${ocrIndexScriptPath} -d "${root.effectiveDirectory}" --machine_progress${sinceArg}`
         ];
         ocrProc.running = true;
     }
@@ -232,11 +340,10 @@ Singleton {
     // Check if a file's OCR text matches the search query
     function fileMatchesOcrQuery(filePath: string, query: string): bool {
         if (!query || query.trim() === "") return true;
-        const ocrText = root.ocrIndex[filePath] ?? "";
-        if (!ocrText) return false;
+        const textLower = root._ocrLower[filePath] ?? "";
+        if (!textLower) return false;
         
         const queryLower = query.toLowerCase();
-        const textLower = ocrText.toLowerCase();
         const queryParts = queryLower.split(/\s+/).filter(s => s.length > 0);
         
         return queryParts.every(part => textLower.includes(part));
@@ -250,6 +357,7 @@ Singleton {
     Process {
         id: ocrProc
         property string directory
+        property real startedAt: 0
         stdout: SplitParser {
             onRead: data => {
                 // Parse PROGRESS lines
@@ -264,19 +372,20 @@ Singleton {
                 match = data.match(/^OCR (.+?)\|(.*)$/)
                 if (match) {
                     const filePath = match[1]
-                    // Unescape newlines
-                    const text = match[2].replace(/\\n/g, "\n").replace(/\\\\/g, "\\")
-                    
-                    // Update index (use Object.assign for QML JS compatibility)
-                    const newIndex = Object.assign({}, root.ocrIndex)
-                    newIndex[filePath] = text
-                    root.ocrIndex = newIndex
+                    // Unescape \n and \\ in one pass
+                    const text = match[2].replace(/\\(n|\\)/g, (_, c) => c === "n" ? "\n" : "\\")
                     
-                    root.ocrIndexedFile(filePath, text)
+                    // Applied with other results on the next frame
+                    root._pendingOcr.push([filePath, text])
+                    if (!frameTimer.running) frameTimer.start()
                 }
             }
         }
         onExited: (exitCode, exitStatus) => {
+            if (root._pendingOcr.length > 0) root.applyOcrBatch()
+            if (exitCode === 0 && ocrProc.directory === root.ocrIndexDirectory) {
+                root.ocrIndexedAt = ocrProc.startedAt
+            }
             root.ocrIndexed(ocrProc.directory)
         }
     }
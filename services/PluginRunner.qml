@@ -1074,6 +1074,12 @@ Singleton {
                    // Patch the index with updated item data (for live updates)
                    if (response.items && Array.isArray(response.items)) {
                        root.patchIndexItems(pluginId, response.items);
+                       // Lazy preview of a focused indexed item (main search)
+                       const focused = GlobalStates.previewItem;
+                       if (!isActive && focused?._pluginId === pluginId) {
+                           const patch = response.items.find(i => i.id === focused.id && i.preview !== undefined);
+                           if (patch) focused.preview = patch.preview;
+                       }
                    }
                    // Also process UI update if plugin is active
                    if (isActive) {
@@ -1736,6 +1742,62 @@ Singleton {
            }
        }
     
+       // Request the next page of a paged gridBrowser (sent as the user scrolls)
+       function requestGridBrowserPage(offset, limit) {
+           if (!root.activePlugin) return;
+           
+           const input = {
+               step: "gridBrowserPage",
+               offset: offset,
+               limit: limit,
+               session: root.activePlugin.session
+           };
+           
+           if (root.pluginContext) {
+               input.context = root.pluginContext;
+           }
+           
+           const isDaemonPlugin = root.activePlugin.manifest?.daemon?.enabled;
+           if (isDaemonPlugin && root.runningDaemons[root.activePlugin.id]) {
+               root.writeToDaemonStdin(root.activePlugin.id, input);
+           } else {
+               sendToPlugin(input);
+           }
+       }
+
+       // Ask a background daemon to fill in the lazy preview of one of its
+       // indexed items, focused in the main search
+       function requestIndexPreview(pluginId, itemId) {
+           if (!root.runningDaemons[pluginId]) return;
+           root.writeToDaemonStdin(pluginId, {
+               step: "preview",
+               selected: { id: itemId }
+           });
+       }
+
+       // Ask the active plugin to fill in a deferred ("lazy") preview for the
+       // focused item. The plugin answers with an update patching "preview".
+       function requestPreview(itemId) {
+           if (!root.activePlugin) return;
+           
+           const input = {
+               step: "preview",
+               selected: { id: itemId },
+               session: root.activePlugin.session
+           };
+           
+           if (root.pluginContext) {
+               input.context = root.pluginContext;
+           }
+           
+           const isDaemonPlugin = root.activePlugin.manifest?.daemon?.enabled;
+           if (isDaemonPlugin && root.runningDaemons[root.activePlugin.id]) {
+               root.writeToDaemonStdin(root.activePlugin.id, input);
+           } else {
+               sendToPlugin(input);
+           }
+       }
+    
       // Submit form data to active plugin
       function submitForm(formData) {
           if (!root.activePlugin) return;
@@ -2386,11 +2448,24 @@ Singleton {
                  break;
                  
              case "gridBrowser":
+                 // Later page of an open paged grid: append instead of reopening
+                 if (response.gridBrowser && (response.gridBrowser.offset ?? 0) > 0) {
+                     if (GlobalStates.gridBrowserOpen) {
+                         GlobalStates.appendGridBrowserItems(
+                             response.gridBrowser.offset,
+                             response.gridBrowser.items ?? [],
+                             response.gridBrowser.total
+                         );
+                     }
+                     break;
+                 }
                  if (response.gridBrowser) {
                      const isInitial = root.navigationDepth === 0;
+                     const items = response.gridBrowser.items ?? [];
                      const config = {
                          title: response.gridBrowser.title ?? root.activePlugin?.manifest?.name ?? "Select Item",
-                         items: response.gridBrowser.items ?? [],
+                         items: items,
+                         total: response.gridBrowser.total ?? items.length,
                          columns: response.gridBrowser.columns ?? 8,
                          cellAspectRatio: response.gridBrowser.cellAspectRatio ?? 1.0,
                          actions: response.gridBrowser.actions ?? [],
@@ -2407,6 +2482,10 @@ Singleton {
              case "error":
                  root.pluginError = response.message ?? "Unknown error";
                  console.warn(`[PluginRunner] Error: ${root.pluginError}`);
+                 // Let a paged grid waiting on its next page retry later
+                 if (GlobalStates.gridBrowserOpen) {
+                     GlobalStates.gridBrowserPageFailed();
+                 }
                  break;
              
              case "noop":
@@ -2426,6 +2505,20 @@ Singleton {
          }
      }
     
+     // Load deferred previews when a plugin or indexed item gets focus
+     Connections {
+         target: GlobalStates
+         function onPreviewItemChanged() {
+             const item = GlobalStates.previewItem;
+             if (!item?.preview?.lazy || !item._pluginId) return;
+             if (item._pluginId === root.activePlugin?.id) {
+                 root.requestPreview(item.pluginItemId ?? item.id);
+             } else {
+                 root.requestIndexPreview(item._pluginId, item.id);
+             }
+         }
+     }
+    
      // Handle image browser selection - send back to plugin
      Connections {
          target: GlobalStates